@@ -1,8 +1,10 @@
 from django.conf import settings
+from django.urls import path
 from rest_framework.routers import DefaultRouter
 from rest_framework.routers import SimpleRouter
 
 from todo.users.views import UserViewSet
+from todo.todos.async_views import todo_events
 from todo.todos.views import TodoViewSet
 
 router = DefaultRouter() if settings.DEBUG else SimpleRouter()
@@ -11,4 +13,8 @@ router.register("users", UserViewSet)
 router.register("todos", TodoViewSet, basename="todos")
 
 app_name = "api"
-urlpatterns = router.urls
+urlpatterns = [
+    # Ahead of the router, whose todos/<pk>/ route would otherwise match it
+    path("todos/events/", todo_events, name="todo-events"),
+    *router.urls,
+]
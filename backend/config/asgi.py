@@ -0,0 +1,31 @@
+"""
+ASGI config for todo project.
+
+Serves the same Django project as ``config/wsgi.py`` under an ASGI server
+(uvicorn workers under gunicorn, see ``compose/production/django/start-asgi``).
+In this mode ``DJANGO_ASYNC_API`` is switched on, so the safe todo actions are
+handled by async view handlers on the event loop and idle or slow
+connections do not each pin a worker thread.
+
+"""
+
+import os
+import sys
+from pathlib import Path
+
+from django.core.asgi import get_asgi_application
+
+# This allows easy placement of apps within the interior
+# todo directory.
+BASE_DIR = Path(__file__).resolve(strict=True).parent.parent
+sys.path.append(str(BASE_DIR / "todo"))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.production")
+os.environ.setdefault("DJANGO_ASYNC_API", "True")
+
+application = get_asgi_application()
+
+# Load the Keycloak signing keys now and keep them fresh in the background,
+# so no request has to wait on a JWKS fetch.
+from todo.auth_keycloak.refresh import start_jwks_refresher  # noqa: E402
+
+start_jwks_refresher()
@@ -6,6 +6,7 @@ import ssl
 from pathlib import Path
 
 import environ
+from corsheaders.defaults import default_headers
 
 BASE_DIR = Path(__file__).resolve(strict=True).parent.parent.parent
 # todo/
@@ -58,6 +59,10 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 ROOT_URLCONF = "config.urls"
 # https://docs.djangoproject.com/en/dev/ref/settings/#wsgi-application
 WSGI_APPLICATION = "config.wsgi.application"
+# https://docs.djangoproject.com/en/dev/ref/settings/#asgi-application
+ASGI_APPLICATION = "config.asgi.application"
+# Serve safe API actions with async handlers (turned on by config/asgi.py)
+ASYNC_API = env.bool("DJANGO_ASYNC_API", default=False)
 
 # APPS
 # ------------------------------------------------------------------------------
@@ -84,7 +89,8 @@ THIRD_PARTY_APPS = [
 
 LOCAL_APPS = [
     "todo.users",
-    "todo.todos"
+    "todo.todos",
+    "todo.auth_keycloak",
   # Your stuff: custom apps go here
 ]
 # https://docs.djangoproject.com/en/dev/ref/settings/#installed-apps
@@ -317,6 +323,9 @@ REST_FRAMEWORK = {
 
 # django-cors-headers - https://github.com/adamchainz/django-cors-headers#setup
 CORS_URLS_REGEX = r"^/api/.*$"
+# Let the frontend read ETags and send them back for conditional requests
+CORS_EXPOSE_HEADERS = ["ETag"]
+CORS_ALLOW_HEADERS = (*default_headers, "if-match", "if-none-match")
 
 # By Default swagger ui is available only to admin user(s). You can change permission classes to change that
 # See more configuration options at https://drf-spectacular.readthedocs.io/en/latest/settings.html#settings
@@ -343,6 +352,71 @@ KEYCLOAK_AUDIENCE = env.str("KEYCLOAK_AUDIENCE", default="todo")
 KEYCLOAK_JWKS_URL = env.str("KEYCLOAK_JWKS_URL", default=f"{KEYCLOAK_SERVER}/realms/{KEYCLOAK_REALM}/protocol/openid-connect/certs")
 KEYCLOAK_ISSUER = env.str("KEYCLOAK_ISSUER", default=f"http://localhost:8080/realms/{KEYCLOAK_REALM}")
 
+# JWKS refresh: Keycloak's Cache-Control is followed within these bounds (seconds)
+KEYCLOAK_JWKS_REFRESH_INTERVAL = env.int("KEYCLOAK_JWKS_REFRESH_INTERVAL", default=60 * 15)
+KEYCLOAK_JWKS_MIN_REFRESH_INTERVAL = env.int("KEYCLOAK_JWKS_MIN_REFRESH_INTERVAL", default=30)
+# Start a background refresher thread in each web worker (see config/wsgi.py)
+KEYCLOAK_JWKS_REFRESHER = env.bool("KEYCLOAK_JWKS_REFRESHER", default=True)
+# HTTP transport for Keycloak calls: timeout (seconds), retries with jittered backoff,
+# connection pool size and circuit breaker
+KEYCLOAK_HTTP_TIMEOUT = env.float("KEYCLOAK_HTTP_TIMEOUT", default=2.0)
+KEYCLOAK_HTTP_RETRIES = env.int("KEYCLOAK_HTTP_RETRIES", default=2)
+KEYCLOAK_HTTP_BACKOFF = env.float("KEYCLOAK_HTTP_BACKOFF", default=0.1)
+KEYCLOAK_HTTP_POOL_SIZE = env.int("KEYCLOAK_HTTP_POOL_SIZE", default=10)
+KEYCLOAK_BREAKER_FAILURE_THRESHOLD = env.int("KEYCLOAK_BREAKER_FAILURE_THRESHOLD", default=5)
+KEYCLOAK_BREAKER_RESET_TIMEOUT = env.int("KEYCLOAK_BREAKER_RESET_TIMEOUT", default=30)
+# Keep the shared JWKS fresh from celery beat as well, so workers rarely revalidate themselves
+# https://docs.celeryq.dev/en/stable/userguide/periodic-tasks.html#beat-entries
+CELERY_BEAT_SCHEDULE = {
+    "refresh-keycloak-jwks": {
+        "task": "todo.auth_keycloak.tasks.refresh_jwks_cache",
+        "schedule": KEYCLOAK_JWKS_REFRESH_INTERVAL // 2,
+    },
+}
+
+# Verified-token cache: in-process LRU size and optional shared Django cache alias
+KEYCLOAK_TOKEN_CACHE_SIZE = env.int("KEYCLOAK_TOKEN_CACHE_SIZE", default=1024)
+KEYCLOAK_TOKEN_CACHE_ALIAS = env.str("KEYCLOAK_TOKEN_CACHE_ALIAS", default=None)
+# Negative cache of rejected token digests (seconds / entries)
+KEYCLOAK_REJECTED_TOKEN_TTL = env.int("KEYCLOAK_REJECTED_TOKEN_TTL", default=60)
+KEYCLOAK_REJECTED_TOKEN_CACHE_SIZE = env.int("KEYCLOAK_REJECTED_TOKEN_CACHE_SIZE", default=4096)
+# Structured auth traces: always on, or for a sampled fraction (0.0 - 1.0) of requests
+KEYCLOAK_AUTH_DIAGNOSTICS = env.bool("KEYCLOAK_AUTH_DIAGNOSTICS", default=False)
+KEYCLOAK_AUTH_DIAGNOSTICS_SAMPLE_RATE = env.float("KEYCLOAK_AUTH_DIAGNOSTICS_SAMPLE_RATE", default=0.0)
+# Mirror Keycloak subjects into users.User; activity is written in bulk every N seconds
+KEYCLOAK_MIRROR_USERS = env.bool("KEYCLOAK_MIRROR_USERS", default=False)
+KEYCLOAK_MIRROR_FLUSH_INTERVAL = env.int("KEYCLOAK_MIRROR_FLUSH_INTERVAL", default=60)
+
+# Todos
+# ------------------------------------------------------------------------------
+# Keyset pagination of the todo list: default and largest page a client may ask for
+TODO_PAGE_SIZE = env.int("TODO_PAGE_SIZE", default=50)
+TODO_MAX_PAGE_SIZE = env.int("TODO_MAX_PAGE_SIZE", default=200)
+# Largest batch accepted by /api/todos/bulk/
+TODO_BULK_MAX_ITEMS = env.int("TODO_BULK_MAX_ITEMS", default=1000)
+# Valid rows written per transaction by the import_todos command and task
+TODO_IMPORT_BATCH_SIZE = env.int("TODO_IMPORT_BATCH_SIZE", default=10000)
+# Rows fetched per round trip by the streaming /api/todos/export/
+TODO_EXPORT_CHUNK_SIZE = env.int("TODO_EXPORT_CHUNK_SIZE", default=2000)
+# Read-through cache of rendered todo responses, invalidated by a per-user version
+TODO_RESPONSE_CACHE = env.bool("TODO_RESPONSE_CACHE", default=True)
+TODO_RESPONSE_CACHE_ALIAS = env.str("TODO_RESPONSE_CACHE_ALIAS", default="default")
+TODO_RESPONSE_CACHE_TIMEOUT = env.int("TODO_RESPONSE_CACHE_TIMEOUT", default=300)
+# Delta sync: todos per /changes/ response, and how long sync tokens (and tombstones) last
+TODO_SYNC_PAGE_SIZE = env.int("TODO_SYNC_PAGE_SIZE", default=500)
+TODO_SYNC_RETENTION_DAYS = env.int("TODO_SYNC_RETENTION_DAYS", default=30)
+CELERY_BEAT_SCHEDULE["prune-todo-tombstones"] = {
+    "task": "todo.todos.tasks.prune_todo_tombstones",
+    "schedule": 60 * 60 * 24,
+}
+# Server-sent events at /api/todos/events/ (needs ASYNC_API and Redis): events kept
+# per user for Last-Event-ID resume, how long an idle backlog lives, and the
+# heartbeat interval in seconds
+TODO_EVENTS = env.bool("TODO_EVENTS", default=False)
+TODO_EVENTS_BACKLOG = env.int("TODO_EVENTS_BACKLOG", default=1000)
+TODO_EVENTS_BACKLOG_TTL = env.int("TODO_EVENTS_BACKLOG_TTL", default=60 * 60 * 24)
+TODO_EVENTS_HEARTBEAT = env.int("TODO_EVENTS_HEARTBEAT", default=15)
+
 
 #
 # # Add these missing Keycloak settings:
@@ -83,3 +83,6 @@ CORS_ALLOWED_ORIGINS = [
 ]
 
 CORS_ALLOW_CREDENTIALS = False
+
+# Trace every Keycloak authentication while developing
+KEYCLOAK_AUTH_DIAGNOSTICS = env.bool("KEYCLOAK_AUTH_DIAGNOSTICS", default=True)
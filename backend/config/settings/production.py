@@ -198,3 +198,13 @@ SPECTACULAR_SETTINGS["SERVERS"] = [
 ]
 # Your stuff...
 # ------------------------------------------------------------------------------
+
+# Keycloak
+# ------------------------------------------------------------------------------
+# Share verified tokens between gunicorn workers through the Redis cache above.
+KEYCLOAK_TOKEN_CACHE_ALIAS = env.str("KEYCLOAK_TOKEN_CACHE_ALIAS", default="default")
+
+# Todos
+# ------------------------------------------------------------------------------
+# Push todo changes to clients over /api/todos/events/ when served by the ASGI workers.
+TODO_EVENTS = env.bool("TODO_EVENTS", default=True)
@@ -36,3 +36,5 @@ TEMPLATES[0]["OPTIONS"]["debug"] = True  # type: ignore[index]
 MEDIA_URL = "http://media.testserver/"
 # Your stuff...
 # ------------------------------------------------------------------------------
+# Flush mirrored Keycloak user activity explicitly instead of from a thread
+KEYCLOAK_MIRROR_FLUSH_INTERVAL = 0
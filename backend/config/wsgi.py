@@ -30,3 +30,9 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.production")
 # file. This includes Django's development server, if the WSGI_APPLICATION
 # setting points here.
 application = get_wsgi_application()
+
+# Load the Keycloak signing keys now and keep them fresh in the background,
+# so no request has to wait on a JWKS fetch.
+from todo.auth_keycloak.refresh import start_jwks_refresher  # noqa: E402
+
+start_jwks_refresher()
@@ -0,0 +1,6 @@
+from django.apps import AppConfig
+
+
+class AuthKeycloakConfig(AppConfig):
+    name = "todo.auth_keycloak"
+    verbose_name = "Keycloak authentication"
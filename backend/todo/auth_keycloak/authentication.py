@@ -1,15 +1,23 @@
 import logging
 from typing import Optional, Tuple
-from urllib.parse import splitvalue
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from rest_framework.authentication import BaseAuthentication, get_authorization_header
 from rest_framework import exceptions
 import jwt
-from jwt import PyJWKClient
-from .jwks import get_jwks
+from .diagnostics import AuthTrace, start_trace
+from .jwks import KeyNotLoaded, jwks_store
+from .signals import keycloak_user_authenticated
+from .token_cache import rejected_tokens, token_cache, token_digest
 
 logger = logging.getLogger(__name__)
 
+ALGORITHMS = ["RS256"]
+DECODE_OPTIONS = {
+    "require": ["exp", "iat", "iss"],
+    "verify_aud": False,
+}
+
 class KeycloakJWTAuthentication(BaseAuthentication):
     """
     DRF Authentication that:
@@ -17,27 +25,39 @@ class KeycloakJWTAuthentication(BaseAuthentication):
     - Validates signature with Keycloak realm JWKS (RS256)
     - Enforces iss, aud, exp (with leeway)
     Returns (user, token_payload) where user is a lightweight object.
+
+    The token is parsed once and nothing is formatted for logging unless the
+    request is traced (see ``diagnostics.start_trace``). Rejections are
+    logged at WARNING with their reason in every mode.
     """
 
     www_authenticate_realm = "api"
 
     def authenticate(self, request) -> Optional[Tuple[object, dict]]:
-        logger.info(f"🔍 === AUTHENTICATION ATTEMPT ===")
-        logger.info(f"🔍 Request path: {request.path}")
-        logger.info(f"🔍 Request method: {request.method}")
-
+        result = self._authenticate(request)
+        if result is not None:
+            keycloak_user_authenticated.send(sender=type(self), user=result[0], request=request)
+        return result
+
+    async def authenticate_async(self, request) -> Optional[Tuple[object, dict]]:
+        """
+        ``authenticate`` for async views. Cache hits and keys already in the
+        store are handled on the event loop; only a key store miss leaves it,
+        running the (pooled, circuit-broken) JWKS fetch in a worker thread.
+        """
+        try:
+            result = self._authenticate(request, fetch_keys=False)
+        except KeyNotLoaded:
+            result = await sync_to_async(self._authenticate, thread_sensitive=False)(request)
+        if result is not None:
+            await keycloak_user_authenticated.asend(sender=type(self), user=result[0], request=request)
+        return result
+
+    def _authenticate(self, request, fetch_keys: bool = True) -> Optional[Tuple[object, dict]]:
         auth = get_authorization_header(request).split()
 
-        logger.info(f"Auth header received: {auth}")
-        logger.info(f"KEYCLOAK_JWKS_URL: {settings.KEYCLOAK_JWKS_URL}")
-        logger.info(f"KEYCLOAK_ISSUER: {settings.KEYCLOAK_ISSUER}")
-        logger.info(f"KEYCLOAK_AUDIENCE: {settings.KEYCLOAK_AUDIENCE}")
-        logger.info(f"🔍 Token audience (aud) )))))))))): {settings.KEYCLOAK_AUDIENCE}")
-
         if not auth or auth[0].lower() != b"bearer":
-          logger.warning(f"❌ No Bearer token found or wrong format")
-
-          return None
+            return None
 
         if len(auth) == 1:
             raise exceptions.AuthenticationFailed("Invalid Authorization header: No credentials provided.")
@@ -45,92 +65,186 @@ class KeycloakJWTAuthentication(BaseAuthentication):
             raise exceptions.AuthenticationFailed("Invalid Authorization header: Token string should not contain spaces.")
 
         raw_token = auth[1].decode("utf-8")
-        logger.info(f"Token received: {raw_token[:50]}...")
+        digest = token_digest(raw_token)
+        trace = start_trace(request)
+
+        cached = token_cache.get(digest, build_user)
+        if cached is not None:
+            if trace:
+                trace.step("token_cache", hit=True)
+                trace.emit("accepted")
+            return cached
+
+        rejected = rejected_tokens.get(digest)
+        if rejected is not None:
+            if trace:
+                trace.step("rejected_cache", hit=True, detail=rejected)
+                trace.emit("rejected")
+            raise exceptions.AuthenticationFailed(rejected)
 
-        # For debugging token audience
         try:
-            # Decode WITHOUT verification to see token contents
-            unverified_payload = jwt.decode(raw_token, options={"verify_signature": False})
-            logger.info(f"🔍 Token contents: {unverified_payload}")
-            logger.info(f"🔍 Token audience (aud): {unverified_payload.get('aud')}")
-            logger.info(f"🔍 Token issuer (iss): {unverified_payload.get('iss')}")
-            logger.info(f"🔍 Expected audience: {settings.KEYCLOAK_AUDIENCE}")
-            logger.info(f"🔍 Expected issuer: {settings.KEYCLOAK_ISSUER}")
-        except Exception as e:
-            logger.error(f"Could not decode token for debugging: {e}")
-
-        # stop aud debugging
-
-        logger.info(f"KEYCLOAK_JWKS_URL: {settings.KEYCLOAK_JWKS_URL}")
+            result = self.verify(raw_token, digest, trace, fetch_keys)
+        except exceptions.AuthenticationFailed:
+            if trace:
+                trace.emit("rejected")
+            raise
+
+        if trace:
+            trace.emit("accepted")
+        return result
+
+    def verify(
+        self,
+        raw_token: str,
+        digest: str,
+        trace: Optional[AuthTrace] = None,
+        fetch_keys: bool = True,
+    ) -> Tuple[object, dict]:
+        """Full signature and claim check for a token neither cache knows about."""
+        try:
+            header = jwt.get_unverified_header(raw_token)
+        except jwt.DecodeError as e:
+            raise reject(digest, "malformed", f"Unable to obtain signing key: {e}")
 
-        # Use PyJWKClient correctly - point directly to JWKS URL
-        jwk_client = PyJWKClient(settings.KEYCLOAK_JWKS_URL)
+        kid = header.get("kid")
+        if trace:
+            trace.step("header", kid=kid, alg=header.get("alg"))
 
         try:
-            logger.info(f"able to get jwk_client: {jwk_client}")
-            logger.info(f"jwk_client: {raw_token[:50]}...")
-            logger.info(f"signing_key start: {jwk_client.get_signing_key_from_jwt(raw_token)}")
-            signing_key = jwk_client.get_signing_key_from_jwt(raw_token)
-            logger.info(f"Successfully obtained signing key: {signing_key}")
+            signing_key = jwks_store.get_signing_key(kid, fetch=fetch_keys)
+        except KeyNotLoaded:
+            raise
         except Exception as e:
-            logger.error(f"Unable to obtain signing key: {e}")
+            # Not cached: the key may appear once the realm certs are refreshed.
+            logger.warning("Rejected Keycloak token (unknown_key): %s", e)
+            rejected_tokens.count("unknown_key")
             raise exceptions.AuthenticationFailed(f"Unable to obtain signing key: {e}")
 
+        if trace:
+            trace.step("signing_key", kid=kid)
+
         try:
             payload = jwt.decode(
                 raw_token,
-                signing_key.key,
-                algorithms=["RS256"],
+                signing_key,
+                algorithms=ALGORITHMS,
                 audience=settings.KEYCLOAK_AUDIENCE,
                 issuer=settings.KEYCLOAK_ISSUER,
                 leeway=settings.KEYCLOAK_LEEWAY,
-                options={
-                    "require": ["exp", "iat", "iss"],
-                    "verify_aud": False,
-                },
+                options=DECODE_OPTIONS,
             )
-
-            logger.info('token validation successful')
-        except jwt.ExpiredSignatureError as e:
-            logger.error(f"❌ Token has expired: {e}")
-            raise exceptions.AuthenticationFailed("Token has expired.")
-        except jwt.InvalidIssuerError as e:
-          logger.error(f"❌ Invalid token issuer: {e}")
-          logger.error(f"Expected issuer: {settings.KEYCLOAK_ISSUER}")
-          raise exceptions.AuthenticationFailed("Invalid token issuer.")
-        except jwt.InvalidAudienceError as e:
-          logger.error(f"❌ Invalid token audience: {e}")
-          logger.error(f"Expected audience: {settings.KEYCLOAK_AUDIENCE}")
-          raise exceptions.AuthenticationFailed("Invalid token audience.")
+        except jwt.ExpiredSignatureError:
+            raise reject(digest, "expired", "Token has expired.")
+        except jwt.InvalidIssuerError:
+            raise reject(digest, "invalid_issuer", "Invalid token issuer.")
+        except jwt.InvalidAudienceError:
+            raise reject(digest, "invalid_audience", "Invalid token audience.")
+        except jwt.InvalidSignatureError as e:
+            raise reject(digest, "invalid_signature", f"Token validation error: {e}")
         except Exception as e:
-          logger.error(f"❌ JWT decode failed with error: {e}")
-          logger.error(f"Error type: {type(e)}")
-          raise exceptions.AuthenticationFailed(f"Token validation error: {e}")
-
-        # Build a lightweight user object (no DB hit). You can plug your User model here if desired.
-        user = KeycloakUser(
-            sub=payload.get("sub"),
-            username=payload.get("preferred_username") or payload.get("email") or payload.get("sub"),
-            email=payload.get("email"),
-            raw=payload,
-        )
-        logger.info(f"✅ Authentication successful for user: {user.username}")
-        return (user, payload)
+            raise reject(digest, "invalid_token", f"Token validation error: {e}")
+
+        if trace:
+            trace.step("claims", iss=payload.get("iss"), aud=payload.get("aud"), exp=payload.get("exp"))
+
+        user = build_user(payload)
+        token_cache.set(digest, user, payload)
+        return user, payload
 
     def authenticate_header(self, request) -> str:
         return f'Bearer realm="{self.www_authenticate_realm}"'
 
+def reject(digest: str, reason: str, detail: str) -> exceptions.AuthenticationFailed:
+    """Remember a rejected token so repeats are refused without re-verifying it."""
+    logger.warning("Rejected Keycloak token (%s): %s", reason, detail)
+    rejected_tokens.add(digest, reason, detail)
+    return exceptions.AuthenticationFailed(detail)
+
+def build_user(payload: dict) -> "KeycloakUser":
+    # Build a lightweight user object (no DB hit). You can plug your User model here if desired.
+    return KeycloakUser(
+        sub=payload.get("sub"),
+        username=payload.get("preferred_username") or payload.get("email") or payload.get("sub"),
+        email=payload.get("email"),
+        raw=payload,
+    )
+
 class KeycloakUser:
     """
     Minimal user object DRF can use. Mark as authenticated.
+
+    Slotted and immutable, so one instance can be shared by every request that
+    presents the same token (see ``token_cache``). Realm roles, client roles
+    and scopes are parsed from the raw claims into frozensets the first time
+    they are read, making role checks O(1) membership tests.
     """
+
+    __slots__ = ("id", "username", "email", "_payload", "_realm_roles", "_client_roles", "_scopes")
+
+    is_authenticated = True
+    is_anonymous = False
+    is_staff = False
+    is_superuser = False
+
     def __init__(self, sub: str, username: str, email: Optional[str], raw: dict):
-        self.id = sub
-        self.username = username
-        self.email = email
-        self._payload = raw
+        _set = object.__setattr__
+        _set(self, "id", sub)
+        _set(self, "username", username)
+        _set(self, "email", email)
+        _set(self, "_payload", raw)
+        _set(self, "_realm_roles", None)
+        _set(self, "_client_roles", None)
+        _set(self, "_scopes", None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __str__(self) -> str:
+        return self.username or ""
 
     @property
-    def is_authenticated(self) -> bool:
-        return True
+    def pk(self) -> str:
+        return self.id
+
+    @property
+    def claims(self) -> dict:
+        return self._payload
+
+    @property
+    def realm_roles(self) -> frozenset:
+        roles = self._realm_roles
+        if roles is None:
+            roles = frozenset((self._payload.get("realm_access") or {}).get("roles") or ())
+            object.__setattr__(self, "_realm_roles", roles)
+        return roles
+
+    def client_roles(self, client: Optional[str] = None) -> frozenset:
+        """Roles granted on ``client`` (defaults to ``KEYCLOAK_CLIENT_ID``) via ``resource_access``."""
+        by_client = self._client_roles
+        if by_client is None:
+            by_client = {
+                name: frozenset(access.get("roles") or ())
+                for name, access in (self._payload.get("resource_access") or {}).items()
+            }
+            object.__setattr__(self, "_client_roles", by_client)
+        return by_client.get(client or settings.KEYCLOAK_CLIENT_ID, frozenset())
+
+    @property
+    def scopes(self) -> frozenset:
+        scopes = self._scopes
+        if scopes is None:
+            scopes = frozenset((self._payload.get("scope") or "").split())
+            object.__setattr__(self, "_scopes", scopes)
+        return scopes
+
+    def has_realm_role(self, role: str) -> bool:
+        return role in self.realm_roles
+
+    def has_client_role(self, role: str, client: Optional[str] = None) -> bool:
+        return role in self.client_roles(client)
 
+    def has_scope(self, scope: str) -> bool:
+        return scope in self.scopes
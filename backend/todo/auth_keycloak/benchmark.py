@@ -0,0 +1,231 @@
+"""
+Micro-benchmarks for ``KeycloakJWTAuthentication.authenticate``.
+
+Everything runs in-process: an RSA key is generated on the spot, its JWKS is
+served by ``StubKeycloak`` on localhost, and tokens are minted with claims
+sized like a real Keycloak access token. Each scenario times one path
+through ``authenticate`` and, in a second pass under ``tracemalloc``,
+measures the memory it allocates per call. ``run`` returns a JSON-ready
+dict and ``compare`` checks it against a saved baseline; both are driven by
+``manage.py benchmark_auth``.
+"""
+
+import logging
+import platform
+import statistics
+import time
+import tracemalloc
+import uuid
+from typing import Callable
+
+import cryptography
+import jwt
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework import exceptions
+from rest_framework.test import APIRequestFactory
+
+from .authentication import KeycloakJWTAuthentication
+from .jwks import CACHE_KEY
+from .jwks import jwks_store
+from .tests.factories import make_jwk
+from .tests.factories import make_rsa_key
+from .tests.factories import mint_token
+from .tests.stub_server import StubKeycloak
+from .token_cache import rejected_tokens
+from .token_cache import token_cache
+from .transport import keycloak_transport
+
+KID = "bench-kid"
+SCENARIOS = ("cold_key", "warm_key", "cache_hit", "expired", "bad_signature")
+
+
+def realistic_claims(index: int) -> dict:
+    """Claims shaped like a Keycloak access token for a user with a handful of roles."""
+    sub = str(uuid.UUID(int=index + 1))
+    return {
+        "sub": sub,
+        "jti": str(uuid.uuid4()),
+        "typ": "Bearer",
+        "azp": "todo-frontend",
+        "sid": str(uuid.uuid4()),
+        "acr": "1",
+        "scope": "openid profile email offline_access",
+        "allowed-origins": ["http://localhost:3000", "https://todo.example.com"],
+        "realm_access": {
+            "roles": ["default-roles-todo", "offline_access", "uma_authorization", "todo-user"],
+        },
+        "resource_access": {
+            "todo-backend": {"roles": ["todo:read", "todo:write", "todo:export"]},
+            "account": {"roles": ["manage-account", "manage-account-links", "view-profile"]},
+        },
+        "email_verified": True,
+        "name": f"Bench User {index}",
+        "given_name": "Bench",
+        "family_name": f"User {index}",
+        "preferred_username": f"bench-user-{index}",
+        "email": f"bench-user-{index}@example.com",
+    }
+
+
+class _Bench:
+    def __init__(self, iterations: int):
+        self.iterations = iterations
+        self.key = make_rsa_key()
+        self.other_key = make_rsa_key()
+        self.auth = KeycloakJWTAuthentication()
+        self.rf = APIRequestFactory()
+
+    def request(self, token: str):
+        return self.rf.get("/api/todos/", HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def tokens(self, key, **overrides) -> list[str]:
+        return [
+            mint_token(key, KID, **{**realistic_claims(i), **overrides})
+            for i in range(self.iterations)
+        ]
+
+    def scenario(self, name: str) -> tuple[list, Callable[[], None], Callable]:
+        """Return ``(requests, setup, call)`` for one scenario; ``setup`` runs untimed before each call."""
+        reset_caches = lambda: (token_cache.clear(), rejected_tokens.clear())  # noqa: E731
+        if name == "cold_key":
+            # Nothing in memory or in the shared cache: the key comes from the stub over HTTP.
+            return self._requests(self.tokens(self.key)), _reset_state, self.auth.authenticate
+        if name == "warm_key":
+            return self._requests(self.tokens(self.key)), reset_caches, self.auth.authenticate
+        if name == "cache_hit":
+            token = self.tokens(self.key)[0]
+            self.auth.authenticate(self.request(token))
+            return [self.request(token)] * self.iterations, lambda: None, self.auth.authenticate
+        if name == "expired":
+            return self._requests(self.tokens(self.key, iat=1, exp=2)), reset_caches, self._expect_failure
+        if name == "bad_signature":
+            return self._requests(self.tokens(self.other_key)), reset_caches, self._expect_failure
+        raise ValueError(f"Unknown scenario {name!r}")
+
+    def _requests(self, tokens: list[str]) -> list:
+        return [self.request(token) for token in tokens]
+
+    def _expect_failure(self, request) -> None:
+        try:
+            self.auth.authenticate(request)
+        except exceptions.AuthenticationFailed:
+            return
+        raise AssertionError("token was accepted")
+
+
+def run(iterations: int = 500, scenarios: tuple = SCENARIOS) -> dict:
+    """Run the benchmark scenarios and return their timings and allocations."""
+    bench = _Bench(iterations)
+    stub = StubKeycloak({"keys": [make_jwk(bench.key, KID)]})
+    stub.start()
+    # Rejections log a warning per call; keep them out of the output.
+    logging.disable(logging.WARNING)
+    try:
+        with override_settings(
+            KEYCLOAK_JWKS_URL=stub.jwks_url,
+            KEYCLOAK_TOKEN_CACHE_ALIAS=None,
+            KEYCLOAK_AUTH_DIAGNOSTICS=False,
+            KEYCLOAK_AUTH_DIAGNOSTICS_SAMPLE_RATE=0.0,
+            KEYCLOAK_MIRROR_USERS=False,
+        ):
+            _reset_state()
+            results = {name: _measure(bench, name) for name in scenarios}
+    finally:
+        logging.disable(logging.NOTSET)
+        stub.stop()
+        _reset_state()
+
+    return {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "iterations": iterations,
+        "token_bytes": len(mint_token(bench.key, KID, **realistic_claims(0))),
+        "environment": {
+            "python": platform.python_version(),
+            "pyjwt": jwt.__version__,
+            "cryptography": cryptography.__version__,
+            "machine": platform.machine(),
+        },
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list[str]:
+    """
+    Scenarios whose median got slower than ``baseline`` by more than
+    ``tolerance`` (0.2 means 20%); an empty list means no regression.
+    """
+    regressions = []
+    for name, result in current["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if not before or not before["p50_us"]:
+            continue
+        ratio = result["p50_us"] / before["p50_us"]
+        if ratio > 1 + tolerance:
+            regressions.append(f"{name}: p50 {before['p50_us']}us -> {result['p50_us']}us ({ratio:.2f}x)")
+    return regressions
+
+
+def _measure(bench: _Bench, name: str) -> dict:
+    if name != "cold_key":
+        _warm_keys()
+    requests, setup, call = bench.scenario(name)
+
+    timings = []
+    for request in requests:
+        setup()
+        start = time.perf_counter_ns()
+        call(request)
+        timings.append(time.perf_counter_ns() - start)
+
+    if name != "cold_key":
+        _warm_keys()
+    requests, setup, call = bench.scenario(name)
+    allocations = []
+    tracemalloc.start()
+    try:
+        for request in requests:
+            setup()
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            call(request)
+            _, peak = tracemalloc.get_traced_memory()
+            allocations.append(peak - before)
+    finally:
+        tracemalloc.stop()
+
+    return _summarise(timings, allocations)
+
+
+def _summarise(timings: list[int], allocations: list[int]) -> dict:
+    if not timings:
+        return {"calls": 0}
+    timings = sorted(timings)
+    mean_ns = statistics.fmean(timings)
+    pick = lambda q: timings[min(int(len(timings) * q), len(timings) - 1)]  # noqa: E731
+    return {
+        "calls": len(timings),
+        "ops_per_sec": round(1e9 / mean_ns, 1),
+        "mean_us": round(mean_ns / 1000, 2),
+        "min_us": round(timings[0] / 1000, 2),
+        "p50_us": round(pick(0.50) / 1000, 2),
+        "p95_us": round(pick(0.95) / 1000, 2),
+        "p99_us": round(pick(0.99) / 1000, 2),
+        "alloc_peak_bytes_mean": round(statistics.fmean(allocations)) if allocations else None,
+        "alloc_peak_bytes_max": max(allocations) if allocations else None,
+    }
+
+
+def _warm_keys() -> None:
+    token_cache.clear()
+    rejected_tokens.clear()
+    jwks_store.get_signing_key(KID)
+
+
+def _reset_state() -> None:
+    # Only the JWKS entry: the benchmark may run against a shared (Redis) cache.
+    cache.delete(CACHE_KEY)
+    jwks_store.clear()
+    token_cache.clear()
+    rejected_tokens.clear()
+    keycloak_transport.reset()
@@ -0,0 +1,54 @@
+import logging
+import random
+import time
+from typing import Optional
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class AuthTrace:
+    """
+    Structured record of one pass through ``KeycloakJWTAuthentication``.
+
+    Only created when diagnostics are switched on or the request is sampled,
+    so the production path pays nothing for it. Each step stores its offset
+    from the start of authentication; ``emit`` writes the whole trace as a
+    single log record with the trace attached as ``extra["auth_trace"]``.
+    """
+
+    __slots__ = ("path", "method", "steps", "_start")
+
+    def __init__(self, request):
+        self.path = request.path
+        self.method = request.method
+        self.steps: list[dict] = []
+        self._start = time.perf_counter()
+
+    def step(self, name: str, **fields) -> None:
+        fields["step"] = name
+        fields["ms"] = round((time.perf_counter() - self._start) * 1000, 3)
+        self.steps.append(fields)
+
+    def emit(self, outcome: str) -> None:
+        trace = {
+            "path": self.path,
+            "method": self.method,
+            "outcome": outcome,
+            "total_ms": round((time.perf_counter() - self._start) * 1000, 3),
+            "steps": self.steps,
+        }
+        logger.info("keycloak auth %s %s: %s", self.method, self.path, outcome, extra={"auth_trace": trace})
+
+
+def start_trace(request) -> Optional[AuthTrace]:
+    """
+    Return an ``AuthTrace`` when ``KEYCLOAK_AUTH_DIAGNOSTICS`` is on or the
+    request falls within ``KEYCLOAK_AUTH_DIAGNOSTICS_SAMPLE_RATE``, else ``None``.
+    """
+    if settings.KEYCLOAK_AUTH_DIAGNOSTICS:
+        return AuthTrace(request)
+    rate = settings.KEYCLOAK_AUTH_DIAGNOSTICS_SAMPLE_RATE
+    if rate and random.random() < rate:  # noqa: S311
+        return AuthTrace(request)
+    return None
@@ -1,31 +1,196 @@
+import logging
+import threading
 import time
-from typing import Optional
+from typing import Any, Optional
+import jwt
 import requests
 from django.core.cache import cache
 from django.conf import settings
+from .transport import keycloak_transport
+
+logger = logging.getLogger(__name__)
 
 CACHE_KEY = "keycloak_jwks_cache"
-CACHE_TTL = 60 * 15  # 15 minutes
+# The cached entry outlives its freshness so its validators (ETag/Last-Modified)
+# can be reused for conditional requests and the keys survive a Keycloak outage.
+STATE_TTL = 60 * 60 * 24
+
+# Minimum seconds between forced refetches triggered by an unknown ``kid``.
+# Stops a stream of tokens with made-up kids from hammering Keycloak.
+UNKNOWN_KID_REFETCH_INTERVAL = 30
 
 def get_jwks(force: bool = False) -> dict:
     """
     Fetch and cache the JWKS from Keycloak realm. Mirrors the article's approach:
     pull realm certs and use them to validate RS256 JWTs.
+    With ``force`` the realm is asked again, conditionally if we hold validators.
+    """
+    state = cache.get(CACHE_KEY)
+    if state and not force:
+        return state["jwks"]
+    return _fetch_jwks(state)["jwks"]
+
+def refresh_jwks() -> dict:
     """
-    if not force:
-        jwks = cache.get(CACHE_KEY)
-        if jwks:
-            return jwks
+    Return the JWKS, revalidating it with Keycloak only once the freshness
+    lifetime from its ``Cache-Control`` has run out. Used by the refreshers,
+    so every worker can call it on its own schedule without multiplying
+    requests to the realm.
+    """
+    state = cache.get(CACHE_KEY)
+    if state and state["expires_at"] > time.time():
+        return state["jwks"]
+    return _fetch_jwks(state)["jwks"]
 
-    resp = requests.get(settings.KEYCLOAK_JWKS_URL, timeout=5)
-    resp.raise_for_status()
-    jwks = resp.json()
-    cache.set(CACHE_KEY, jwks, CACHE_TTL)
-    return jwks
+def jwks_expires_at() -> Optional[float]:
+    state = cache.get(CACHE_KEY)
+    return state["expires_at"] if state else None
 
 def warm_jwks_cache() -> None:
     try:
-        get_jwks(force=True)
+        jwks_store.load(refresh_jwks())
     except Exception:
-        # avoid hard-fail on startup; logs or Sentry hook can be added
-        pass
+        # avoid hard-fail on startup; the request path still fetches on a miss
+        logger.warning("Could not warm the JWKS cache", exc_info=True)
+
+def _fetch_jwks(state: Optional[dict]) -> dict:
+    headers = {}
+    if state:
+        if state.get("etag"):
+            headers["If-None-Match"] = state["etag"]
+        if state.get("last_modified"):
+            headers["If-Modified-Since"] = state["last_modified"]
+
+    try:
+        resp = keycloak_transport.get(settings.KEYCLOAK_JWKS_URL, headers=headers)
+    except requests.RequestException:
+        if not state:
+            raise
+        # Keycloak is degraded: keep serving the last known good keys and
+        # look again after the minimum interval instead of on every call.
+        logger.warning("JWKS fetch failed, serving last known good keys", exc_info=True)
+        state = {**state, "expires_at": time.time() + settings.KEYCLOAK_JWKS_MIN_REFRESH_INTERVAL}
+        cache.set(CACHE_KEY, state, STATE_TTL)
+        return state
+
+    if resp.status_code == 304 and state:
+        jwks = state["jwks"]
+    else:
+        resp.raise_for_status()
+        jwks = resp.json()
+
+    state = {
+        "jwks": jwks,
+        "etag": resp.headers.get("ETag") or (state or {}).get("etag"),
+        "last_modified": resp.headers.get("Last-Modified") or (state or {}).get("last_modified"),
+        "expires_at": time.time() + _freshness(resp.headers.get("Cache-Control")),
+    }
+    cache.set(CACHE_KEY, state, STATE_TTL)
+    return state
+
+def _freshness(cache_control: Optional[str]) -> float:
+    """
+    Seconds the JWKS may be used before revalidating, following Keycloak's
+    ``Cache-Control`` but clamped to the configured refresh bounds so a key
+    rotation is never picked up later than ``KEYCLOAK_JWKS_REFRESH_INTERVAL``.
+    """
+    max_age: float = settings.KEYCLOAK_JWKS_REFRESH_INTERVAL
+    directives = {}
+    for part in (cache_control or "").split(","):
+        name, _, value = part.strip().partition("=")
+        directives[name.lower()] = value.strip('"')
+    if "no-cache" in directives or "no-store" in directives:
+        max_age = 0
+    elif "max-age" in directives:
+        try:
+            max_age = int(directives["max-age"])
+        except ValueError:
+            pass
+    return min(
+        max(max_age, settings.KEYCLOAK_JWKS_MIN_REFRESH_INTERVAL),
+        settings.KEYCLOAK_JWKS_REFRESH_INTERVAL,
+    )
+
+
+class KeyNotLoaded(KeyError):
+    """The key is not in memory and the caller asked not to fetch it."""
+
+
+class JWKSKeyStore:
+    """
+    Process-wide store of Keycloak signing keys indexed by ``kid``.
+
+    Keys are parsed once into ``cryptography`` public key objects, so the
+    request path is a dict lookup. The Django cache (see ``get_jwks``) is the
+    shared tier behind it; Keycloak itself is only contacted when a token
+    carries a ``kid`` neither tier knows about. Concurrent misses in one
+    process wait on a single fetch instead of each issuing their own.
+    """
+
+    def __init__(self, refetch_interval: float = UNKNOWN_KID_REFETCH_INTERVAL):
+        self.refetch_interval = refetch_interval
+        self._keys: dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._last_forced_fetch = 0.0
+
+    def get_signing_key(self, kid: Optional[str], fetch: bool = True) -> Any:
+        """
+        Return the public key for ``kid``.
+        Raises ``KeyError`` if the realm does not publish it, or ``KeyNotLoaded``
+        without touching the network when ``fetch`` is off and the key is not
+        in memory yet (async callers then fetch from a worker thread).
+        """
+        key = self._keys.get(kid)
+        if key is not None:
+            return key
+        if not fetch:
+            raise KeyNotLoaded(kid)
+
+        generation = self._generation
+        with self._lock:
+            key = self._keys.get(kid)
+            if key is not None:
+                return key
+            if self._generation == generation:
+                # Nobody refreshed while we waited on the lock, so this thread does it.
+                self._refresh_for(kid)
+            key = self._keys.get(kid)
+
+        if key is None:
+            raise KeyError(f"No signing key found for kid {kid!r}")
+        return key
+
+    def load(self, jwks: dict) -> None:
+        """Replace the in-process key index with the keys from ``jwks``."""
+        keys = {}
+        for jwk in jwks.get("keys", []):
+            if jwk.get("use", "sig") != "sig" or "kid" not in jwk:
+                continue
+            try:
+                keys[jwk["kid"]] = jwt.PyJWK(jwk).key
+            except jwt.PyJWTError as e:
+                logger.warning("Skipping unusable JWK %s: %s", jwk.get("kid"), e)
+        self._keys = keys
+        self._generation += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._keys = {}
+            self._generation += 1
+            self._last_forced_fetch = 0.0
+
+    def _refresh_for(self, kid: Optional[str]) -> None:
+        # Try the shared cache tier first: another worker may already have the new key.
+        self.load(get_jwks())
+        if kid in self._keys:
+            return
+
+        now = time.monotonic()
+        if self._last_forced_fetch and now - self._last_forced_fetch < self.refetch_interval:
+            return
+        self._last_forced_fetch = now
+        self.load(get_jwks(force=True))
+
+
+jwks_store = JWKSKeyStore()
@@ -0,0 +1,47 @@
+import json
+
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+
+from todo.auth_keycloak import benchmark
+
+
+class Command(BaseCommand):
+    """
+    Time the Keycloak authentication hot path and optionally fail on regressions:
+
+        python manage.py benchmark_auth --output auth-bench.json
+        python manage.py benchmark_auth --baseline auth-bench.json --tolerance 0.25
+    """
+
+    help = "Benchmark KeycloakJWTAuthentication against an in-process JWKS stub"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=500)
+        parser.add_argument("--scenario", action="append", choices=benchmark.SCENARIOS, dest="scenarios")
+        parser.add_argument("--output", help="Write the results as JSON to this file")
+        parser.add_argument("--baseline", help="Earlier JSON results to compare against")
+        parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed p50 slowdown (0.2 = 20%%)")
+
+    def handle(self, *args, **options):
+        results = benchmark.run(
+            iterations=options["iterations"],
+            scenarios=tuple(options["scenarios"] or benchmark.SCENARIOS),
+        )
+
+        self.stdout.write(f"{'scenario':<14} {'ops/s':>10} {'p50 us':>9} {'p99 us':>9} {'alloc B':>9}")
+        for name, r in results["results"].items():
+            self.stdout.write(
+                f"{name:<14} {r['ops_per_sec']:>10} {r['p50_us']:>9} {r['p99_us']:>9} {r['alloc_peak_bytes_mean']:>9}"
+            )
+
+        if options["output"]:
+            with open(options["output"], "w") as fh:
+                json.dump(results, fh, indent=2)
+
+        if options["baseline"]:
+            with open(options["baseline"]) as fh:
+                regressions = benchmark.compare(results, json.load(fh), options["tolerance"])
+            if regressions:
+                raise CommandError("Authentication got slower:\n" + "\n".join(regressions))
+            self.stdout.write(self.style.SUCCESS("No regressions against the baseline"))
@@ -0,0 +1,63 @@
+from typing import Optional
+from rest_framework.permissions import BasePermission
+
+
+class _KeycloakClaimPermission(BasePermission):
+    """
+    Base for permissions answered from the token claims of a ``KeycloakUser``.
+
+    The required values come from ``required`` (set through ``require()``) or,
+    failing that, from the view attribute named by ``view_attribute``. Access
+    is granted when all of them are present, which is a frozenset subset
+    check: no database query and no claim parsing after the first access.
+    Users authenticated some other way (session, DRF token) are refused.
+    """
+
+    required: frozenset = frozenset()
+    view_attribute = ""
+
+    @classmethod
+    def require(cls, *values: str, **attrs):
+        """Return a subclass bound to ``values``, e.g. ``HasRealmRole.require("admin")``."""
+        name = f"{cls.__name__}({', '.join(values)})"
+        return type(name, (cls,), {"required": frozenset(values), **attrs})
+
+    def has_permission(self, request, view) -> bool:
+        required = self.required or frozenset(getattr(view, self.view_attribute, ()))
+        granted = self.granted(request.user)
+        return granted is not None and required <= granted
+
+    def granted(self, user) -> Optional[frozenset]:
+        raise NotImplementedError
+
+
+class HasRealmRole(_KeycloakClaimPermission):
+    """User holds every role in ``required`` / ``view.required_realm_roles`` (``realm_access.roles``)."""
+
+    view_attribute = "required_realm_roles"
+
+    def granted(self, user) -> Optional[frozenset]:
+        return getattr(user, "realm_roles", None)
+
+
+class HasClientRole(_KeycloakClaimPermission):
+    """
+    User holds every role in ``required`` / ``view.required_client_roles`` on
+    ``client`` (``resource_access.<client>.roles``, defaults to ``KEYCLOAK_CLIENT_ID``).
+    """
+
+    view_attribute = "required_client_roles"
+    client: Optional[str] = None
+
+    def granted(self, user) -> Optional[frozenset]:
+        client_roles = getattr(user, "client_roles", None)
+        return client_roles(self.client) if client_roles else None
+
+
+class HasScope(_KeycloakClaimPermission):
+    """Token carries every scope in ``required`` / ``view.required_scopes`` (``scope`` claim)."""
+
+    view_attribute = "required_scopes"
+
+    def granted(self, user) -> Optional[frozenset]:
+        return getattr(user, "scopes", None)
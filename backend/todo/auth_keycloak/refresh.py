@@ -0,0 +1,61 @@
+import logging
+import random
+import threading
+import time
+from typing import Optional
+from django.conf import settings
+from .jwks import jwks_expires_at, jwks_store, refresh_jwks
+
+logger = logging.getLogger(__name__)
+
+_refresher: Optional["JWKSRefresher"] = None
+_refresher_lock = threading.Lock()
+
+
+class JWKSRefresher(threading.Thread):
+    """
+    Daemon thread that keeps ``jwks_store`` loaded off the request path.
+
+    It loads the realm keys as soon as the worker starts and then wakes up
+    whenever the cached JWKS goes stale, so keys Keycloak publishes ahead of
+    a rotation are indexed before the first token signed with them arrives.
+    Revalidation goes through ``refresh_jwks``, which is conditional and
+    shared through the Django cache, so N workers cost about one request per
+    freshness period (or none, if the Celery beat task keeps it fresh).
+    """
+
+    def __init__(self):
+        super().__init__(name="keycloak-jwks-refresher", daemon=True)
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                jwks_store.load(refresh_jwks())
+            except Exception:
+                logger.warning("JWKS refresh failed, keeping the current keys", exc_info=True)
+            self._stop_event.wait(self.next_delay())
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+    @staticmethod
+    def next_delay() -> float:
+        minimum = settings.KEYCLOAK_JWKS_MIN_REFRESH_INTERVAL
+        expires_at = jwks_expires_at()
+        delay = expires_at - time.time() if expires_at else minimum
+        delay = min(max(delay, minimum), settings.KEYCLOAK_JWKS_REFRESH_INTERVAL)
+        # jitter so workers started together do not revalidate in lockstep
+        return delay * random.uniform(1.0, 1.1)  # noqa: S311
+
+
+def start_jwks_refresher() -> Optional[JWKSRefresher]:
+    """Start the per-process refresher once, if ``KEYCLOAK_JWKS_REFRESHER`` is on."""
+    global _refresher  # noqa: PLW0603
+    if not settings.KEYCLOAK_JWKS_REFRESHER:
+        return None
+    with _refresher_lock:
+        if _refresher is None or not _refresher.is_alive():
+            _refresher = JWKSRefresher()
+            _refresher.start()
+    return _refresher
@@ -0,0 +1,5 @@
+from django.dispatch import Signal
+
+# Sent by KeycloakJWTAuthentication after every successful authentication,
+# cache hits included, with ``user`` (a KeycloakUser) and ``request``.
+keycloak_user_authenticated = Signal()
@@ -0,0 +1,9 @@
+from celery import shared_task
+
+from .jwks import get_jwks
+
+
+@shared_task()
+def refresh_jwks_cache():
+    """Revalidate the shared JWKS so web workers never fetch it on the request path."""
+    return [key.get("kid") for key in get_jwks(force=True).get("keys", [])]
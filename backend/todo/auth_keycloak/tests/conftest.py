@@ -0,0 +1,87 @@
+import pytest
+from django.core.cache import cache
+
+from todo.auth_keycloak import jwks as jwks_module
+from todo.auth_keycloak.jwks import jwks_store
+from todo.auth_keycloak.token_cache import rejected_tokens
+from todo.auth_keycloak.token_cache import token_cache
+from todo.auth_keycloak.tests.factories import make_jwk
+from todo.auth_keycloak.tests.factories import make_rsa_key
+from todo.auth_keycloak.tests.stub_server import StubKeycloak
+from todo.auth_keycloak.transport import keycloak_transport
+
+KID = "test-kid"
+
+
+class FakeKeycloak:
+    """Stands in for the realm certs endpoint and counts how often it is hit."""
+
+    def __init__(self, jwks: dict):
+        self.jwks = jwks
+        self.calls = 0
+        self.etag = None
+        self.cache_control = None
+        self.request_headers: list[dict] = []
+
+    def get(self, url, headers=None, timeout=None, **kwargs):
+        self.calls += 1
+        self.request_headers.append(headers or {})
+        response_headers = {}
+        if self.etag:
+            response_headers["ETag"] = self.etag
+        if self.cache_control:
+            response_headers["Cache-Control"] = self.cache_control
+        if self.etag and (headers or {}).get("If-None-Match") == self.etag:
+            return FakeResponse(None, status_code=304, headers=response_headers)
+        return FakeResponse(self.jwks, headers=response_headers)
+
+
+class FakeResponse:
+    def __init__(self, data, status_code: int = 200, headers: dict | None = None):
+        self._data = data
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    def raise_for_status(self) -> None:
+        return None
+
+    def json(self):
+        return self._data
+
+
+@pytest.fixture(scope="session")
+def rsa_key():
+    return make_rsa_key()
+
+
+@pytest.fixture(autouse=True)
+def _reset_auth_state():
+    cache.clear()
+    jwks_store.clear()
+    token_cache.clear()
+    rejected_tokens.clear()
+    keycloak_transport.reset()
+    yield
+    cache.clear()
+    jwks_store.clear()
+    token_cache.clear()
+    rejected_tokens.clear()
+    keycloak_transport.reset()
+
+
+@pytest.fixture
+def keycloak(rsa_key, monkeypatch) -> FakeKeycloak:
+    fake = FakeKeycloak({"keys": [make_jwk(rsa_key, KID)]})
+    monkeypatch.setattr(jwks_module.keycloak_transport, "get", fake.get)
+    return fake
+
+
+@pytest.fixture
+def stub_keycloak(rsa_key, settings):
+    """A real HTTP server on localhost publishing the test realm certs."""
+    server = StubKeycloak({"keys": [make_jwk(rsa_key, KID)]})
+    server.start()
+    settings.KEYCLOAK_JWKS_URL = server.jwks_url
+    settings.KEYCLOAK_HTTP_BACKOFF = 0.001
+    yield server
+    server.stop()
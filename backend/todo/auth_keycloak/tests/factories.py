@@ -0,0 +1,35 @@
+import json
+import time
+from typing import Any
+
+import jwt
+from cryptography.hazmat.primitives.asymmetric import rsa
+from django.conf import settings
+
+
+def make_rsa_key() -> rsa.RSAPrivateKey:
+    return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+
+def make_jwk(private_key: rsa.RSAPrivateKey, kid: str) -> dict[str, Any]:
+    """Public JWK for ``private_key`` as Keycloak publishes it in the realm certs."""
+    jwk = json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(private_key.public_key()))
+    jwk.update({"kid": kid, "use": "sig", "alg": "RS256"})
+    return jwk
+
+
+def mint_token(private_key: rsa.RSAPrivateKey, kid: str, **claims: Any) -> str:
+    """RS256 access token with Keycloak-like claims; ``claims`` override the defaults."""
+    now = int(time.time())
+    payload = {
+        "iss": settings.KEYCLOAK_ISSUER,
+        "aud": settings.KEYCLOAK_AUDIENCE,
+        "sub": "0b8f7c1e-4c7a-4f57-9d8c-2b6a0c7f5e11",
+        "iat": now,
+        "exp": now + 300,
+        "preferred_username": "alice",
+        "email": "alice@example.com",
+    }
+    payload.update(claims)
+    payload = {k: v for k, v in payload.items() if v is not None}
+    return jwt.encode(payload, private_key, algorithm="RS256", headers={"kid": kid})
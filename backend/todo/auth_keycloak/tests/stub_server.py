@@ -0,0 +1,72 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+
+
+class _QuietServer(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        # clients that time out on purpose close the socket mid-response
+        pass
+
+
+class StubKeycloak:
+    """
+    Minimal in-process stand-in for the Keycloak certs endpoint.
+
+    ``failures`` makes the next N requests answer 503, ``delay`` slows every
+    response down, and ``requests`` records the headers of each request so
+    tests can check keep-alive and conditional fetches.
+    """
+
+    def __init__(self, jwks: dict):
+        self.jwks = jwks
+        self.failures = 0
+        self.delay = 0.0
+        self.requests: list[dict] = []
+        self.connections: set[int] = set()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # headers and body go out in separate writes; without this each
+            # response stalls on delayed ACKs and cold fetches look ~40ms slower
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                stub.requests.append(dict(self.headers))
+                stub.connections.add(self.client_address[1])
+                if stub.delay:
+                    time.sleep(stub.delay)
+                if stub.failures:
+                    stub.failures -= 1
+                    self._send(503, b"{}")
+                    return
+                self._send(200, json.dumps(stub.jwks).encode())
+
+            def _send(self, status, body):
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = _QuietServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self._thread = threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True)
+
+    @property
+    def jwks_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/realms/todo/protocol/openid-connect/certs"
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
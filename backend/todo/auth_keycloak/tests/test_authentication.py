@@ -0,0 +1,75 @@
+import pytest
+from asgiref.sync import async_to_sync
+from rest_framework import exceptions
+from rest_framework.test import APIRequestFactory
+
+from todo.auth_keycloak.authentication import KeycloakJWTAuthentication
+from todo.auth_keycloak.tests.conftest import KID
+from todo.auth_keycloak.tests.factories import make_rsa_key
+from todo.auth_keycloak.tests.factories import mint_token
+
+
+@pytest.fixture
+def api_rf() -> APIRequestFactory:
+    return APIRequestFactory()
+
+
+def _request(api_rf, token):
+    return api_rf.get("/api/todos/", HTTP_AUTHORIZATION=f"Bearer {token}")
+
+
+def test_valid_token(api_rf, keycloak, rsa_key):
+    token = mint_token(rsa_key, KID)
+    user, payload = KeycloakJWTAuthentication().authenticate(_request(api_rf, token))
+
+    assert user.is_authenticated
+    assert user.id == payload["sub"]
+    assert user.username == "alice"
+
+
+def test_keycloak_is_hit_once_across_requests(api_rf, keycloak, rsa_key):
+    auth = KeycloakJWTAuthentication()
+    for _ in range(5):
+        auth.authenticate(_request(api_rf, mint_token(rsa_key, KID)))
+
+    assert keycloak.calls == 1
+
+
+def test_missing_header_is_anonymous(api_rf):
+    assert KeycloakJWTAuthentication().authenticate(api_rf.get("/api/todos/")) is None
+
+
+def test_expired_token(api_rf, keycloak, rsa_key):
+    token = mint_token(rsa_key, KID, exp=1, iat=0)
+    with pytest.raises(exceptions.AuthenticationFailed, match="expired"):
+        KeycloakJWTAuthentication().authenticate(_request(api_rf, token))
+
+
+def test_bad_signature(api_rf, keycloak):
+    token = mint_token(make_rsa_key(), KID)
+    with pytest.raises(exceptions.AuthenticationFailed):
+        KeycloakJWTAuthentication().authenticate(_request(api_rf, token))
+
+
+def test_unknown_kid(api_rf, keycloak, rsa_key):
+    token = mint_token(rsa_key, "unknown-kid")
+    with pytest.raises(exceptions.AuthenticationFailed, match="signing key"):
+        KeycloakJWTAuthentication().authenticate(_request(api_rf, token))
+
+
+def test_authenticate_async_fetches_missing_key_off_the_loop(api_rf, keycloak, rsa_key):
+    auth = KeycloakJWTAuthentication()
+    user, _ = async_to_sync(auth.authenticate_async)(_request(api_rf, mint_token(rsa_key, KID)))
+
+    assert user.username == "alice"
+    assert keycloak.calls == 1
+
+
+def test_authenticate_async_with_loaded_key(api_rf, keycloak, rsa_key):
+    auth = KeycloakJWTAuthentication()
+    auth.authenticate(_request(api_rf, mint_token(rsa_key, KID)))
+
+    user, _ = async_to_sync(auth.authenticate_async)(_request(api_rf, mint_token(rsa_key, KID, sub="bob")))
+
+    assert user.id == "bob"
+    assert keycloak.calls == 1
@@ -0,0 +1,46 @@
+import json
+
+import pytest
+from django.core.management import CommandError
+from django.core.management import call_command
+
+from todo.auth_keycloak import benchmark
+
+
+def test_run_covers_every_scenario():
+    results = benchmark.run(iterations=3)
+
+    assert set(results["results"]) == set(benchmark.SCENARIOS)
+    for result in results["results"].values():
+        assert result["calls"] == 3
+        assert result["p50_us"] > 0
+        assert result["alloc_peak_bytes_mean"] > 0
+    assert results["token_bytes"] > 1000
+    json.dumps(results)
+
+
+def test_cache_hits_are_cheaper_than_verification():
+    results = benchmark.run(iterations=20, scenarios=("warm_key", "cache_hit"))["results"]
+
+    assert results["cache_hit"]["p50_us"] < results["warm_key"]["p50_us"]
+
+
+def test_compare_flags_slowdowns():
+    baseline = {"results": {"warm_key": {"p50_us": 100.0}, "cache_hit": {"p50_us": 5.0}}}
+    current = {"results": {"warm_key": {"p50_us": 130.0}, "cache_hit": {"p50_us": 5.5}}}
+
+    assert benchmark.compare(current, baseline, tolerance=0.2) == ["warm_key: p50 100.0us -> 130.0us (1.30x)"]
+    assert benchmark.compare(current, baseline, tolerance=0.5) == []
+
+
+def test_command_writes_json_and_checks_baseline(tmp_path):
+    output = tmp_path / "bench.json"
+    call_command("benchmark_auth", iterations=2, scenarios=["cache_hit"], output=str(output))
+
+    saved = json.loads(output.read_text())
+    assert list(saved["results"]) == ["cache_hit"]
+
+    saved["results"]["cache_hit"]["p50_us"] = 0.001
+    output.write_text(json.dumps(saved))
+    with pytest.raises(CommandError, match="cache_hit"):
+        call_command("benchmark_auth", iterations=2, scenarios=["cache_hit"], baseline=str(output))
@@ -0,0 +1,81 @@
+import logging
+
+import jwt
+import pytest
+from rest_framework import exceptions
+from rest_framework.test import APIRequestFactory
+
+from todo.auth_keycloak.authentication import KeycloakJWTAuthentication
+from todo.auth_keycloak.tests.conftest import KID
+from todo.auth_keycloak.tests.factories import make_rsa_key
+from todo.auth_keycloak.tests.factories import mint_token
+
+pytestmark = pytest.mark.usefixtures("keycloak")
+
+
+def _authenticate(token):
+    request = APIRequestFactory().get("/api/todos/", HTTP_AUTHORIZATION=f"Bearer {token}")
+    return KeycloakJWTAuthentication().authenticate(request)
+
+
+def _traces(caplog):
+    return [r.auth_trace for r in caplog.records if hasattr(r, "auth_trace")]
+
+
+def test_fast_path_logs_nothing(rsa_key, caplog):
+    caplog.set_level(logging.DEBUG, logger="todo.auth_keycloak")
+    _authenticate(mint_token(rsa_key, KID))
+
+    assert caplog.records == []
+
+
+def test_token_is_decoded_once(rsa_key, monkeypatch):
+    calls = []
+    real_decode = jwt.decode
+
+    def counting_decode(*args, **kwargs):
+        calls.append(kwargs.get("options"))
+        return real_decode(*args, **kwargs)
+
+    monkeypatch.setattr("todo.auth_keycloak.authentication.jwt.decode", counting_decode)
+    _authenticate(mint_token(rsa_key, KID))
+
+    assert len(calls) == 1
+
+
+def test_diagnostics_mode_emits_structured_trace(rsa_key, settings, caplog):
+    settings.KEYCLOAK_AUTH_DIAGNOSTICS = True
+    caplog.set_level(logging.INFO, logger="todo.auth_keycloak")
+    _authenticate(mint_token(rsa_key, KID))
+
+    (trace,) = _traces(caplog)
+    assert trace["outcome"] == "accepted"
+    assert [step["step"] for step in trace["steps"]] == ["header", "signing_key", "claims"]
+    assert trace["steps"][0]["kid"] == KID
+
+
+def test_sampling(rsa_key, settings, caplog):
+    caplog.set_level(logging.INFO, logger="todo.auth_keycloak")
+    settings.KEYCLOAK_AUTH_DIAGNOSTICS_SAMPLE_RATE = 1.0
+    token = mint_token(rsa_key, KID)
+    _authenticate(token)
+    _authenticate(token)
+    assert [t["steps"][0]["step"] for t in _traces(caplog)] == ["header", "token_cache"]
+
+    caplog.clear()
+    settings.KEYCLOAK_AUTH_DIAGNOSTICS_SAMPLE_RATE = 0.0
+    _authenticate(mint_token(rsa_key, KID, jti="other"))
+    assert _traces(caplog) == []
+
+
+@pytest.mark.parametrize("diagnostics", [False, True])
+def test_rejections_are_logged_in_both_modes(settings, caplog, diagnostics):
+    settings.KEYCLOAK_AUTH_DIAGNOSTICS = diagnostics
+    caplog.set_level(logging.INFO, logger="todo.auth_keycloak")
+    with pytest.raises(exceptions.AuthenticationFailed):
+        _authenticate(mint_token(make_rsa_key(), KID))
+
+    warnings = [r for r in caplog.records if r.levelno == logging.WARNING]
+    assert len(warnings) == 1
+    assert "invalid_signature" in warnings[0].getMessage()
+    assert bool(_traces(caplog)) is diagnostics
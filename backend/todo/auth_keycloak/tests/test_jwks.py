@@ -0,0 +1,68 @@
+import threading
+
+import pytest
+
+from todo.auth_keycloak.jwks import JWKSKeyStore
+from todo.auth_keycloak.tests.conftest import KID
+from todo.auth_keycloak.tests.factories import make_jwk
+from todo.auth_keycloak.tests.factories import make_rsa_key
+
+
+def test_keys_are_loaded_once(keycloak, rsa_key):
+    store = JWKSKeyStore()
+    first = store.get_signing_key(KID)
+    second = store.get_signing_key(KID)
+
+    assert first is second
+    assert first.public_numbers() == rsa_key.public_key().public_numbers()
+    assert keycloak.calls == 1
+
+
+def test_shared_cache_tier_is_used_before_keycloak(keycloak):
+    JWKSKeyStore().get_signing_key(KID)
+    JWKSKeyStore().get_signing_key(KID)
+
+    assert keycloak.calls == 1
+
+
+def test_unknown_kid_triggers_refetch(keycloak):
+    store = JWKSKeyStore()
+    store.get_signing_key(KID)
+
+    rotated = make_rsa_key()
+    keycloak.jwks = {"keys": [*keycloak.jwks["keys"], make_jwk(rotated, "rotated-kid")]}
+    key = store.get_signing_key("rotated-kid")
+
+    assert key.public_numbers() == rotated.public_key().public_numbers()
+    assert keycloak.calls == 2
+
+
+def test_unknown_kid_refetch_is_rate_limited(keycloak):
+    store = JWKSKeyStore(refetch_interval=60)
+    store.get_signing_key(KID)
+
+    for _ in range(3):
+        with pytest.raises(KeyError):
+            store.get_signing_key("forged-kid")
+
+    # first miss forces a single refetch, the rest are absorbed by the interval
+    assert keycloak.calls == 2
+
+
+def test_concurrent_misses_share_one_fetch(keycloak):
+    store = JWKSKeyStore()
+    barrier = threading.Barrier(8)
+    results = []
+
+    def worker():
+        barrier.wait()
+        results.append(store.get_signing_key(KID))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(results) == 8
+    assert keycloak.calls == 1
@@ -0,0 +1,91 @@
+import pytest
+from rest_framework.test import APIRequestFactory
+
+from todo.auth_keycloak.authentication import KeycloakUser
+from todo.auth_keycloak.authentication import build_user
+from todo.auth_keycloak.permissions import HasClientRole
+from todo.auth_keycloak.permissions import HasRealmRole
+from todo.auth_keycloak.permissions import HasScope
+from todo.users.models import User
+
+PAYLOAD = {
+    "sub": "abc",
+    "preferred_username": "alice",
+    "realm_access": {"roles": ["offline_access", "todo-admin"]},
+    "resource_access": {
+        "todo": {"roles": ["editor"]},
+        "account": {"roles": ["manage-account"]},
+    },
+    "scope": "openid profile email",
+}
+
+
+class View:
+    pass
+
+
+def _request(user):
+    request = APIRequestFactory().get("/api/todos/")
+    request.user = user
+    return request
+
+
+def test_user_is_immutable():
+    user = build_user(PAYLOAD)
+    with pytest.raises(AttributeError):
+        user.id = "other"
+    with pytest.raises(AttributeError):
+        user.anything = 1
+    assert not hasattr(user, "__dict__")
+
+
+def test_roles_are_parsed_lazily_into_frozensets():
+    user = build_user(PAYLOAD)
+    assert user._realm_roles is None  # noqa: SLF001
+
+    assert user.realm_roles == frozenset({"offline_access", "todo-admin"})
+    assert user.realm_roles is user.realm_roles
+    assert user.client_roles() == frozenset({"editor"})
+    assert user.client_roles("account") == frozenset({"manage-account"})
+    assert user.client_roles("missing") == frozenset()
+    assert user.scopes == frozenset({"openid", "profile", "email"})
+
+
+def test_missing_claims_give_empty_sets():
+    user = KeycloakUser(sub="abc", username="alice", email=None, raw={})
+    assert user.realm_roles == frozenset()
+    assert user.client_roles() == frozenset()
+    assert user.scopes == frozenset()
+
+
+@pytest.mark.parametrize(
+    ("permission", "expected"),
+    [
+        (HasRealmRole.require("todo-admin"), True),
+        (HasRealmRole.require("todo-admin", "auditor"), False),
+        (HasClientRole.require("editor"), True),
+        (HasClientRole.require("editor", client="account"), False),
+        (HasClientRole.require("manage-account", client="account"), True),
+        (HasScope.require("openid", "email"), True),
+        (HasScope.require("todos:write"), False),
+    ],
+)
+def test_required_values(permission, expected):
+    request = _request(build_user(PAYLOAD))
+    assert permission().has_permission(request, View()) is expected
+
+
+def test_required_values_from_view_attributes():
+    view = View()
+    view.required_realm_roles = ["todo-admin"]
+    view.required_scopes = ["todos:write"]
+    request = _request(build_user(PAYLOAD))
+
+    assert HasRealmRole().has_permission(request, view)
+    assert not HasScope().has_permission(request, view)
+
+
+def test_non_keycloak_users_are_refused():
+    request = _request(User(username="local"))
+    assert not HasRealmRole.require("todo-admin")().has_permission(request, View())
+    assert not HasClientRole.require("editor")().has_permission(request, View())
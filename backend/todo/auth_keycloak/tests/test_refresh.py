@@ -0,0 +1,111 @@
+import time
+
+import pytest
+from django.core.cache import cache
+
+from todo.auth_keycloak.jwks import get_jwks
+from todo.auth_keycloak.jwks import jwks_expires_at
+from todo.auth_keycloak.jwks import jwks_store
+from todo.auth_keycloak.jwks import refresh_jwks
+from todo.auth_keycloak.jwks import warm_jwks_cache
+from todo.auth_keycloak.refresh import JWKSRefresher
+from todo.auth_keycloak.refresh import start_jwks_refresher
+from todo.auth_keycloak.tasks import refresh_jwks_cache
+from todo.auth_keycloak.tests.conftest import KID
+from todo.auth_keycloak.tests.factories import make_jwk
+from todo.auth_keycloak.tests.factories import make_rsa_key
+from todo.auth_keycloak.transport import KeycloakUnavailable
+
+
+def test_revalidation_is_conditional(keycloak):
+    keycloak.etag = '"v1"'
+    get_jwks()
+    jwks = get_jwks(force=True)
+
+    assert keycloak.request_headers[1] == {"If-None-Match": '"v1"'}
+    assert jwks == keycloak.jwks
+    assert keycloak.calls == 2
+
+
+@pytest.mark.parametrize(
+    ("cache_control", "expected"),
+    [
+        ("max-age=120", 120),
+        ("public, max-age=5", 30),
+        ("no-cache", 30),
+        ("max-age=86400", 900),
+        (None, 900),
+    ],
+)
+def test_freshness_follows_cache_control(keycloak, cache_control, expected):
+    keycloak.cache_control = cache_control
+    refresh_jwks()
+
+    assert jwks_expires_at() - time.time() == pytest.approx(expected, abs=2)
+
+
+def test_refresh_only_revalidates_stale_jwks(keycloak, settings):
+    keycloak.cache_control = "max-age=120"
+    refresh_jwks()
+    refresh_jwks()
+    assert keycloak.calls == 1
+
+    cache.clear()
+    settings.KEYCLOAK_JWKS_MIN_REFRESH_INTERVAL = 0
+    keycloak.cache_control = "no-store"
+    refresh_jwks()
+    refresh_jwks()
+    assert keycloak.calls == 3
+
+
+def test_periodic_warm_indexes_rotated_keys_before_first_use(keycloak, settings):
+    settings.KEYCLOAK_JWKS_MIN_REFRESH_INTERVAL = 0
+    keycloak.cache_control = "no-cache"
+    warm_jwks_cache()
+
+    rotated = make_rsa_key()
+    keycloak.jwks = {"keys": [*keycloak.jwks["keys"], make_jwk(rotated, "next-kid")]}
+    warm_jwks_cache()
+    calls = keycloak.calls
+
+    assert jwks_store.get_signing_key("next-kid")
+    assert keycloak.calls == calls
+
+
+def test_warm_does_not_raise_when_keycloak_is_down(monkeypatch):
+    def down(*args, **kwargs):
+        raise KeycloakUnavailable
+
+    monkeypatch.setattr("todo.auth_keycloak.jwks.keycloak_transport.get", down)
+    warm_jwks_cache()
+
+
+def test_refresher_thread_loads_keys(keycloak, settings):
+    settings.KEYCLOAK_JWKS_REFRESHER = True
+    refresher = start_jwks_refresher()
+    try:
+        deadline = time.time() + 5
+        while KID not in jwks_store._keys and time.time() < deadline:  # noqa: SLF001
+            time.sleep(0.01)
+        assert jwks_store.get_signing_key(KID)
+        assert start_jwks_refresher() is refresher
+    finally:
+        refresher.stop()
+        refresher.join(timeout=5)
+
+
+def test_refresher_is_disabled_by_setting(settings):
+    settings.KEYCLOAK_JWKS_REFRESHER = False
+    assert start_jwks_refresher() is None
+
+
+def test_next_delay_tracks_expiry(keycloak):
+    keycloak.cache_control = "max-age=120"
+    refresh_jwks()
+    assert 110 < JWKSRefresher.next_delay() < 135
+
+
+def test_celery_task_refreshes_shared_cache(keycloak, settings):
+    settings.CELERY_TASK_ALWAYS_EAGER = True
+    assert refresh_jwks_cache.delay().result == [KID]
+    assert keycloak.calls == 1
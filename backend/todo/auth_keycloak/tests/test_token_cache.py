@@ -0,0 +1,132 @@
+import time
+
+import pytest
+from rest_framework import exceptions
+from rest_framework.test import APIRequestFactory
+
+from todo.auth_keycloak.authentication import KeycloakJWTAuthentication
+from todo.auth_keycloak.authentication import build_user
+from todo.auth_keycloak.tests.conftest import KID
+from todo.auth_keycloak.tests.factories import mint_token
+from todo.auth_keycloak.token_cache import RejectedTokenCache
+from todo.auth_keycloak.token_cache import VerifiedTokenCache
+from todo.auth_keycloak.token_cache import rejected_tokens
+from todo.auth_keycloak.token_cache import token_cache
+
+
+def _payload(exp_in: int) -> dict:
+    return {"sub": "abc", "preferred_username": "alice", "exp": int(time.time()) + exp_in}
+
+
+def test_hit_returns_cached_user():
+    tokens = VerifiedTokenCache(maxsize=4)
+    payload = _payload(300)
+    user = build_user(payload)
+    tokens.set("digest", user, payload)
+
+    assert tokens.get("digest", build_user) == (user, payload)
+    assert tokens.get("other", build_user) is None
+    assert tokens.stats()["hits"] == 1
+    assert tokens.stats()["misses"] == 1
+
+
+def test_lru_eviction():
+    tokens = VerifiedTokenCache(maxsize=2)
+    for name in ("a", "b", "c"):
+        payload = _payload(300)
+        tokens.set(name, build_user(payload), payload)
+
+    assert tokens.get("a", build_user) is None
+    assert tokens.get("c", build_user) is not None
+    assert tokens.stats()["size"] == 2
+
+
+def test_entry_does_not_outlive_exp_plus_leeway(settings):
+    settings.KEYCLOAK_LEEWAY = 10
+    tokens = VerifiedTokenCache(maxsize=4)
+    payload = _payload(-11)
+    tokens.set("stale", build_user(payload), payload)
+
+    assert tokens.get("stale", build_user) is None
+
+    payload = _payload(-5)
+    tokens.set("in-leeway", build_user(payload), payload)
+    assert tokens.get("in-leeway", build_user) is not None
+
+
+def test_shared_tier_is_reused_by_other_workers(settings):
+    settings.KEYCLOAK_TOKEN_CACHE_ALIAS = "default"
+    payload = _payload(300)
+    VerifiedTokenCache(maxsize=4).set("digest", build_user(payload), payload)
+
+    other_worker = VerifiedTokenCache(maxsize=4)
+    user, cached_payload = other_worker.get("digest", build_user)
+
+    assert cached_payload == payload
+    assert user.id == "abc"
+    assert other_worker.stats()["shared_hits"] == 1
+
+
+@pytest.mark.usefixtures("keycloak")
+def test_authenticate_skips_verification_on_repeat_token(rsa_key, monkeypatch):
+    api_rf = APIRequestFactory()
+    token = mint_token(rsa_key, KID)
+    request = api_rf.get("/api/todos/", HTTP_AUTHORIZATION=f"Bearer {token}")
+    auth = KeycloakJWTAuthentication()
+    first = auth.authenticate(request)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("token was verified again")
+
+    monkeypatch.setattr("todo.auth_keycloak.authentication.jwt.decode", fail)
+    assert auth.authenticate(request) == first
+    assert token_cache.stats()["hits"] == 1
+
+
+def test_rejected_token_is_remembered_with_reason():
+    rejected = RejectedTokenCache(maxsize=4, ttl=60)
+    rejected.add("digest", "expired", "Token has expired.")
+
+    assert rejected.get("digest") == "Token has expired."
+    assert rejected.get("unknown") is None
+    assert rejected.stats()["reasons"] == {"expired": 2}
+
+
+def test_rejected_cache_is_short_lived_and_capped():
+    rejected = RejectedTokenCache(maxsize=2, ttl=0)
+    rejected.add("a", "expired", "Token has expired.")
+    assert rejected.get("a") is None
+
+    rejected = RejectedTokenCache(maxsize=2, ttl=60)
+    for digest in ("a", "b", "c"):
+        rejected.add(digest, "invalid_signature", "bad")
+    assert rejected.get("a") is None
+    assert rejected.stats()["size"] == 2
+
+
+def test_repeat_offender_is_refused_without_parsing(rsa_key, keycloak, monkeypatch):
+    api_rf = APIRequestFactory()
+    token = mint_token(rsa_key, KID, exp=1, iat=0)
+    request = api_rf.get("/api/todos/", HTTP_AUTHORIZATION=f"Bearer {token}")
+    auth = KeycloakJWTAuthentication()
+    with pytest.raises(exceptions.AuthenticationFailed, match="expired"):
+        auth.authenticate(request)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("rejected token was parsed again")
+
+    monkeypatch.setattr("todo.auth_keycloak.authentication.jwt.get_unverified_header", fail)
+    monkeypatch.setattr("todo.auth_keycloak.authentication.jwt.decode", fail)
+    with pytest.raises(exceptions.AuthenticationFailed, match="expired"):
+        auth.authenticate(request)
+    assert rejected_tokens.stats()["reasons"] == {"expired": 2}
+
+
+def test_unknown_kid_is_counted_but_not_cached(rsa_key, keycloak):
+    api_rf = APIRequestFactory()
+    token = mint_token(rsa_key, "rotated-kid")
+    request = api_rf.get("/api/todos/", HTTP_AUTHORIZATION=f"Bearer {token}")
+    with pytest.raises(exceptions.AuthenticationFailed):
+        KeycloakJWTAuthentication().authenticate(request)
+
+    assert rejected_tokens.stats() == {"size": 0, "maxsize": 4096, "reasons": {"unknown_key": 1}}
@@ -0,0 +1,87 @@
+import pytest
+import requests
+
+from todo.auth_keycloak.jwks import get_jwks
+from todo.auth_keycloak.jwks import jwks_store
+from todo.auth_keycloak.tests.conftest import KID
+from todo.auth_keycloak.transport import CLOSED
+from todo.auth_keycloak.transport import OPEN
+from todo.auth_keycloak.transport import CircuitBreaker
+from todo.auth_keycloak.transport import KeycloakTransport
+from todo.auth_keycloak.transport import KeycloakUnavailable
+
+
+def test_connections_are_kept_alive(stub_keycloak):
+    transport = KeycloakTransport()
+    for _ in range(3):
+        assert transport.get(stub_keycloak.jwks_url).status_code == 200
+
+    assert len(stub_keycloak.requests) == 3
+    assert len(stub_keycloak.connections) == 1
+
+
+def test_transient_errors_are_retried(stub_keycloak, settings):
+    settings.KEYCLOAK_HTTP_RETRIES = 2
+    stub_keycloak.failures = 2
+    transport = KeycloakTransport()
+
+    assert transport.get(stub_keycloak.jwks_url).json() == stub_keycloak.jwks
+    assert transport.stats()["requests"] == 3
+    assert transport.stats()["errors"] == 2
+    assert transport.breaker.state == CLOSED
+
+
+def test_timeout_is_enforced(stub_keycloak, settings):
+    settings.KEYCLOAK_HTTP_TIMEOUT = 0.05
+    settings.KEYCLOAK_HTTP_RETRIES = 0
+    stub_keycloak.delay = 0.5
+
+    with pytest.raises(requests.Timeout):
+        KeycloakTransport().get(stub_keycloak.jwks_url)
+
+
+def test_breaker_opens_and_fails_fast(stub_keycloak, settings):
+    settings.KEYCLOAK_HTTP_RETRIES = 0
+    stub_keycloak.failures = 10
+    transport = KeycloakTransport(CircuitBreaker(failure_threshold=2, reset_timeout=60))
+
+    for _ in range(2):
+        with pytest.raises(requests.HTTPError):
+            transport.get(stub_keycloak.jwks_url)
+    with pytest.raises(KeycloakUnavailable):
+        transport.get(stub_keycloak.jwks_url)
+
+    assert transport.stats()["state"] == OPEN
+    assert len(stub_keycloak.requests) == 2
+
+
+def test_breaker_half_open_trial_closes_it(stub_keycloak, settings):
+    settings.KEYCLOAK_HTTP_RETRIES = 0
+    stub_keycloak.failures = 1
+    transport = KeycloakTransport(CircuitBreaker(failure_threshold=1, reset_timeout=0))
+
+    with pytest.raises(requests.HTTPError):
+        transport.get(stub_keycloak.jwks_url)
+    assert transport.breaker.state == OPEN
+
+    assert transport.get(stub_keycloak.jwks_url).status_code == 200
+    assert transport.breaker.state == CLOSED
+
+
+def test_stats_expose_latency(stub_keycloak):
+    transport = KeycloakTransport()
+    transport.get(stub_keycloak.jwks_url)
+    latency = transport.stats()["latency_ms"]
+
+    assert latency["last"] is not None
+    assert latency["p50"] <= latency["max"]
+
+
+def test_last_known_good_jwks_is_served_while_degraded(stub_keycloak, settings):
+    settings.KEYCLOAK_HTTP_RETRIES = 0
+    jwks = get_jwks()
+
+    stub_keycloak.failures = 100
+    assert get_jwks(force=True) == jwks
+    jwks_store.clear()
+    assert jwks_store.get_signing_key(KID)
@@ -0,0 +1,190 @@
+import hashlib
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Callable, Optional, Tuple
+from django.conf import settings
+from django.core.cache import caches
+
+SHARED_KEY_PREFIX = "keycloak_token:"
+
+
+def token_digest(raw_token: str) -> str:
+    return hashlib.sha256(raw_token.encode("utf-8")).hexdigest()
+
+
+class VerifiedTokenCache:
+    """
+    Bounded LRU of tokens that already passed signature and claim checks.
+
+    Entries are keyed by the SHA-256 digest of the raw token and hold the
+    verified payload together with the user built from it. No entry outlives
+    the token's ``exp`` plus ``KEYCLOAK_LEEWAY``, so a hit is never more
+    permissive than re-running ``jwt.decode`` would be.
+
+    When ``KEYCLOAK_TOKEN_CACHE_ALIAS`` names a Django cache (the Redis cache
+    in production) payloads are also shared there, letting gunicorn workers
+    reuse each other's verifications.
+    """
+
+    def __init__(self, maxsize: Optional[int] = None, shared_alias: Optional[str] = None):
+        self._maxsize = maxsize
+        self._shared_alias = shared_alias
+        self._entries: "OrderedDict[str, Tuple[float, object, dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    @property
+    def maxsize(self) -> int:
+        if self._maxsize is not None:
+            return self._maxsize
+        return settings.KEYCLOAK_TOKEN_CACHE_SIZE
+
+    @property
+    def shared_alias(self) -> Optional[str]:
+        return self._shared_alias or settings.KEYCLOAK_TOKEN_CACHE_ALIAS
+
+    def get(self, digest: str, build_user: Callable[[dict], object]) -> Optional[Tuple[object, dict]]:
+        """Return ``(user, payload)`` for a previously verified token digest, or ``None``."""
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None:
+                expires_at, user, payload = entry
+                if expires_at > now:
+                    self._entries.move_to_end(digest)
+                    self.hits += 1
+                    return user, payload
+                del self._entries[digest]
+
+        payload = self._shared_get(digest)
+        if payload is not None and self._expires_at(payload) > now:
+            user = build_user(payload)
+            self._store(digest, user, payload)
+            with self._lock:
+                self.shared_hits += 1
+            return user, payload
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, digest: str, user: object, payload: dict) -> None:
+        self._store(digest, user, payload)
+
+        alias = self.shared_alias
+        if alias:
+            ttl = int(self._expires_at(payload) - time.time())
+            if ttl > 0:
+                caches[alias].set(SHARED_KEY_PREFIX + digest, payload, ttl)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.shared_hits = self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.shared_hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits + self.shared_hits) / lookups if lookups else 0.0,
+            }
+
+    def _store(self, digest: str, user: object, payload: dict) -> None:
+        expires_at = self._expires_at(payload)
+        with self._lock:
+            self._entries[digest] = (expires_at, user, payload)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def _shared_get(self, digest: str) -> Optional[dict]:
+        alias = self.shared_alias
+        if not alias:
+            return None
+        return caches[alias].get(SHARED_KEY_PREFIX + digest)
+
+    @staticmethod
+    def _expires_at(payload: dict) -> float:
+        return float(payload["exp"]) + settings.KEYCLOAK_LEEWAY
+
+
+class RejectedTokenCache:
+    """
+    Short-lived, size-capped record of token digests that failed verification.
+
+    Lets ``authenticate`` answer a client replaying an expired or forged token
+    without decoding it, touching the key store or logging again. Rejections
+    are counted per reason, including the ones answered from this cache, so a
+    flood of bad tokens shows up in ``stats()``.
+    """
+
+    def __init__(self, maxsize: Optional[int] = None, ttl: Optional[int] = None):
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, str, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.reasons: Counter = Counter()
+
+    @property
+    def maxsize(self) -> int:
+        if self._maxsize is not None:
+            return self._maxsize
+        return settings.KEYCLOAK_REJECTED_TOKEN_CACHE_SIZE
+
+    @property
+    def ttl(self) -> int:
+        if self._ttl is not None:
+            return self._ttl
+        return settings.KEYCLOAK_REJECTED_TOKEN_TTL
+
+    def get(self, digest: str) -> Optional[str]:
+        """Return the rejection detail for a recently rejected digest, or ``None``."""
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                return None
+            expires_at, reason, detail = entry
+            if expires_at <= time.monotonic():
+                del self._entries[digest]
+                return None
+            self.reasons[reason] += 1
+            return detail
+
+    def count(self, reason: str) -> None:
+        """Count a rejection that should not be cached, e.g. a key the store could not resolve yet."""
+        with self._lock:
+            self.reasons[reason] += 1
+
+    def add(self, digest: str, reason: str, detail: str) -> None:
+        with self._lock:
+            self.reasons[reason] += 1
+            self._entries[digest] = (time.monotonic() + self.ttl, reason, detail)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.reasons.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "reasons": dict(self.reasons),
+            }
+
+
+token_cache = VerifiedTokenCache()
+rejected_tokens = RejectedTokenCache()
@@ -0,0 +1,174 @@
+import logging
+import random
+import threading
+import time
+from collections import deque
+from typing import Optional
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class KeycloakUnavailable(requests.RequestException):
+    """Raised instead of calling Keycloak while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Counts consecutive failures and opens after ``failure_threshold`` of them.
+    While open every call is refused; after ``reset_timeout`` seconds a single
+    trial call is let through (half-open) and its outcome closes or re-opens it.
+    """
+
+    def __init__(self, failure_threshold: Optional[int] = None, reset_timeout: Optional[float] = None):
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+
+    @property
+    def failure_threshold(self) -> int:
+        if self._failure_threshold is not None:
+            return self._failure_threshold
+        return settings.KEYCLOAK_BREAKER_FAILURE_THRESHOLD
+
+    @property
+    def reset_timeout(self) -> float:
+        if self._reset_timeout is not None:
+            return self._reset_timeout
+        return settings.KEYCLOAK_BREAKER_RESET_TIMEOUT
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    logger.warning("Keycloak circuit breaker opened after %s failures", self.failures)
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self.opened_at = 0.0
+
+
+class KeycloakTransport:
+    """
+    The one HTTP client for talking to Keycloak.
+
+    Each thread keeps a pooled keep-alive ``requests.Session``; idempotent GETs
+    are retried on connection errors and 5xx with full-jitter exponential
+    backoff; a ``CircuitBreaker`` fails fast while Keycloak is degraded so
+    workers are not tied up waiting on timeouts. ``stats()`` exposes the
+    breaker state and recent latencies.
+    """
+
+    latency_window = 100
+
+    def __init__(self, breaker: Optional[CircuitBreaker] = None):
+        self.breaker = breaker or CircuitBreaker()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._latencies: deque = deque(maxlen=self.latency_window)
+        self.requests = 0
+        self.errors = 0
+
+    @property
+    def session(self) -> requests.Session:
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=1,
+                pool_maxsize=settings.KEYCLOAK_HTTP_POOL_SIZE,
+            )
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            self._local.session = session
+        return session
+
+    def get(self, url: str, headers: Optional[dict] = None) -> requests.Response:
+        if not self.breaker.allow():
+            raise KeycloakUnavailable(f"Circuit open, not calling {url}")
+
+        attempts = settings.KEYCLOAK_HTTP_RETRIES + 1
+        for attempt in range(attempts):
+            start = time.perf_counter()
+            try:
+                resp = self.session.get(url, headers=headers, timeout=settings.KEYCLOAK_HTTP_TIMEOUT)
+                if resp.status_code >= 500:
+                    resp.raise_for_status()
+            except requests.RequestException as e:
+                self._record(time.perf_counter() - start, error=True)
+                if attempt + 1 == attempts:
+                    self.breaker.record_failure()
+                    raise
+                logger.info("Keycloak request to %s failed (%s), retrying", url, e)
+                time.sleep(self._backoff(attempt))
+            else:
+                self._record(time.perf_counter() - start)
+                self.breaker.record_success()
+                return resp
+        raise AssertionError("unreachable")
+
+    def stats(self) -> dict:
+        with self._lock:
+            last = self._latencies[-1] if self._latencies else None
+            latencies = sorted(self._latencies)
+            requests_made, errors = self.requests, self.errors
+        return {
+            "state": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+            "requests": requests_made,
+            "errors": errors,
+            "latency_ms": {
+                "last": round(last * 1000, 2) if last is not None else None,
+                "p50": round(latencies[len(latencies) // 2] * 1000, 2) if latencies else None,
+                "max": round(latencies[-1] * 1000, 2) if latencies else None,
+            },
+        }
+
+    def reset(self) -> None:
+        self.breaker.reset()
+        with self._lock:
+            self._latencies.clear()
+            self.requests = self.errors = 0
+
+    def _record(self, elapsed: float, error: bool = False) -> None:
+        with self._lock:
+            self._latencies.append(elapsed)
+            self.requests += 1
+            if error:
+                self.errors += 1
+
+    @staticmethod
+    def _backoff(attempt: int) -> float:
+        cap = settings.KEYCLOAK_HTTP_BACKOFF * (2 ** attempt)
+        return random.uniform(0, cap)  # noqa: S311
+
+
+keycloak_transport = KeycloakTransport()
@@ -0,0 +1,142 @@
+from asgiref.sync import markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET
+from rest_framework import exceptions
+
+from todo.auth_keycloak.authentication import KeycloakJWTAuthentication
+from . import events
+
+
+class AsyncReadViewSetMixin:
+  """
+  Lets a DRF viewset serve some actions with ``async def`` handlers.
+
+  DRF only dispatches synchronously, so under ASGI every request would be
+  pushed through Django's single sync thread. With ``settings.ASYNC_API``
+  on, ``as_view`` returns a coroutine view instead: actions listed in
+  ``async_actions`` run on the event loop through their ``a<action>``
+  handler (``alist``, ``aretrieve``, ...) after async authentication, and
+  every other action is handed to the regular sync view in a worker thread,
+  inside a transaction as ``ATOMIC_REQUESTS`` would have done.
+
+  Actions listed in ``non_atomic_actions`` are left out of
+  ``ATOMIC_REQUESTS`` in either mode.
+  """
+
+  async_actions = ("list", "retrieve")
+  non_atomic_actions = ()
+
+  @classmethod
+  def as_view(cls, actions=None, **initkwargs):
+    view = super().as_view(actions, **initkwargs)
+    non_atomic = bool(actions) and set(actions.values()) <= set(cls.non_atomic_actions)
+    if not settings.ASYNC_API:
+      return transaction.non_atomic_requests(view) if non_atomic else view
+
+    async_methods = {
+      method for method, action in actions.items() if action in cls.async_actions
+    }
+    sync_view = sync_to_async(view if non_atomic else transaction.atomic(view))
+
+    async def async_view(request, *args, **kwargs):
+      if request.method.lower() not in async_methods:
+        return await sync_view(request, *args, **kwargs)
+
+      self = cls(**initkwargs)
+      self.action_map = actions
+      self.action = actions[request.method.lower()]
+      self.request = request
+      self.args = args
+      self.kwargs = kwargs
+      return await self.adispatch(request, *args, **kwargs)
+
+    markcoroutinefunction(async_view)
+    async_view.cls = cls
+    async_view.initkwargs = initkwargs
+    async_view.actions = actions
+    # Reads need no transaction, and Django refuses ATOMIC_REQUESTS on async views.
+    return transaction.non_atomic_requests(csrf_exempt(async_view))
+
+  async def adispatch(self, request, *args, **kwargs):
+    """Async counterpart of ``APIView.dispatch`` for the actions in ``async_actions``."""
+    request = self.initialize_request(request, *args, **kwargs)
+    self.request = request
+    self.headers = self.default_response_headers
+
+    try:
+      await self.ainitial(request, *args, **kwargs)
+      handler = getattr(self, f"a{self.action}")
+      response = await handler(request, *args, **kwargs)
+    except Exception as exc:
+      response = self.handle_exception(exc)
+
+    self.response = self.finalize_response(request, response, *args, **kwargs)
+    return self.response
+
+  async def ainitial(self, request, *args, **kwargs):
+    self.format_kwarg = self.get_format_suffix(**kwargs)
+    neg = self.perform_content_negotiation(request)
+    request.accepted_renderer, request.accepted_media_type = neg
+    version, scheme = self.determine_version(request, *args, **kwargs)
+    request.version, request.versioning_scheme = version, scheme
+
+    await self.aperform_authentication(request)
+    self.check_permissions(request)
+    self.check_throttles(request)
+
+  async def aperform_authentication(self, request):
+    """
+    Run the authenticators the way ``Request._authenticate`` does, awaiting
+    ``authenticate_async`` where an authenticator provides it.
+    """
+    for authenticator in request.authenticators:
+      try:
+        if hasattr(authenticator, "authenticate_async"):
+          user_auth = await authenticator.authenticate_async(request)
+        else:
+          user_auth = await sync_to_async(authenticator.authenticate)(request)
+      except exceptions.APIException:
+        request._not_authenticated()
+        raise
+      if user_auth is not None:
+        request._authenticator = authenticator
+        request.user, request.auth = user_auth
+        return
+    request._not_authenticated()
+
+
+@transaction.non_atomic_requests
+@require_GET
+async def todo_events(request):
+  """
+  ``text/event-stream`` of the authenticated user's todo changes (see
+  ``events``). Only served by async (ASGI) deployments, where a waiting
+  connection holds no worker thread.
+  """
+  if not (settings.ASYNC_API and settings.TODO_EVENTS):
+    return JsonResponse({"detail": "The event stream is not enabled."}, status=503)
+
+  authenticator = KeycloakJWTAuthentication()
+  try:
+    user_auth = await authenticator.authenticate_async(request)
+  except exceptions.AuthenticationFailed as e:
+    user_auth, detail = None, e.detail
+  else:
+    detail = exceptions.NotAuthenticated.default_detail
+  if user_auth is None:
+    response = JsonResponse({"detail": detail}, status=401)
+    response["WWW-Authenticate"] = authenticator.authenticate_header(request)
+    return response
+
+  user, _ = user_auth
+  response = StreamingHttpResponse(
+    events.stream(user.id, request.headers.get("Last-Event-ID")),
+    content_type="text/event-stream",
+  )
+  response["Cache-Control"] = "no-cache"
+  # Keep nginx and similar proxies from buffering the stream.
+  response["X-Accel-Buffering"] = "no"
+  return response
@@ -0,0 +1,103 @@
+"""
+Batch writes for ``/api/todos/bulk/``.
+
+Every item is validated with the regular serializers first. If any item is
+invalid nothing is written and the errors come back per item, each tagged
+with its position in the request. Otherwise the whole batch is written with
+one ``bulk_create``, ``bulk_update`` or filtered ``delete``.
+"""
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import serializers
+
+from . import counters
+from .models import Todo, subject_fields
+from .serializers import TodoCreateSerializer, TodoSerializer
+
+BATCH_SIZE = 500
+
+
+class BulkValidationError(Exception):
+  """Raised with ``[{'index': i, 'errors': ...}, ...]`` for the failing items, before anything is written"""
+
+  def __init__(self, errors):
+    super().__init__(errors)
+    self.errors = errors
+
+
+def _check_batch(items, describe='items'):
+  if not isinstance(items, list) or not items:
+    raise serializers.ValidationError({'detail': f'Expected a non-empty list of {describe}.'})
+  if len(items) > settings.TODO_BULK_MAX_ITEMS:
+    raise serializers.ValidationError(
+      {'detail': f'At most {settings.TODO_BULK_MAX_ITEMS} {describe} per request.'}
+    )
+
+
+def create_many(sub, items):
+  """Create a todo per item for ``sub``; returns them with their new ids"""
+  _check_batch(items)
+  todos, errors = [], []
+  for index, item in enumerate(items):
+    serializer = TodoCreateSerializer(data=item)
+    if serializer.is_valid():
+      todos.append(Todo(**serializer.validated_data, **subject_fields(sub)))
+    else:
+      errors.append({'index': index, 'errors': serializer.errors})
+  if errors:
+    raise BulkValidationError(errors)
+
+  todos = Todo.objects.bulk_create(todos, batch_size=BATCH_SIZE)
+  counters.adjust(sub, added=[todo.completed for todo in todos])
+  return todos
+
+
+def update_many(sub, items):
+  """Apply partial updates, each item naming the todo by ``id``; returns the updated todos"""
+  _check_batch(items)
+  ids = [item.get('id') for item in items if isinstance(item, dict)]
+  owned = Todo.objects.owned_by(sub).select_for_update().in_bulk([pk for pk in ids if isinstance(pk, int)])
+
+  todos, fields, errors, was_completed = [], set(), [], []
+  for index, item in enumerate(items):
+    todo = owned.get(item.get('id')) if isinstance(item, dict) else None
+    if todo is None:
+      errors.append({'index': index, 'errors': {'id': ['Not found.']}})
+      continue
+    serializer = TodoSerializer(todo, data=item, partial=True)
+    if not serializer.is_valid():
+      errors.append({'index': index, 'errors': serializer.errors})
+      continue
+    was_completed.append(todo.completed)
+    for field, value in serializer.validated_data.items():
+      setattr(todo, field, value)
+      fields.add(field)
+    todos.append(todo)
+  if errors:
+    raise BulkValidationError(errors)
+
+  # bulk_update skips auto_now, so stamp updated_at here.
+  now = timezone.now()
+  for todo in todos:
+    todo.updated_at = now
+  Todo.objects.bulk_update(todos, [*sorted(fields), 'updated_at'], batch_size=BATCH_SIZE)
+  counters.adjust(sub, added=[todo.completed for todo in todos], removed=was_completed)
+  return todos
+
+
+def delete_many(sub, ids):
+  """Delete ``sub``'s todos with the given ids; returns how many were deleted"""
+  _check_batch(ids, describe='ids')
+  owned = Todo.objects.owned_by(sub).filter(id__in=[pk for pk in ids if isinstance(pk, int)])
+  found = dict(owned.select_for_update().values_list('id', 'completed'))
+  errors = [
+    {'index': index, 'errors': {'id': ['Not found.']}}
+    for index, pk in enumerate(ids) if pk not in found
+  ]
+  if errors:
+    raise BulkValidationError(errors)
+
+  deleted, _ = owned.delete()
+  counters.adjust(sub, removed=found.values())
+  return deleted
@@ -0,0 +1,169 @@
+"""
+Read-through cache of rendered todo list and detail responses.
+
+Entries are keyed by the user's subject, a per-user version number and the
+request path, and hold the rendered JSON body with its ETag. Any write bumps the user's
+version (after its transaction commits), which orphans every older entry at
+once, so invalidation never scans keys; orphans simply age out with the
+cache timeout. A hit is two cache reads and no ORM or serializer work.
+"""
+
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+VERSION_PREFIX = 'todos:version:'
+ENTRY_PREFIX = 'todos:response:'
+
+
+def _new_version():
+  # Starting from the clock rather than 0 means a version key lost to eviction
+  # never comes back as a number older entries were stored under.
+  return time.time_ns() // 1000
+
+
+class TodoResponseCache:
+
+  def __init__(self):
+    self._lock = threading.Lock()
+    self.hits = 0
+    self.misses = 0
+    self.stored = 0
+    self.stored_bytes = 0
+
+  @property
+  def cache(self):
+    return caches[settings.TODO_RESPONSE_CACHE_ALIAS]
+
+  def cacheable(self, request):
+    return settings.TODO_RESPONSE_CACHE and getattr(request.accepted_renderer, 'format', None) == 'json'
+
+  # versions
+
+  def version(self, sub):
+    key = VERSION_PREFIX + sub
+    version = self.cache.get(key)
+    if version is None:
+      self.cache.add(key, _new_version(), None)
+      version = self.cache.get(key, _new_version())
+    return version
+
+  async def aversion(self, sub):
+    key = VERSION_PREFIX + sub
+    version = await self.cache.aget(key)
+    if version is None:
+      await self.cache.aadd(key, _new_version(), None)
+      version = await self.cache.aget(key, _new_version())
+    return version
+
+  def bump(self, sub):
+    key = VERSION_PREFIX + sub
+    try:
+      return self.cache.incr(key)
+    except ValueError:
+      version = _new_version()
+      self.cache.set(key, version, None)
+      return version
+
+  def invalidate(self, sub):
+    """Retire every cached response of ``sub`` once the current transaction commits"""
+    transaction.on_commit(lambda: self.bump(sub))
+
+  # entries
+
+  def get(self, request, version=None):
+    """
+    Return ``(key, response)``; ``response`` is None on a miss, ``key`` None
+    if the request is not cacheable. Pass ``version`` when already known.
+    """
+    if not self.cacheable(request):
+      return None, None
+    if version is None:
+      version = self.version(request.user.id)
+    key = self.entry_key(request, version)
+    return key, self._hit_or_miss(self.cache.get(key))
+
+  async def aget(self, request, version=None):
+    if not self.cacheable(request):
+      return None, None
+    if version is None:
+      version = await self.aversion(request.user.id)
+    key = self.entry_key(request, version)
+    return key, self._hit_or_miss(await self.cache.aget(key))
+
+  def set(self, key, data, etag=None):
+    """Store ``data`` rendered under ``key`` and return the response to send"""
+    if key is None:
+      return self._uncached(data, etag)
+    content = self._render(data)
+    self.cache.set(key, (etag, content), settings.TODO_RESPONSE_CACHE_TIMEOUT)
+    return self._response(content, etag, 'MISS')
+
+  async def aset(self, key, data, etag=None):
+    if key is None:
+      return self._uncached(data, etag)
+    content = self._render(data)
+    await self.cache.aset(key, (etag, content), settings.TODO_RESPONSE_CACHE_TIMEOUT)
+    return self._response(content, etag, 'MISS')
+
+  def entry_key(self, request, version):
+    kwargs = sorted((request.parser_context or {}).get('kwargs', {}).items())
+    path = hashlib.sha1(f'{request.get_full_path()}|{kwargs}'.encode('utf-8')).hexdigest()  # noqa: S324
+    return f'{ENTRY_PREFIX}{request.user.id}:{version}:{path}'
+
+  def stats(self):
+    with self._lock:
+      lookups = self.hits + self.misses
+      return {
+        'hits': self.hits,
+        'misses': self.misses,
+        'hit_ratio': round(self.hits / lookups, 4) if lookups else None,
+        'stored': self.stored,
+        'stored_bytes': self.stored_bytes,
+        'avg_entry_bytes': round(self.stored_bytes / self.stored) if self.stored else None,
+      }
+
+  def reset_stats(self):
+    with self._lock:
+      self.hits = self.misses = self.stored = self.stored_bytes = 0
+
+  def _hit_or_miss(self, entry):
+    with self._lock:
+      if entry is None:
+        self.misses += 1
+        return None
+      self.hits += 1
+    etag, content = entry
+    return self._response(content, etag, 'HIT')
+
+  def _render(self, data):
+    content = JSONRenderer().render(data)
+    with self._lock:
+      self.stored += 1
+      self.stored_bytes += len(content)
+    return content
+
+  @staticmethod
+  def _response(content, etag, outcome):
+    response = HttpResponse(content, content_type='application/json')
+    response['X-Cache'] = outcome
+    if etag:
+      response['ETag'] = etag
+    return response
+
+  @staticmethod
+  def _uncached(data, etag):
+    response = Response(data)
+    if etag:
+      response['ETag'] = etag
+    return response
+
+
+response_cache = TodoResponseCache()
@@ -0,0 +1,70 @@
+"""
+ETags and conditional requests for the todo API.
+
+Tags are derived from data the view has anyway, never from the rendered
+body: a single todo is tagged by its id and ``updated_at``, a list page by
+the user's version number from ``response_cache`` (bumped by every write)
+and the request path. ``If-None-Match`` is answered with a 304 before any
+serialization; ``If-Match`` on writes to a todo fails with 412 when the
+client's copy is stale.
+"""
+
+import hashlib
+
+from django.http import HttpResponseNotModified
+from django.utils.cache import parse_etags
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class PreconditionFailed(APIException):
+  status_code = status.HTTP_412_PRECONDITION_FAILED
+  default_detail = 'The todo was modified since it was fetched.'
+  default_code = 'precondition_failed'
+
+
+def todo_etag(todo):
+  return f'"{todo.pk}-{int(todo.updated_at.timestamp() * 1_000_000)}"'
+
+
+def collection_etag(request, version):
+  path = hashlib.sha1(request.get_full_path().encode('utf-8')).hexdigest()[:16]  # noqa: S324
+  return f'"{version}-{path}"'
+
+
+def _strong(etag):
+  return not etag.startswith('W/')
+
+
+def if_none_match(request, etag):
+  """True when the client already holds ``etag`` (weak comparison, as RFC 9110 asks)"""
+  header = request.headers.get('If-None-Match')
+  if not header or not etag:
+    return False
+  tags = parse_etags(header)
+  return '*' in tags or etag.removeprefix('W/') in [tag.removeprefix('W/') for tag in tags]
+
+
+def check_if_match(request, etag):
+  """Raise ``PreconditionFailed`` unless ``If-Match`` is absent or names ``etag`` (strong comparison)"""
+  header = request.headers.get('If-Match')
+  if not header:
+    return
+  tags = parse_etags(header)
+  if '*' in tags or (_strong(etag) and etag in [tag for tag in tags if _strong(tag)]):
+    return
+  raise PreconditionFailed()
+
+
+def not_modified(etag):
+  response = HttpResponseNotModified()
+  response['ETag'] = etag
+  return response
+
+
+def respond(request, response):
+  """``response`` itself, or a 304 when the client already has its ETag"""
+  etag = response.get('ETag')
+  if etag and if_none_match(request, etag):
+    return not_modified(etag)
+  return response
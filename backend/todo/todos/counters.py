@@ -0,0 +1,82 @@
+"""
+Per-user todo totals in ``TodoCounter``.
+
+Writers call ``adjust`` inside their transaction with the completed flag of
+every todo they added and removed (an update removes the old state and adds
+the new one). That becomes one ``UPDATE ... SET open = open + n`` on the
+user's row, so concurrent writers never lose each other's changes and the
+totals commit or roll back with the todos themselves. ``reconcile``
+recounts from ``todos_todo`` to repair drift.
+"""
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q
+
+from .models import Todo, TodoCounter, subject_fields
+
+
+def _deltas(added, removed):
+  added, removed = list(added), list(removed)
+  completed = sum(map(bool, added)) - sum(map(bool, removed))
+  total = len(added) - len(removed)
+  return {'total': total, 'open': total - completed, 'completed': completed}
+
+
+def adjust(sub, added=(), removed=()):
+  """Count todos of ``sub`` added and removed, given as their ``completed`` flags"""
+  deltas = _deltas(added, removed)
+  if not any(deltas.values()):
+    return
+  counters = TodoCounter.objects.owned_by(sub)
+  increments = {field: F(field) + delta for field, delta in deltas.items()}
+  if counters.update(**increments):
+    return
+  # First todo of this user since the counters were backfilled.
+  try:
+    with transaction.atomic():
+      TodoCounter.objects.create(**subject_fields(sub), **deltas)
+  except IntegrityError:
+    counters.update(**increments)
+
+
+def get(sub):
+  """``{'total', 'open', 'completed'}`` for ``sub``"""
+  row = TodoCounter.objects.owned_by(sub).values('total', 'open', 'completed').first()
+  return row or {'total': 0, 'open': 0, 'completed': 0}
+
+
+async def aget(sub):
+  row = await TodoCounter.objects.owned_by(sub).values('total', 'open', 'completed').afirst()
+  return row or {'total': 0, 'open': 0, 'completed': 0}
+
+
+def reconcile(sub=None):
+  """Recount the todos of ``sub``, or of every user, and fix counters that drifted; returns how many"""
+  todos = Todo.objects.all() if sub is None else Todo.objects.owned_by(sub)
+  counters = TodoCounter.objects.all() if sub is None else TodoCounter.objects.owned_by(sub)
+
+  with transaction.atomic():
+    # Lock the counters before counting: a writer still in flight blocks on
+    # its counter update until we commit, then applies its change on top.
+    current = {(c.user_uuid, c.user_sub): c for c in counters.select_for_update()}
+    actual = {
+      (row['user_uuid'], row['user_sub']): row
+      for row in todos.order_by().values('user_uuid', 'user_sub').annotate(
+        total=Count('id'),
+        open=Count('id', filter=Q(completed=False)),
+        completed=Count('id', filter=Q(completed=True)),
+      )
+    }
+
+    stale, missing = [], []
+    for key, counter in current.items():
+      row = actual.pop(key, {'total': 0, 'open': 0, 'completed': 0})
+      if (counter.total, counter.open, counter.completed) != (row['total'], row['open'], row['completed']):
+        counter.total, counter.open, counter.completed = row['total'], row['open'], row['completed']
+        stale.append(counter)
+    for row in actual.values():
+      missing.append(TodoCounter(**row))
+
+    TodoCounter.objects.bulk_update(stale, ['total', 'open', 'completed'], batch_size=1000)
+    TodoCounter.objects.bulk_create(missing, batch_size=1000, ignore_conflicts=True)
+  return len(stale) + len(missing)
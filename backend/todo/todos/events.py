@@ -0,0 +1,216 @@
+"""
+Server-sent events for ``/api/todos/events/``.
+
+A write to a user's todos publishes, once its transaction commits, one
+event per todo: it is appended to the user's capped Redis stream (the
+backlog a reconnecting client resumes from with ``Last-Event-ID``) and
+published on the user's pub/sub channel under the id the stream gave it.
+
+Each worker process holds a single pattern subscription (``EventHub``) and
+hands events to its connected clients through in-memory queues, so an open
+but idle connection costs a queue on the event loop, not a Redis
+connection or a thread. Publishing never fails a write: if Redis is down
+the event is lost and logged, and clients catch up through the list or
+``/api/todos/changes/``.
+"""
+
+import asyncio
+import json
+import logging
+from collections import defaultdict
+
+import redis
+import redis.asyncio
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+STREAM_PREFIX = 'todos:events:'
+CHANNEL_PREFIX = 'todos:channel:'
+CREATED = 'todo.created'
+UPDATED = 'todo.updated'
+DELETED = 'todo.deleted'
+# Sent to every subscriber when the hub had to resubscribe, and to one whose
+# queue filled up: events may have been missed, so read the backlog.
+RESYNC = object()
+QUEUE_SIZE = 256
+RETRY_MS = 3000
+
+_client = None
+
+
+def _redis():
+  global _client
+  if _client is None:
+    _client = redis.Redis.from_url(settings.REDIS_URL, socket_timeout=1, socket_connect_timeout=1)
+  return _client
+
+
+def publish(sub, events):
+  """Append ``events``, a list of ``(type, data)``, to ``sub``'s backlog and publish them"""
+  if not settings.TODO_EVENTS or not events:
+    return
+  stream, channel = STREAM_PREFIX + sub, CHANNEL_PREFIX + sub
+  payloads = [(kind, json.dumps(data, cls=DjangoJSONEncoder)) for kind, data in events]
+  try:
+    pipe = _redis().pipeline(transaction=False)
+    for kind, data in payloads:
+      pipe.xadd(
+        stream, {'type': kind, 'data': data},
+        maxlen=settings.TODO_EVENTS_BACKLOG, approximate=True,
+      )
+    ids = pipe.execute()
+
+    pipe = _redis().pipeline(transaction=False)
+    for event_id, (kind, data) in zip(ids, payloads):
+      pipe.publish(channel, json.dumps({'id': event_id.decode(), 'type': kind, 'data': data}))
+    pipe.expire(stream, settings.TODO_EVENTS_BACKLOG_TTL)
+    pipe.execute()
+  except redis.RedisError as e:
+    logger.warning('Could not publish %d todo event(s) for %s: %s', len(payloads), sub, e)
+
+
+def publish_on_commit(sub, events):
+  if settings.TODO_EVENTS and events:
+    transaction.on_commit(lambda: publish(sub, events))
+
+
+def format_event(event):
+  """One event in ``text/event-stream`` framing; ``data`` is already JSON, so a single line"""
+  return f"id: {event['id']}\nevent: {event['type']}\ndata: {event['data']}\n\n"
+
+
+def _position(event_id):
+  ms, _, seq = event_id.partition('-')
+  return int(ms), int(seq or 0)
+
+
+class EventHub:
+  """Fans the events of one Redis pattern subscription out to the clients connected to this process"""
+
+  def __init__(self):
+    self._queues = defaultdict(set)
+    self._loop = None
+    self._listener = None
+    self._client = None
+
+  def subscribe(self, sub):
+    self._start()
+    queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+    self._queues[sub].add(queue)
+    return queue
+
+  def unsubscribe(self, sub, queue):
+    queues = self._queues.get(sub)
+    if queues is not None:
+      queues.discard(queue)
+      if not queues:
+        del self._queues[sub]
+
+  async def tail(self, sub):
+    """Id of the newest event in ``sub``'s backlog, ``'0-0'`` if there is none"""
+    self._start()
+    entries = await self._client.xrevrange(STREAM_PREFIX + sub, count=1)
+    return entries[0][0].decode() if entries else '0-0'
+
+  async def backlog(self, sub, after):
+    """Events of ``sub`` in the stream after id ``after``, oldest first"""
+    self._start()
+    entries = await self._client.xrange(STREAM_PREFIX + sub, min=f'({after}', max='+')
+    return [
+      {'id': event_id.decode(), 'type': fields[b'type'].decode(), 'data': fields[b'data'].decode()}
+      for event_id, fields in entries
+    ]
+
+  def dispatch(self, sub, event):
+    for queue in list(self._queues.get(sub, ())):
+      self._put(queue, event)
+
+  def resync(self):
+    for queues in list(self._queues.values()):
+      for queue in list(queues):
+        self._put(queue, RESYNC)
+
+  @staticmethod
+  def _put(queue, event):
+    try:
+      queue.put_nowait(event)
+    except asyncio.QueueFull:
+      # The client is not keeping up: drop what is queued and have it
+      # catch up from the backlog instead.
+      while not queue.empty():
+        queue.get_nowait()
+      queue.put_nowait(RESYNC)
+
+  def _start(self):
+    loop = asyncio.get_running_loop()
+    if self._loop is not loop or self._listener is None or self._listener.done():
+      self._loop = loop
+      self._client = redis.asyncio.Redis.from_url(settings.REDIS_URL)
+      self._listener = loop.create_task(self._listen())
+
+  async def _listen(self):
+    delay, subscribed_before = 0.5, False
+    while True:
+      try:
+        async with self._client.pubsub() as pubsub:
+          await pubsub.psubscribe(CHANNEL_PREFIX + '*')
+          if subscribed_before:
+            self.resync()
+          subscribed_before, delay = True, 0.5
+          async for message in pubsub.listen():
+            if message['type'] == 'pmessage':
+              sub = message['channel'].decode().removeprefix(CHANNEL_PREFIX)
+              self.dispatch(sub, json.loads(message['data']))
+      except redis.RedisError as e:
+        logger.warning('Todo event subscription lost, retrying in %ss: %s', delay, e)
+      await asyncio.sleep(delay)
+      delay = min(delay * 2, 30)
+
+
+event_hub = EventHub()
+
+
+async def stream(sub, last_event_id=None, hub=None):
+  """
+  The ``text/event-stream`` body for ``sub``: events after
+  ``last_event_id`` (or, on a first connection, after the newest one) from
+  the backlog, then live events as they are published, with a comment line
+  every ``TODO_EVENTS_HEARTBEAT`` seconds so proxies keep the connection open.
+  """
+  hub = hub or event_hub
+  try:
+    last = _position(last_event_id) if last_event_id else None
+  except ValueError:
+    last = None
+  if last is None:
+    last = _position(await hub.tail(sub))
+  # Subscribe before reading the backlog, so nothing published in between
+  # is missed; events seen in both are skipped by id.
+  queue = hub.subscribe(sub)
+  try:
+    yield f'retry: {RETRY_MS}\n\n'
+    for event in await hub.backlog(sub, '%d-%d' % last):
+      yield format_event(event)
+      last = _position(event['id'])
+
+    while True:
+      try:
+        event = await asyncio.wait_for(queue.get(), timeout=settings.TODO_EVENTS_HEARTBEAT)
+      except TimeoutError:
+        yield ': keepalive\n\n'
+        continue
+
+      if event is RESYNC:
+        for event in await hub.backlog(sub, '%d-%d' % last):
+          yield format_event(event)
+          last = _position(event['id'])
+        continue
+      if _position(event['id']) <= last:
+        continue
+      yield format_event(event)
+      last = _position(event['id'])
+  finally:
+    hub.unsubscribe(sub, queue)
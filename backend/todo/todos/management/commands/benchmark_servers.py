@@ -0,0 +1,152 @@
+import asyncio
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+SERVERS = {
+  'wsgi': ['config.wsgi'],
+  'asgi': ['config.asgi', '-k', 'uvicorn_worker.UvicornWorker'],
+}
+
+
+class Command(BaseCommand):
+  """
+  Side-by-side load test of the gunicorn/WSGI and uvicorn/ASGI deployments.
+
+  Each server is started with the same number of workers, then hammered with
+  ``--concurrency`` keep-alive connections for ``--duration`` seconds:
+
+    python manage.py benchmark_servers --token "$ACCESS_TOKEN" --concurrency 1000
+
+  ``--token`` must be a Keycloak access token the configured realm accepts.
+  """
+
+  help = 'Compare throughput and latency of the WSGI and ASGI servers'
+
+  def add_arguments(self, parser):
+    parser.add_argument('--token', required=True, help='Bearer token sent with every request')
+    parser.add_argument('--path', default='/api/todos/')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--concurrency', type=int, default=200)
+    parser.add_argument('--duration', type=float, default=15.0)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--servers', nargs='+', choices=list(SERVERS), default=list(SERVERS))
+    parser.add_argument('--json', dest='json_path', help='Also write the results to this file')
+
+  def handle(self, *args, **options):
+    results = {}
+    for name in options['servers']:
+      self.stdout.write(f"Benchmarking {name} ...")
+      with _server(name, options['workers'], options['port']):
+        results[name] = asyncio.run(_load(
+          f"http://127.0.0.1:{options['port']}{options['path']}",
+          options['token'],
+          options['concurrency'],
+          options['duration'],
+        ))
+
+    self.stdout.write(f"{'server':<6} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for name, r in results.items():
+      self.stdout.write(f"{name:<6} {r['rps']:>9.1f} {r['p50_ms']:>8.1f} {r['p99_ms']:>8.1f} {r['errors']:>7}")
+
+    if options['json_path']:
+      with open(options['json_path'], 'w') as fh:
+        json.dump({'options': {k: options[k] for k in ('path', 'workers', 'concurrency', 'duration')},
+                   'results': results}, fh, indent=2)
+
+
+class _server:
+  """Runs gunicorn for one of ``SERVERS`` until the ``with`` block exits."""
+
+  def __init__(self, name, workers, port):
+    env = {**os.environ, 'DJANGO_ASYNC_API': 'True' if name == 'asgi' else 'False'}
+    self.port = port
+    self.proc = subprocess.Popen(
+      [sys.executable, '-m', 'gunicorn', *SERVERS[name],
+       '--bind', f"127.0.0.1:{port}", '--workers', str(workers), '--log-level', 'warning'],
+      env=env,
+    )
+
+  def __enter__(self):
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+      if self.proc.poll() is not None:
+        raise CommandError('gunicorn exited during startup')
+      try:
+        socket.create_connection(('127.0.0.1', self.port), timeout=1).close()
+        return self
+      except OSError:
+        time.sleep(0.2)
+    self.__exit__()
+    raise CommandError('gunicorn did not start listening within 30s')
+
+  def __exit__(self, *exc):
+    self.proc.send_signal(signal.SIGTERM)
+    self.proc.wait(timeout=30)
+
+
+async def _load(url, token, concurrency, duration):
+  parts = urlsplit(url)
+  request = (
+    f"GET {parts.path} HTTP/1.1\r\nHost: {parts.netloc}\r\n"
+    f"Authorization: Bearer {token}\r\nConnection: keep-alive\r\n\r\n"
+  ).encode()
+  latencies, errors = [], 0
+  stop_at = time.monotonic() + duration
+
+  async def client():
+    nonlocal errors
+    reader = writer = None
+    while time.monotonic() < stop_at:
+      try:
+        if writer is None:
+          reader, writer = await asyncio.open_connection(parts.hostname, parts.port)
+        start = time.perf_counter()
+        writer.write(request)
+        status, close = await _read_response(reader)
+        latencies.append(time.perf_counter() - start)
+        if status != 200:
+          errors += 1
+        if close:
+          writer.close()
+          writer = None
+      except (OSError, asyncio.IncompleteReadError, ValueError):
+        errors += 1
+        writer = None
+    if writer is not None:
+      writer.close()
+
+  started = time.monotonic()
+  await asyncio.gather(*(client() for _ in range(concurrency)))
+  elapsed = time.monotonic() - started
+
+  latencies.sort()
+  pick = lambda q: latencies[min(int(len(latencies) * q), len(latencies) - 1)] * 1000 if latencies else 0.0  # noqa: E731
+  return {
+    'requests': len(latencies),
+    'errors': errors,
+    'rps': len(latencies) / elapsed,
+    'p50_ms': pick(0.50),
+    'p99_ms': pick(0.99),
+  }
+
+
+async def _read_response(reader):
+  status = int((await reader.readline()).split()[1])
+  length, close = 0, False
+  while (line := await reader.readline()) not in (b'\r\n', b''):
+    name, _, value = line.decode('latin-1').partition(':')
+    name = name.strip().lower()
+    if name == 'content-length':
+      length = int(value)
+    elif name == 'connection' and value.strip().lower() == 'close':
+      close = True
+  await reader.readexactly(length)
+  return status, close
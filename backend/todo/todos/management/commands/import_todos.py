@@ -0,0 +1,38 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from todo.todos import importer
+
+
+class Command(BaseCommand):
+  """
+  Load a user's todos from an NDJSON or CSV file, e.g. when onboarding:
+
+    python manage.py import_todos todos.csv --user 0b8f7c1e-4c7a-4f57-9d8c-2b6a0c7f5e11
+
+  Rows failing the API's validation are skipped and listed afterwards.
+  """
+
+  help = "Bulk import todos for one user from NDJSON or CSV"
+
+  def add_arguments(self, parser):
+    parser.add_argument('path')
+    parser.add_argument('--user', required=True, help="Keycloak subject (sub claim) who will own the todos")
+    parser.add_argument('--format', choices=importer.FORMATS, help="Defaults to the file's extension")
+
+  def handle(self, *args, **options):
+    try:
+      report = importer.import_file(options['user'], options['path'], options['format'])
+    except (OSError, ValueError) as e:
+      raise CommandError(str(e))
+
+    for reject in report.rejects:
+      self.stderr.write(f"line {reject['line']}: {json.dumps(reject['errors'])}")
+    if report.rejected > len(report.rejects):
+      self.stderr.write(f"... and {report.rejected - len(report.rejects)} more rejected lines")
+
+    self.stdout.write(self.style.SUCCESS(
+      f"Imported {report.imported} todos in {report.seconds:.2f}s "
+      f"({report.rows_per_second} rows/s), rejected {report.rejected}"
+    ))
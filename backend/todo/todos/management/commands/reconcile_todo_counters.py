@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from todo.todos import counters
+
+
+class Command(BaseCommand):
+  """
+  Recount todos and repair per-user counters that drifted, e.g. after rows
+  were changed outside the API:
+
+    python manage.py reconcile_todo_counters
+    python manage.py reconcile_todo_counters --user 0b8f7c1e-4c7a-4f57-9d8c-2b6a0c7f5e11
+  """
+
+  help = "Repair the per-user todo counters behind /api/todos/stats/"
+
+  def add_arguments(self, parser):
+    parser.add_argument('--user', help="Only this Keycloak subject (sub claim)")
+
+  def handle(self, *args, **options):
+    fixed = counters.reconcile(options['user'])
+    self.stdout.write(self.style.SUCCESS(f"Fixed {fixed} counter(s)"))
@@ -0,0 +1,39 @@
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.contrib.postgres.operations import RemoveIndexConcurrently
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+    # Indexes are built and dropped CONCURRENTLY so large tables stay writable.
+    atomic = False
+
+    dependencies = [
+        ("todos", "0001_initial"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="todo",
+            index=models.Index(
+                fields=["user_sub", "-created_at", "-id"],
+                name="todos_todo_user_created_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="todo",
+            index=models.Index(
+                condition=models.Q(("completed", False)),
+                fields=["user_sub", "-created_at", "-id"],
+                name="todos_todo_user_open_idx",
+            ),
+        ),
+        RemoveIndexConcurrently(
+            model_name="todo",
+            name="todos_todo_user_su_c4ecfd_idx",
+        ),
+        RemoveIndexConcurrently(
+            model_name="todo",
+            name="todos_todo_complet_334461_idx",
+        ),
+    ]
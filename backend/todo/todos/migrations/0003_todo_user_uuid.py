@@ -0,0 +1,31 @@
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("todos", "0002_user_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="todo",
+            name="user_uuid",
+            field=models.UUIDField(
+                blank=True,
+                help_text="Keycloak user subject (sub claim from JWT) when it is a UUID",
+                null=True,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="todo",
+            name="user_sub",
+            field=models.CharField(
+                blank=True,
+                default="",
+                help_text="Keycloak user subject, only for subjects that are not UUIDs",
+                max_length=255,
+            ),
+        ),
+    ]
@@ -0,0 +1,54 @@
+from django.db import migrations
+from django.db import transaction
+
+# Rows per UPDATE. Each batch commits on its own so a large table is never
+# locked for the whole backfill and an interrupted run can simply be resumed.
+BATCH_SIZE = 10_000
+
+UUID_PATTERN = "^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$"
+
+
+def _id_batches(schema_editor, table):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"SELECT min(id), max(id) FROM {table}")
+        low, high = cursor.fetchone()
+    if low is None:
+        return
+    for start in range(low, high + 1, BATCH_SIZE):
+        yield start, start + BATCH_SIZE
+
+
+def move_subjects_to_uuid(apps, schema_editor):
+    table = apps.get_model("todos", "Todo")._meta.db_table
+    for start, end in _id_batches(schema_editor, table):
+        with transaction.atomic(using=schema_editor.connection.alias):
+            with schema_editor.connection.cursor() as cursor:
+                cursor.execute(
+                    f"UPDATE {table} SET user_uuid = user_sub::uuid, user_sub = '' "
+                    "WHERE id >= %s AND id < %s AND user_uuid IS NULL AND user_sub ~ %s",
+                    [start, end, UUID_PATTERN],
+                )
+
+
+def move_subjects_to_text(apps, schema_editor):
+    table = apps.get_model("todos", "Todo")._meta.db_table
+    for start, end in _id_batches(schema_editor, table):
+        with transaction.atomic(using=schema_editor.connection.alias):
+            with schema_editor.connection.cursor() as cursor:
+                cursor.execute(
+                    f"UPDATE {table} SET user_sub = user_uuid::text, user_uuid = NULL "
+                    "WHERE id >= %s AND id < %s AND user_uuid IS NOT NULL",
+                    [start, end],
+                )
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("todos", "0003_todo_user_uuid"),
+    ]
+
+    operations = [
+        migrations.RunPython(move_subjects_to_uuid, move_subjects_to_text),
+    ]
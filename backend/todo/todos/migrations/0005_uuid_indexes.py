@@ -0,0 +1,47 @@
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.contrib.postgres.operations import RemoveIndexConcurrently
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+    # Built after the backfill, CONCURRENTLY, so large tables stay writable.
+    atomic = False
+
+    dependencies = [
+        ("todos", "0004_backfill_user_uuid"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="todo",
+            index=models.Index(
+                fields=["user_uuid", "-created_at", "-id"],
+                name="todos_todo_uuid_created_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="todo",
+            index=models.Index(
+                condition=models.Q(("completed", False)),
+                fields=["user_uuid", "-created_at", "-id"],
+                name="todos_todo_uuid_open_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="todo",
+            index=models.Index(
+                condition=models.Q(("user_uuid__isnull", True)),
+                fields=["user_sub", "-created_at", "-id"],
+                name="todos_todo_sub_created_idx",
+            ),
+        ),
+        RemoveIndexConcurrently(
+            model_name="todo",
+            name="todos_todo_user_created_idx",
+        ),
+        RemoveIndexConcurrently(
+            model_name="todo",
+            name="todos_todo_user_open_idx",
+        ),
+    ]
@@ -0,0 +1,84 @@
+from django.db import migrations
+from django.db import models
+
+# Stamp every inserted or updated todo with the id of the writing transaction,
+# and leave a tombstone behind for every deleted one. Triggers rather than
+# model code so bulk_update, queryset.update(), raw SQL and COPY are covered.
+TRIGGERS = """
+CREATE FUNCTION todos_todo_stamp_change() RETURNS trigger AS $$
+BEGIN
+    NEW.change_xid := pg_current_xact_id()::text::bigint;
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER todos_todo_stamp_change
+    BEFORE INSERT OR UPDATE ON todos_todo
+    FOR EACH ROW EXECUTE FUNCTION todos_todo_stamp_change();
+
+CREATE FUNCTION todos_todo_tombstone() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO todos_todotombstone (todo_id, user_uuid, user_sub, change_xid, deleted_at)
+    VALUES (OLD.id, OLD.user_uuid, OLD.user_sub, pg_current_xact_id()::text::bigint, clock_timestamp());
+    RETURN OLD;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER todos_todo_tombstone
+    AFTER DELETE ON todos_todo
+    FOR EACH ROW EXECUTE FUNCTION todos_todo_tombstone();
+"""
+
+DROP_TRIGGERS = """
+DROP TRIGGER todos_todo_tombstone ON todos_todo;
+DROP FUNCTION todos_todo_tombstone();
+DROP TRIGGER todos_todo_stamp_change ON todos_todo;
+DROP FUNCTION todos_todo_stamp_change();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("todos", "0005_uuid_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TodoTombstone",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("todo_id", models.BigIntegerField()),
+                ("user_uuid", models.UUIDField(blank=True, null=True)),
+                ("user_sub", models.CharField(blank=True, default="", max_length=255)),
+                ("change_xid", models.BigIntegerField()),
+                ("deleted_at", models.DateTimeField()),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["user_uuid", "change_xid"], name="todos_tomb_uuid_change_idx"),
+                    models.Index(
+                        condition=models.Q(("user_uuid__isnull", True)),
+                        fields=["user_sub", "change_xid"],
+                        name="todos_tomb_sub_change_idx",
+                    ),
+                    models.Index(fields=["deleted_at"], name="todos_tomb_deleted_at_idx"),
+                ],
+            },
+        ),
+        # Existing rows keep 0 and so show up in every client's first sync.
+        migrations.AddField(
+            model_name="todo",
+            name="change_xid",
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.RunSQL(TRIGGERS, DROP_TRIGGERS),
+    ]
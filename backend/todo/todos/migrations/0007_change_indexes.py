@@ -0,0 +1,29 @@
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("todos", "0006_change_tracking"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="todo",
+            index=models.Index(
+                fields=["user_uuid", "change_xid", "id"],
+                name="todos_todo_uuid_change_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="todo",
+            index=models.Index(
+                condition=models.Q(("user_uuid__isnull", True)),
+                fields=["user_sub", "change_xid", "id"],
+                name="todos_todo_sub_change_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,58 @@
+from django.db import migrations
+from django.db import models
+
+# Start every user's counters from their current todos; from here on the
+# API's writes keep them up to date.
+BACKFILL = """
+INSERT INTO todos_todocounter (user_uuid, user_sub, total, open, completed)
+SELECT user_uuid,
+       user_sub,
+       count(*),
+       count(*) FILTER (WHERE NOT completed),
+       count(*) FILTER (WHERE completed)
+FROM todos_todo
+GROUP BY user_uuid, user_sub;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("todos", "0007_change_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TodoCounter",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("user_uuid", models.UUIDField(blank=True, null=True)),
+                ("user_sub", models.CharField(blank=True, default="", max_length=255)),
+                ("total", models.IntegerField(default=0)),
+                ("open", models.IntegerField(default=0)),
+                ("completed", models.IntegerField(default=0)),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("user_uuid",),
+                        name="todos_counter_uuid_uniq",
+                    ),
+                    models.UniqueConstraint(
+                        condition=models.Q(("user_uuid__isnull", True)),
+                        fields=("user_sub",),
+                        name="todos_counter_sub_uniq",
+                    ),
+                ],
+            },
+        ),
+        migrations.RunSQL(BACKFILL, migrations.RunSQL.noop),
+    ]
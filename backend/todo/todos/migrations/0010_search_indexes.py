@@ -0,0 +1,52 @@
+from django.db import migrations
+
+# Owner-leading GIN indexes, so a search only reads the user's own entries:
+# (owner, vector) for words and prefixes, (owner, title trigrams) for fuzzy
+# title matches. Without btree_gin each is indexed on its own.
+OWNER_INDEXES = {
+    "todos_todo_uuid_search_idx": "ON todos_todo USING gin (user_uuid, search_vector)",
+    "todos_todo_sub_search_idx": "ON todos_todo USING gin (user_sub, search_vector) WHERE user_uuid IS NULL",
+}
+VECTOR_INDEXES = {
+    "todos_todo_search_idx": "ON todos_todo USING gin (search_vector)",
+}
+TRIGRAM_INDEXES = {
+    "todos_todo_uuid_trgm_idx": "ON todos_todo USING gin (user_uuid, title gin_trgm_ops)",
+    "todos_todo_sub_trgm_idx": "ON todos_todo USING gin (user_sub, title gin_trgm_ops) WHERE user_uuid IS NULL",
+}
+TITLE_TRIGRAM_INDEXES = {
+    "todos_todo_trgm_idx": "ON todos_todo USING gin (title gin_trgm_ops)",
+}
+
+
+def _installed(schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT extname FROM pg_extension")
+        return {name for (name,) in cursor.fetchall()}
+
+
+def create_indexes(apps, schema_editor):
+    installed = _installed(schema_editor)
+    owner_leading = "btree_gin" in installed
+    indexes = dict(OWNER_INDEXES if owner_leading else VECTOR_INDEXES)
+    if "pg_trgm" in installed:
+        indexes.update(TRIGRAM_INDEXES if owner_leading else TITLE_TRIGRAM_INDEXES)
+    for name, definition in indexes.items():
+        schema_editor.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} {definition}")
+
+
+def drop_indexes(apps, schema_editor):
+    for name in {**OWNER_INDEXES, **VECTOR_INDEXES, **TRIGRAM_INDEXES, **TITLE_TRIGRAM_INDEXES}:
+        schema_editor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("todos", "0009_search_vector"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
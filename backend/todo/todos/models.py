@@ -1,6 +1,30 @@
+import re
+import uuid
+
 from django.db import models
 from django.conf import settings
 
+# Canonical (lowercase, hyphenated) UUID text, the form Keycloak issues subjects in.
+UUID_SUBJECT = re.compile(r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$')
+
+
+def subject_fields(sub):
+  """
+  Column values storing the Keycloak subject ``sub``: a native UUID when it is
+  one, otherwise the raw string in ``user_sub`` as a fallback.
+  """
+  if sub and UUID_SUBJECT.match(sub):
+    return {'user_uuid': uuid.UUID(sub), 'user_sub': ''}
+  return {'user_uuid': None, 'user_sub': sub}
+
+
+class TodoQuerySet(models.QuerySet):
+
+  def owned_by(self, sub):
+    """Todos belonging to the Keycloak subject ``sub``"""
+    return self.filter(**subject_fields(sub))
+
+
 class Todo(models.Model):
   """
   Simple todo model to create CRUD operations
@@ -8,9 +32,16 @@ class Todo(models.Model):
   """
 
   #link to keycloak user (no foreign key to user model)
+  user_uuid = models.UUIDField(
+    null=True,
+    blank=True,
+    help_text="Keycloak user subject (sub claim from JWT) when it is a UUID"
+  )
   user_sub = models.CharField(
     max_length=255,
-    help_text="Keycloak user subject (sub claim from JWT)"
+    blank=True,
+    default='',
+    help_text="Keycloak user subject, only for subjects that are not UUIDs"
   )
 
   # Todo fields
@@ -22,15 +53,107 @@ class Todo(models.Model):
   created_at = models.DateTimeField(auto_now_add=True)
   updated_at = models.DateTimeField(auto_now=True)
 
+  # id of the Postgres transaction that last wrote the row, stamped by a
+  # trigger (see migration 0006) so every write path is covered; drives /changes/
+  change_xid = models.BigIntegerField(default=0, editable=False)
+
+  objects = TodoQuerySet.as_manager()
+
   class Meta:
     ordering = ["-created_at"]
     indexes = [
-      # fast user lookup
-      models.Index(fields=['user_sub']),
-    #   fast status filtering
-      models.Index(fields=['completed']),
+      # a user's todos newest first, in the order the list is paginated
+      models.Index(fields=['user_uuid', '-created_at', '-id'], name='todos_todo_uuid_created_idx'),
+      # a user's open todos; completed rows are left out of the index entirely
+      models.Index(
+        fields=['user_uuid', '-created_at', '-id'],
+        name='todos_todo_uuid_open_idx',
+        condition=models.Q(completed=False),
+      ),
+      # the few subjects that are not UUIDs
+      models.Index(
+        fields=['user_sub', '-created_at', '-id'],
+        name='todos_todo_sub_created_idx',
+        condition=models.Q(user_uuid__isnull=True),
+      ),
+      # a user's changes since a sync token
+      models.Index(fields=['user_uuid', 'change_xid', 'id'], name='todos_todo_uuid_change_idx'),
+      models.Index(
+        fields=['user_sub', 'change_xid', 'id'],
+        name='todos_todo_sub_change_idx',
+        condition=models.Q(user_uuid__isnull=True),
+      ),
     ]
 
   def __str__(self):
     return f"{self.title} - {'' if self.completed else 'O'}"
 
+  @property
+  def subject(self):
+    """The Keycloak subject owning this todo, whichever column holds it"""
+    return str(self.user_uuid) if self.user_uuid else self.user_sub
+
+  @subject.setter
+  def subject(self, sub):
+    for field, value in subject_fields(sub).items():
+      setattr(self, field, value)
+
+
+class TodoTombstone(models.Model):
+  """
+  Left behind by a database trigger whenever a todo is deleted, so clients
+  syncing through /changes/ learn about the deletion. Pruned after
+  ``TODO_SYNC_RETENTION_DAYS`` by ``prune_todo_tombstones``.
+  """
+
+  todo_id = models.BigIntegerField()
+  user_uuid = models.UUIDField(null=True, blank=True)
+  user_sub = models.CharField(max_length=255, blank=True, default='')
+  change_xid = models.BigIntegerField()
+  deleted_at = models.DateTimeField()
+
+  objects = TodoQuerySet.as_manager()
+
+  class Meta:
+    indexes = [
+      models.Index(fields=['user_uuid', 'change_xid'], name='todos_tomb_uuid_change_idx'),
+      models.Index(
+        fields=['user_sub', 'change_xid'],
+        name='todos_tomb_sub_change_idx',
+        condition=models.Q(user_uuid__isnull=True),
+      ),
+      models.Index(fields=['deleted_at'], name='todos_tomb_deleted_at_idx'),
+    ]
+
+  def __str__(self):
+    return f"deleted todo {self.todo_id}"
+
+
+class TodoCounter(models.Model):
+  """
+  Running totals of one user's todos, adjusted in the same transaction as
+  every write through the API and the importer (see ``counters``), so
+  /api/todos/stats/ reads a single row. ``reconcile_todo_counters`` repairs
+  drift from writes made any other way.
+  """
+
+  user_uuid = models.UUIDField(null=True, blank=True)
+  user_sub = models.CharField(max_length=255, blank=True, default='')
+  total = models.IntegerField(default=0)
+  open = models.IntegerField(default=0)
+  completed = models.IntegerField(default=0)
+
+  objects = TodoQuerySet.as_manager()
+
+  class Meta:
+    constraints = [
+      models.UniqueConstraint(fields=['user_uuid'], name='todos_counter_uuid_uniq'),
+      models.UniqueConstraint(
+        fields=['user_sub'],
+        name='todos_counter_sub_uniq',
+        condition=models.Q(user_uuid__isnull=True),
+      ),
+    ]
+
+  def __str__(self):
+    return f"{self.user_uuid or self.user_sub}: {self.open} open, {self.completed} completed"
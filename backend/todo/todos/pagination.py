@@ -0,0 +1,145 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class TodoCursorPagination(BasePagination):
+  """
+  Keyset pagination over ``(created_at, id)``, newest first.
+
+  The cursor is the position of the last todo on the page, encoded so
+  clients treat it as opaque. The next page is read with
+  ``created_at <= c AND (created_at < c OR id < i) ... LIMIT n + 1``; the
+  redundant ``<=`` lets Postgres start the index scan at the cursor, so every
+  page costs the same however many todos come before it. The total is only
+  counted when the client asks for it with ``?count=true``.
+  """
+
+  cursor_query_param = 'cursor'
+  page_size_query_param = 'page_size'
+  count_query_param = 'count'
+  ordering = ('-created_at', '-id')
+  invalid_cursor_message = 'Invalid cursor'
+
+  def paginate_queryset(self, queryset, request, view=None):
+    page_queryset = self.page_queryset(queryset, request)
+    if self.include_count:
+      self.count = queryset.count()
+    return self.get_page(list(page_queryset))
+
+  async def apaginate_queryset(self, queryset, request, view=None):
+    page_queryset = self.page_queryset(queryset, request)
+    if self.include_count:
+      self.count = await queryset.acount()
+    return self.get_page([todo async for todo in page_queryset])
+
+  def page_queryset(self, queryset, request):
+    """The lazy queryset for the requested page, one row longer to detect a next page."""
+    self.request = request
+    self.page_size = self.get_page_size(request)
+    self.include_count = request.query_params.get(self.count_query_param, '').lower() in ('1', 'true')
+    self.count = None
+
+    queryset = queryset.order_by(*self.ordering)
+    position = self.decode_cursor(request)
+    if position is not None:
+      queryset = self.after(queryset, position)
+    return queryset[:self.page_size + 1]
+
+  def after(self, queryset, position):
+    """The rows of ``queryset`` that come after ``position`` in ``ordering``"""
+    created_at, pk = position
+    return queryset.filter(created_at__lte=created_at).filter(
+      Q(created_at__lt=created_at) | Q(id__lt=pk)
+    )
+
+  def get_page(self, rows):
+    self.has_next = len(rows) > self.page_size
+    self.page = rows[:self.page_size]
+    return self.page
+
+  def get_page_size(self, request):
+    try:
+      page_size = int(request.query_params[self.page_size_query_param])
+    except (KeyError, ValueError):
+      return settings.TODO_PAGE_SIZE
+    if page_size <= 0:
+      return settings.TODO_PAGE_SIZE
+    return min(page_size, settings.TODO_MAX_PAGE_SIZE)
+
+  def get_next_link(self):
+    if not self.has_next:
+      return None
+    last = self.page[-1]
+    url = self.request.build_absolute_uri()
+    url = remove_query_param(url, self.count_query_param)
+    return replace_query_param(url, self.cursor_query_param, self.encode_cursor(last))
+
+  def get_paginated_response(self, data):
+    body = OrderedDict([('next', self.get_next_link())])
+    if self.count is not None:
+      body['count'] = self.count
+    body['results'] = data
+    return Response(body)
+
+  def get_paginated_response_schema(self, schema):
+    return {
+      'type': 'object',
+      'required': ['results'],
+      'properties': {
+        'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+        'count': {'type': 'integer', 'description': 'Only present with ?count=true'},
+        'results': schema,
+      },
+    }
+
+  def encode_cursor(self, todo):
+    position = f'{self.position_key(todo)}|{todo.pk}'
+    return urlsafe_b64encode(position.encode('ascii')).decode('ascii')
+
+  def decode_cursor(self, request):
+    encoded = request.query_params.get(self.cursor_query_param)
+    if not encoded:
+      return None
+    try:
+      key, _, pk = urlsafe_b64decode(encoded.encode('ascii')).decode('ascii').partition('|')
+      return self.parse_position_key(key), int(pk)
+    except (TypeError, ValueError, UnicodeError):
+      raise NotFound(self.invalid_cursor_message)
+
+  def position_key(self, todo):
+    return todo.created_at.isoformat()
+
+  def parse_position_key(self, key):
+    created_at = datetime.fromisoformat(key)
+    if created_at.tzinfo is None:
+      raise ValueError(key)
+    return created_at
+
+
+class SearchCursorPagination(TodoCursorPagination):
+  """
+  Keyset pagination over ``(rank, id)``, best match first, for querysets
+  annotated with a ``rank``. The rank is recomputed for every page, so a
+  page starts right after the last match of the previous one.
+  """
+
+  ordering = ('-rank', '-id')
+
+  def after(self, queryset, position):
+    rank, pk = position
+    return queryset.filter(Q(rank__lt=rank) | Q(rank=rank, id__lt=pk))
+
+  def position_key(self, todo):
+    # repr round-trips the float exactly, so the next page compares equal ranks correctly.
+    return repr(todo.rank)
+
+  def parse_position_key(self, key):
+    return float(key)
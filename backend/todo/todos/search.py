@@ -0,0 +1,87 @@
+"""
+Search over a user's todos for ``/api/todos/search/?q=``.
+
+On Postgres every term of the query is matched as a prefix against the
+generated ``search_vector`` column (title weighted above description), and
+with ``pg_trgm`` installed titles are also matched by trigram word
+similarity, so small typos still find the todo. Results are ranked by
+``ts_rank`` plus that similarity and paged with ``SearchCursorPagination``.
+Both conditions are served by GIN indexes that lead with the owner
+(migration 0010), so the cost follows the number of matches rather than
+the size of the table.
+
+Other databases get a case-insensitive ``icontains`` over title and
+description, newest first, paged like the list.
+"""
+
+import functools
+import re
+
+from django.db import connection
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from rest_framework.exceptions import ValidationError
+
+from .pagination import SearchCursorPagination, TodoCursorPagination
+
+MAX_QUERY_LENGTH = 200
+MAX_TERMS = 8
+CONFIG = 'english'
+
+
+def ranked():
+  return connection.vendor == 'postgresql'
+
+
+@functools.cache
+def trigrams():
+  """Whether ``pg_trgm`` is installed; checked once per process"""
+  with connection.cursor() as cursor:
+    cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+    return cursor.fetchone() is not None
+
+
+def clean_query(q):
+  q = (q or '').strip()
+  if not q:
+    raise ValidationError({'q': ['A search query is required.']})
+  if len(q) > MAX_QUERY_LENGTH:
+    raise ValidationError({'q': [f'At most {MAX_QUERY_LENGTH} characters.']})
+  return q
+
+
+def prefix_tsquery(q):
+  """``to_tsquery`` text matching every word of ``q`` as a prefix; empty if ``q`` has no words"""
+  return ' & '.join(f'{term}:*' for term in re.findall(r'\w+', q.lower())[:MAX_TERMS])
+
+
+def search(queryset, q):
+  """``queryset`` narrowed to todos matching ``q``; ranked ones carry a ``rank``"""
+  if not ranked():
+    return queryset.filter(Q(title__icontains=q) | Q(description__icontains=q))
+
+  table = connection.ops.quote_name(queryset.model._meta.db_table)
+  tsquery = prefix_tsquery(q)
+  fuzzy = trigrams()
+  if not tsquery:
+    # Nothing to match as words (only punctuation, say); trigrams may still apply.
+    if not fuzzy:
+      return queryset.none().annotate(rank=Value(0.0))
+    return queryset.filter(
+      RawSQL(f'{table}.title %%> %s', (q,), output_field=BooleanField())
+    ).annotate(rank=RawSQL(f'word_similarity(%s, {table}.title)', (q,), output_field=FloatField()))
+
+  condition = f"{table}.search_vector @@ to_tsquery('{CONFIG}', %s)"
+  rank = f"ts_rank({table}.search_vector, to_tsquery('{CONFIG}', %s))"
+  params = [tsquery]
+  if fuzzy:
+    condition = f'({condition} OR {table}.title %%> %s)'
+    rank = f'{rank} + word_similarity(%s, {table}.title)'
+    params.append(q)
+  return queryset.filter(
+    RawSQL(condition, params, output_field=BooleanField())
+  ).annotate(rank=RawSQL(rank, params, output_field=FloatField()))
+
+
+def pagination_class():
+  return SearchCursorPagination if ranked() else TodoCursorPagination
@@ -0,0 +1,111 @@
+"""
+Delta sync for ``/api/todos/changes/``.
+
+Rows are ordered by ``change_xid``, the id of the Postgres transaction that
+last wrote them, which a trigger stamps (tombstones get one the same way).
+A sync token is a position ``(xid, id)`` in that order, so no wall clock is
+involved and skew between app servers does not matter.
+
+Transaction ids are handed out when a transaction starts but become visible
+when it commits, so a later id can be seen while an earlier one is still in
+flight. Each call therefore only returns changes below the current snapshot
+``xmin``: every transaction under it has finished, so that part of the
+history can no longer change and a token never skips a late commit.
+"""
+
+import time
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+
+from .models import Todo, TodoTombstone
+
+
+class SyncTokenExpired(APIException):
+  status_code = status.HTTP_410_GONE
+  default_detail = 'The sync token is too old; fetch the full list and sync from the new token.'
+  default_code = 'sync_token_expired'
+
+
+def encode_token(xid, pk, issued_at):
+  return urlsafe_b64encode(f'{xid}.{pk}.{int(issued_at)}'.encode('ascii')).decode('ascii')
+
+
+def decode_token(token):
+  """``(xid, id, issued_at)`` from a token; raises ``ValidationError`` if it is not one of ours"""
+  try:
+    xid, pk, issued_at = urlsafe_b64decode(token.encode('ascii')).decode('ascii').split('.')
+    return int(xid), int(pk), int(issued_at)
+  except (TypeError, ValueError, UnicodeError):
+    raise ValidationError({'since': ['Invalid sync token.']})
+
+
+def _snapshot_xmin():
+  with connection.cursor() as cursor:
+    cursor.execute('SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint')
+    return cursor.fetchone()[0]
+
+
+def changes(sub, token=None, limit=None):
+  """
+  Todos of ``sub`` created or updated since ``token``, plus the ids of those
+  deleted since. Without a token every todo is returned, as a first sync.
+  The result holds at most ``limit`` todos; ``has_more`` says to call again
+  with ``next`` straight away.
+  """
+  limit = limit or settings.TODO_SYNC_PAGE_SIZE
+  if token:
+    xid, pk, issued_at = decode_token(token)
+    if issued_at < time.time() - settings.TODO_SYNC_RETENTION_DAYS * 86400:
+      # Tombstones this client may need could already be pruned.
+      raise SyncTokenExpired()
+  else:
+    xid, pk = 0, 0
+
+  xmin = _snapshot_xmin()
+  todos = list(
+    Todo.objects.owned_by(sub)
+    .filter(change_xid__gte=xid, change_xid__lt=xmin)
+    .filter(Q(change_xid__gt=xid) | Q(id__gt=pk))
+    .order_by('change_xid', 'id')[:limit + 1]
+  )
+  has_more = len(todos) > limit
+  todos = todos[:limit]
+
+  if has_more:
+    last = todos[-1]
+    next_xid, next_pk, upper = last.change_xid, last.pk, last.change_xid + 1
+  else:
+    next_xid, next_pk, upper = xmin, 0, xmin
+
+  deleted = []
+  if token:
+    # Tombstones of the last transaction on a full page are sent again with
+    # the next page; applying a deletion twice is harmless.
+    deleted = list(
+      TodoTombstone.objects.owned_by(sub)
+      .filter(change_xid__gte=xid, change_xid__lt=upper)
+      .order_by('change_xid')
+      .values_list('todo_id', flat=True)
+    )
+
+  return {
+    'changes': todos,
+    'deleted': deleted,
+    'next': encode_token(next_xid, next_pk, time.time()),
+    'has_more': has_more,
+  }
+
+
+def prune_tombstones():
+  """Delete tombstones no valid sync token can still need; returns how many"""
+  # One extra day so a tombstone outlives every token issued before its row was deleted.
+  cutoff = timezone.now() - timedelta(days=settings.TODO_SYNC_RETENTION_DAYS + 1)
+  deleted, _ = TodoTombstone.objects.filter(deleted_at__lt=cutoff).delete()
+  return deleted
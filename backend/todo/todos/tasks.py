@@ -0,0 +1,16 @@
+from celery import shared_task
+
+from .importer import import_file
+from .sync import prune_tombstones
+
+
+@shared_task()
+def prune_todo_tombstones():
+    """Drop tombstones older than any sync token still accepted."""
+    return prune_tombstones()
+
+
+@shared_task()
+def import_todos(sub, path, fmt=None):
+    """Import a user's todos from an NDJSON or CSV file the workers can read."""
+    return import_file(sub, path, fmt).as_dict()
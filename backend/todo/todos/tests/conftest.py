@@ -0,0 +1,3 @@
+from todo.auth_keycloak.tests.conftest import _reset_auth_state  # noqa: F401
+from todo.auth_keycloak.tests.conftest import keycloak  # noqa: F401
+from todo.auth_keycloak.tests.conftest import rsa_key  # noqa: F401
@@ -0,0 +1,87 @@
+import json
+
+import pytest
+from asgiref.sync import async_to_sync
+from asgiref.sync import iscoroutinefunction
+from rest_framework.test import APIRequestFactory
+
+from todo.auth_keycloak.tests.conftest import KID
+from todo.auth_keycloak.tests.factories import mint_token
+from todo.todos.models import Todo
+from todo.todos.views import TodoViewSet
+
+pytestmark = pytest.mark.django_db
+
+SUB = "0b8f7c1e-4c7a-4f57-9d8c-2b6a0c7f5e11"
+
+
+@pytest.fixture
+def api_rf() -> APIRequestFactory:
+    return APIRequestFactory()
+
+
+@pytest.fixture
+def token(keycloak, rsa_key) -> str:
+    return mint_token(rsa_key, KID)
+
+
+@pytest.fixture
+def async_api(settings):
+    settings.ASYNC_API = True
+
+
+def _call(view, request, **kwargs):
+    response = async_to_sync(view)(request, **kwargs)
+    if hasattr(response, "render"):
+        response.render()
+    return response
+
+
+def test_views_stay_sync_by_default():
+    assert not iscoroutinefunction(TodoViewSet.as_view({"get": "list"}))
+
+
+def test_list_runs_async(async_api, api_rf, token):
+    Todo.objects.create(subject=SUB, title="mine")
+    Todo.objects.create(subject="someone-else", title="theirs")
+    view = TodoViewSet.as_view({"get": "list"})
+    assert iscoroutinefunction(view)
+
+    response = _call(view, api_rf.get("/api/todos/", HTTP_AUTHORIZATION=f"Bearer {token}"))
+
+    assert response.status_code == 200
+    body = json.loads(response.content)
+    assert [t["title"] for t in body["results"]] == ["mine"]
+
+
+def test_retrieve_runs_async(async_api, api_rf, token):
+    mine = Todo.objects.create(subject=SUB, title="mine")
+    theirs = Todo.objects.create(subject="someone-else", title="theirs")
+    view = TodoViewSet.as_view({"get": "retrieve"})
+    request = lambda: api_rf.get("/api/todos/", HTTP_AUTHORIZATION=f"Bearer {token}")  # noqa: E731
+
+    assert _call(view, request(), pk=mine.pk).status_code == 200
+    assert _call(view, request(), pk=theirs.pk).status_code == 404
+    assert _call(view, request(), pk="not-a-number").status_code == 404
+
+
+def test_async_view_requires_authentication(async_api, api_rf):
+    view = TodoViewSet.as_view({"get": "list"})
+
+    assert _call(view, api_rf.get("/api/todos/")).status_code == 401
+    assert _call(view, api_rf.get("/api/todos/", HTTP_AUTHORIZATION="Bearer nope")).status_code == 401
+
+
+def test_writes_are_handed_to_the_sync_view(async_api, api_rf, token):
+    view = TodoViewSet.as_view({"get": "list", "post": "create"})
+    request = api_rf.post(
+        "/api/todos/",
+        {"title": "write through"},
+        format="json",
+        HTTP_AUTHORIZATION=f"Bearer {token}",
+    )
+
+    response = _call(view, request)
+
+    assert response.status_code == 201
+    assert Todo.objects.get(title="write through").subject == SUB
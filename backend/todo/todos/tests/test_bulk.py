@@ -0,0 +1,120 @@
+import pytest
+from rest_framework.test import APIClient
+
+from todo.auth_keycloak.authentication import build_user
+from todo.todos import counters
+from todo.todos.models import Todo
+from todo.todos.models import TodoCounter
+from todo.todos.models import subject_fields
+
+pytestmark = pytest.mark.django_db
+
+SUB = "0b8f7c1e-4c7a-4f57-9d8c-2b6a0c7f5e11"
+URL = "/api/todos/bulk/"
+
+
+@pytest.fixture
+def client() -> APIClient:
+    client = APIClient()
+    client.force_authenticate(user=build_user({"sub": SUB, "preferred_username": "alice"}))
+    return client
+
+
+@pytest.fixture
+def counter():
+    return TodoCounter.objects.create(**subject_fields(SUB))
+
+
+def test_create_many_in_a_handful_of_queries(client, counter, django_assert_max_num_queries):
+    items = [{"title": f"todo {i}", "description": "imported"} for i in range(1000)]
+
+    with django_assert_max_num_queries(6):
+        response = client.post(URL, items, format="json")
+
+    assert response.status_code == 201
+    assert len(response.data["results"]) == 1000
+    assert all(r["id"] for r in response.data["results"])
+    assert Todo.objects.owned_by(SUB).count() == 1000
+
+
+def test_invalid_items_are_reported_and_nothing_is_written(client):
+    response = client.post(URL, [{"title": "ok"}, {"title": "  "}, {}], format="json")
+
+    assert response.status_code == 400
+    assert [e["index"] for e in response.data["errors"]] == [1, 2]
+    assert "title" in response.data["errors"][0]["errors"]
+    assert not Todo.objects.exists()
+
+
+def test_update_many(client):
+    first = Todo.objects.create(subject=SUB, title="first")
+    second = Todo.objects.create(subject=SUB, title="second")
+
+    response = client.patch(
+        URL,
+        [{"id": first.id, "completed": True}, {"id": second.id, "title": "renamed"}],
+        format="json",
+    )
+
+    assert response.status_code == 200
+    first.refresh_from_db()
+    second.refresh_from_db()
+    assert first.completed and first.title == "first"
+    assert second.title == "renamed" and not second.completed
+    assert second.updated_at > second.created_at
+
+
+def test_update_is_scoped_to_the_user(client):
+    mine = Todo.objects.create(subject=SUB, title="mine")
+    theirs = Todo.objects.create(subject="someone-else", title="theirs")
+
+    response = client.patch(
+        URL,
+        [{"id": mine.id, "title": "changed"}, {"id": theirs.id, "title": "hijacked"}, {"title": "no id"}],
+        format="json",
+    )
+
+    assert response.status_code == 400
+    assert response.data["errors"] == [
+        {"index": 1, "errors": {"id": ["Not found."]}},
+        {"index": 2, "errors": {"id": ["Not found."]}},
+    ]
+    assert set(Todo.objects.values_list("title", flat=True)) == {"mine", "theirs"}
+
+
+def test_delete_many_is_one_filtered_delete(client, django_assert_max_num_queries):
+    ids = [Todo.objects.create(subject=SUB, title=f"todo {i}").id for i in range(3)]
+    keep = Todo.objects.create(subject=SUB, title="keep")
+    counters.reconcile(SUB)
+
+    with django_assert_max_num_queries(5):
+        response = client.delete(URL, ids, format="json")
+
+    assert response.status_code == 204
+    assert list(Todo.objects.all()) == [keep]
+    assert counters.get(SUB) == {"total": 1, "open": 1, "completed": 0}
+
+
+def test_delete_of_someone_elses_todo_fails(client):
+    mine = Todo.objects.create(subject=SUB, title="mine")
+    theirs = Todo.objects.create(subject="someone-else", title="theirs")
+
+    response = client.delete(URL, [mine.id, theirs.id], format="json")
+
+    assert response.status_code == 400
+    assert response.data["errors"] == [{"index": 1, "errors": {"id": ["Not found."]}}]
+    assert Todo.objects.count() == 2
+
+
+@pytest.mark.parametrize("body", [{"title": "not a list"}, []])
+def test_body_must_be_a_non_empty_list(client, body):
+    assert client.post(URL, body, format="json").status_code == 400
+
+
+def test_batch_size_is_limited(client, settings):
+    settings.TODO_BULK_MAX_ITEMS = 2
+
+    response = client.post(URL, [{"title": "a"}, {"title": "b"}, {"title": "c"}], format="json")
+
+    assert response.status_code == 400
+    assert not Todo.objects.exists()
@@ -0,0 +1,94 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from todo.auth_keycloak.authentication import build_user
+from todo.todos.cache import response_cache
+from todo.todos.models import Todo
+
+pytestmark = pytest.mark.django_db
+
+SUB = "0b8f7c1e-4c7a-4f57-9d8c-2b6a0c7f5e11"
+OTHER = "5d2c4f0a-8f0e-4a4e-9d35-3b1f0a6f9c22"
+
+
+def _client(sub=SUB) -> APIClient:
+    client = APIClient()
+    client.force_authenticate(user=build_user({"sub": sub, "preferred_username": sub}))
+    return client
+
+
+@pytest.fixture(autouse=True)
+def _reset_stats():
+    response_cache.reset_stats()
+
+
+def test_second_read_is_served_from_cache():
+    todo = Todo.objects.create(subject=SUB, title="mine")
+    client = _client()
+
+    first = client.get("/api/todos/")
+    detail = client.get(f"/api/todos/{todo.pk}/")
+    with CaptureQueriesContext(connection) as queries:
+        second = client.get("/api/todos/")
+        again = client.get(f"/api/todos/{todo.pk}/")
+
+    # Only the ATOMIC_REQUESTS savepoints of the test transaction remain.
+    assert all("SAVEPOINT" in q["sql"] for q in queries.captured_queries)
+
+    assert first["X-Cache"] == "MISS"
+    assert second["X-Cache"] == "HIT"
+    assert second.json() == first.json()
+    assert detail["X-Cache"] == "MISS"
+    assert again["X-Cache"] == "HIT"
+    assert again.json()["title"] == "mine"
+
+
+def test_writes_retire_the_users_entries(django_capture_on_commit_callbacks):
+    client = _client()
+    client.get("/api/todos/")
+
+    with django_capture_on_commit_callbacks(execute=True):
+        client.post("/api/todos/", {"title": "new"}, format="json")
+    response = client.get("/api/todos/")
+
+    assert response["X-Cache"] == "MISS"
+    assert [t["title"] for t in response.json()["results"]] == ["new"]
+
+
+def test_entries_are_per_user(django_capture_on_commit_callbacks):
+    Todo.objects.create(subject=SUB, title="mine")
+    Todo.objects.create(subject=OTHER, title="theirs")
+    _client().get("/api/todos/")
+
+    response = _client(OTHER).get("/api/todos/")
+
+    assert response["X-Cache"] == "MISS"
+    assert [t["title"] for t in response.json()["results"]] == ["theirs"]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        _client(OTHER).post("/api/todos/bulk/", [{"title": "more"}], format="json")
+    assert _client().get("/api/todos/")["X-Cache"] == "HIT"
+
+
+def test_stats_report_hit_ratio_and_size():
+    client = _client()
+    client.get("/api/todos/")
+    client.get("/api/todos/")
+
+    stats = response_cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_ratio"] == 0.5
+    assert stats["stored"] == 1
+    assert stats["stored_bytes"] > 0
+
+
+def test_cache_can_be_switched_off(settings):
+    settings.TODO_RESPONSE_CACHE = False
+    client = _client()
+    client.get("/api/todos/")
+
+    assert "X-Cache" not in client.get("/api/todos/")
+    assert response_cache.stats()["hits"] == 0
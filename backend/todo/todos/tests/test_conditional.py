@@ -0,0 +1,79 @@
+import pytest
+from rest_framework.test import APIClient
+
+from todo.auth_keycloak.authentication import build_user
+from todo.todos.models import Todo
+
+pytestmark = pytest.mark.django_db
+
+SUB = "0b8f7c1e-4c7a-4f57-9d8c-2b6a0c7f5e11"
+
+
+@pytest.fixture
+def client() -> APIClient:
+    client = APIClient()
+    client.force_authenticate(user=build_user({"sub": SUB, "preferred_username": "alice"}))
+    return client
+
+
+@pytest.fixture
+def todo():
+    return Todo.objects.create(subject=SUB, title="mine")
+
+
+@pytest.mark.parametrize("cache_enabled", [True, False])
+def test_unchanged_list_is_not_modified(client, todo, settings, cache_enabled):
+    settings.TODO_RESPONSE_CACHE = cache_enabled
+    etag = client.get("/api/todos/")["ETag"]
+
+    response = client.get("/api/todos/", HTTP_IF_NONE_MATCH=etag)
+
+    assert response.status_code == 304
+    assert response["ETag"] == etag
+    assert not response.content
+
+
+def test_list_etag_changes_after_a_write(client, todo, django_capture_on_commit_callbacks):
+    etag = client.get("/api/todos/")["ETag"]
+    with django_capture_on_commit_callbacks(execute=True):
+        client.patch(f"/api/todos/{todo.pk}/", {"completed": True}, format="json")
+
+    response = client.get("/api/todos/", HTTP_IF_NONE_MATCH=etag)
+
+    assert response.status_code == 200
+    assert response["ETag"] != etag
+
+
+def test_list_pages_have_their_own_etags(client, todo):
+    assert client.get("/api/todos/")["ETag"] != client.get("/api/todos/?page_size=1")["ETag"]
+
+
+@pytest.mark.parametrize("cache_enabled", [True, False])
+def test_unchanged_detail_is_not_modified(client, todo, settings, cache_enabled):
+    settings.TODO_RESPONSE_CACHE = cache_enabled
+    etag = client.get(f"/api/todos/{todo.pk}/")["ETag"]
+
+    assert client.get(f"/api/todos/{todo.pk}/", HTTP_IF_NONE_MATCH=etag).status_code == 304
+    assert client.get(f"/api/todos/{todo.pk}/", HTTP_IF_NONE_MATCH=f"W/{etag}").status_code == 304
+    assert client.get(f"/api/todos/{todo.pk}/", HTTP_IF_NONE_MATCH='"stale"').status_code == 200
+
+
+def test_if_match_guards_updates(client, todo):
+    etag = client.get(f"/api/todos/{todo.pk}/")["ETag"]
+
+    response = client.patch(f"/api/todos/{todo.pk}/", {"title": "first"}, format="json", HTTP_IF_MATCH=etag)
+    assert response.status_code == 200
+    assert response["ETag"] != etag
+
+    response = client.patch(f"/api/todos/{todo.pk}/", {"title": "second"}, format="json", HTTP_IF_MATCH=etag)
+    assert response.status_code == 412
+    todo.refresh_from_db()
+    assert todo.title == "first"
+
+
+def test_if_match_guards_deletes(client, todo):
+    weak = "W/" + client.get(f"/api/todos/{todo.pk}/")["ETag"]
+
+    assert client.delete(f"/api/todos/{todo.pk}/", HTTP_IF_MATCH='"0-0"').status_code == 412
+    assert client.delete(f"/api/todos/{todo.pk}/", HTTP_IF_MATCH=weak).status_code == 412
+    assert client.delete(f"/api/todos/{todo.pk}/", HTTP_IF_MATCH="*").status_code == 204
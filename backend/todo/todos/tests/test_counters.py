@@ -0,0 +1,101 @@
+import io
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from todo.auth_keycloak.authentication import build_user
+from todo.todos import counters
+from todo.todos import importer
+from todo.todos.models import Todo
+from todo.todos.models import TodoCounter
+
+pytestmark = pytest.mark.django_db
+
+SUB = "0b8f7c1e-4c7a-4f57-9d8c-2b6a0c7f5e11"
+OTHER = "service-account-reporting"
+
+
+def _client(sub=SUB) -> APIClient:
+    client = APIClient()
+    client.force_authenticate(user=build_user({"sub": sub, "preferred_username": sub}))
+    return client
+
+
+def test_stats_follow_api_writes():
+    client = _client()
+    assert client.get("/api/todos/stats/").json() == {"total": 0, "open": 0, "completed": 0}
+
+    a = client.post("/api/todos/", {"title": "a"}, format="json").json()
+    b = client.post("/api/todos/", {"title": "b"}, format="json").json()
+    client.patch(f"/api/todos/{a['id']}/", {"completed": True}, format="json")
+    client.patch(f"/api/todos/{a['id']}/", {"title": "still done"}, format="json")
+    client.delete(f"/api/todos/{b['id']}/")
+
+    assert client.get("/api/todos/stats/").json() == {"total": 1, "open": 0, "completed": 1}
+    assert _client(OTHER).get("/api/todos/stats/").json() == {"total": 0, "open": 0, "completed": 0}
+
+
+def test_stats_follow_bulk_writes():
+    client = _client()
+    created = client.post("/api/todos/bulk/", [{"title": f"t{n}"} for n in range(4)], format="json").json()
+    ids = [t["id"] for t in created["results"]]
+    client.patch("/api/todos/bulk/", [{"id": pk, "completed": True} for pk in ids[:3]], format="json")
+    client.delete("/api/todos/bulk/", [ids[0], ids[3]], format="json")
+
+    assert client.get("/api/todos/stats/").json() == {"total": 2, "open": 0, "completed": 2}
+
+
+def test_imports_are_counted():
+    importer.import_todos(OTHER, io.StringIO('{"title": "a"}\n{"title": "b", "completed": true}\n'), "ndjson")
+
+    assert counters.get(OTHER) == {"total": 2, "open": 1, "completed": 1}
+
+
+def test_stats_read_one_row():
+    client = _client()
+    client.post("/api/todos/", {"title": "a"}, format="json")
+
+    with CaptureQueriesContext(connection) as queries:
+        client.get("/api/todos/stats/")
+
+    selects = [q["sql"] for q in queries.captured_queries if "SAVEPOINT" not in q["sql"]]
+    assert len(selects) == 1
+    assert "todos_todocounter" in selects[0]
+
+
+def test_failed_write_leaves_counters_alone():
+    client = _client()
+    client.post("/api/todos/", {"title": ""}, format="json")
+    client.patch("/api/todos/bulk/", [{"id": 12345, "completed": True}], format="json")
+
+    assert not TodoCounter.objects.exists()
+
+
+def test_reconcile_repairs_drift():
+    client = _client()
+    client.post("/api/todos/", {"title": "a"}, format="json")
+    # Written behind the API's back
+    Todo.objects.create(subject=SUB, title="b", completed=True)
+    Todo.objects.create(subject=OTHER, title="c")
+    TodoCounter.objects.create(user_sub="gone", total=3, open=3)
+
+    out = io.StringIO()
+    call_command("reconcile_todo_counters", stdout=out)
+
+    assert "Fixed 3 counter(s)" in out.getvalue()
+    assert counters.get(SUB) == {"total": 2, "open": 1, "completed": 1}
+    assert counters.get(OTHER) == {"total": 1, "open": 1, "completed": 0}
+    assert counters.get("gone") == {"total": 0, "open": 0, "completed": 0}
+    assert counters.reconcile() == 0
+
+
+def test_reconcile_one_user():
+    Todo.objects.create(subject=SUB, title="a")
+    Todo.objects.create(subject=OTHER, title="b")
+
+    assert counters.reconcile(SUB) == 1
+    assert counters.get(SUB)["total"] == 1
+    assert not TodoCounter.objects.owned_by(OTHER).exists()
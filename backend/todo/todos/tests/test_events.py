@@ -0,0 +1,170 @@
+import json
+import logging
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import RequestFactory
+from rest_framework.test import APIClient
+
+from todo.auth_keycloak.authentication import build_user
+from todo.auth_keycloak.tests.conftest import KID
+from todo.auth_keycloak.tests.factories import mint_token
+from todo.todos import events
+from todo.todos.async_views import todo_events
+
+SUB = "0b8f7c1e-4c7a-4f57-9d8c-2b6a0c7f5e11"
+
+
+class MemoryHub(events.EventHub):
+    """``EventHub`` whose backlog is a list, for exercising ``events.stream`` without Redis"""
+
+    def __init__(self, entries=()):
+        super().__init__()
+        self.entries = list(entries)
+
+    def _start(self):
+        pass
+
+    async def tail(self, sub):
+        return self.entries[-1]["id"] if self.entries else "0-0"
+
+    async def backlog(self, sub, after):
+        after = events._position(after)
+        return [e for e in self.entries if events._position(e["id"]) > after]
+
+
+def _event(event_id, kind=events.UPDATED, pk=1):
+    return {"id": event_id, "type": kind, "data": json.dumps({"id": pk})}
+
+
+def _read(body, count):
+    async def read():
+        chunks = [await anext(body) for _ in range(count)]
+        await body.aclose()
+        return chunks
+
+    return async_to_sync(read)()
+
+
+@pytest.fixture
+def events_on(settings):
+    settings.ASYNC_API = True
+    settings.TODO_EVENTS = True
+    settings.TODO_EVENTS_HEARTBEAT = 0.01
+
+
+@pytest.fixture
+def no_redis(settings, monkeypatch):
+    # Nothing listens on port 1, so every Redis call fails fast.
+    settings.REDIS_URL = "redis://127.0.0.1:1/0"
+    monkeypatch.setattr(events, "_client", None)
+
+
+def test_event_framing():
+    assert events.format_event(_event("5-0")) == 'id: 5-0\nevent: todo.updated\ndata: {"id": 1}\n\n'
+
+
+def test_resumes_from_backlog_then_goes_live(events_on):
+    hub = MemoryHub([_event("1-0"), _event("2-0", pk=2)])
+
+    async def run():
+        body = events.stream(SUB, "1-0", hub=hub)
+        chunks = [await anext(body)]
+        # Published while the backlog is read: 2-0 arrives twice, 3-0 once.
+        hub.dispatch(SUB, _event("2-0", pk=2))
+        hub.dispatch(SUB, _event("3-0", pk=3))
+        hub.dispatch("someone-else", _event("4-0", pk=4))
+        chunks += [await anext(body) for _ in range(3)]
+        await body.aclose()
+        return chunks
+
+    retry, resumed, live, heartbeat = async_to_sync(run)()
+
+    assert retry == f"retry: {events.RETRY_MS}\n\n"
+    assert resumed.startswith("id: 2-0\n")
+    assert live.startswith("id: 3-0\n")
+    assert heartbeat == ": keepalive\n\n"
+    assert not hub._queues
+
+
+def test_new_connection_starts_at_the_tail(events_on):
+    hub = MemoryHub([_event("1-0")])
+
+    async def run():
+        body = events.stream(SUB, hub=hub)
+        await anext(body)
+        hub.dispatch(SUB, _event("2-0", pk=2))
+        chunk = await anext(body)
+        await body.aclose()
+        return chunk
+
+    assert async_to_sync(run)().startswith("id: 2-0\n")
+
+
+def test_slow_client_catches_up_from_backlog(events_on, monkeypatch):
+    monkeypatch.setattr(events, "QUEUE_SIZE", 2)
+    hub = MemoryHub()
+
+    async def run():
+        body = events.stream(SUB, hub=hub)
+        await anext(body)
+        for n in range(1, 4):
+            hub.entries.append(_event(f"{n}-0", pk=n))
+            hub.dispatch(SUB, hub.entries[-1])
+        chunks = [await anext(body) for _ in range(3)]
+        await body.aclose()
+        return chunks
+
+    assert [c.split("\n")[0] for c in async_to_sync(run)()] == ["id: 1-0", "id: 2-0", "id: 3-0"]
+
+
+def test_view_is_off_unless_enabled(settings):
+    settings.ASYNC_API = True
+    settings.TODO_EVENTS = False
+
+    response = async_to_sync(todo_events)(RequestFactory().get("/api/todos/events/"))
+
+    assert response.status_code == 503
+
+
+def test_view_requires_a_token(events_on):
+    response = async_to_sync(todo_events)(RequestFactory().get("/api/todos/events/"))
+
+    assert response.status_code == 401
+    assert response["WWW-Authenticate"].startswith("Bearer")
+
+
+def test_view_streams_the_users_events(events_on, keycloak, rsa_key, monkeypatch):
+    hub = MemoryHub([_event("1-0"), _event("2-0", pk=2)])
+    monkeypatch.setattr(events, "event_hub", hub)
+    request = RequestFactory().get(
+        "/api/todos/events/",
+        HTTP_AUTHORIZATION=f"Bearer {mint_token(rsa_key, KID)}",
+        HTTP_LAST_EVENT_ID="1-0",
+    )
+
+    response = async_to_sync(todo_events)(request)
+
+    assert response.status_code == 200
+    assert response["Content-Type"] == "text/event-stream"
+    assert response["Cache-Control"] == "no-cache"
+    _, resumed = _read(aiter(response.streaming_content), 2)
+    assert resumed.startswith(b"id: 2-0\n")
+
+
+def test_publish_is_off_by_default(settings, no_redis):
+    settings.TODO_EVENTS = False
+    events.publish(SUB, [(events.CREATED, {"id": 1})])
+
+
+@pytest.mark.django_db
+def test_writes_survive_redis_being_down(settings, no_redis, caplog, django_capture_on_commit_callbacks):
+    settings.TODO_EVENTS = True
+    client = APIClient()
+    client.force_authenticate(user=build_user({"sub": SUB, "preferred_username": SUB}))
+
+    with caplog.at_level(logging.WARNING, logger=events.__name__), django_capture_on_commit_callbacks(execute=True):
+        response = client.post("/api/todos/", {"title": "still saved"}, format="json")
+
+    assert response.status_code == 201
+    assert "Could not publish 1 todo event(s)" in caplog.text
@@ -0,0 +1,93 @@
+import csv
+import io
+import json
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.urls import resolve
+from rest_framework.test import APIClient
+from rest_framework.test import APIRequestFactory
+
+from todo.auth_keycloak.authentication import build_user
+from todo.auth_keycloak.tests.conftest import KID
+from todo.auth_keycloak.tests.factories import mint_token
+from todo.todos import export
+from todo.todos.models import Todo
+from todo.todos.views import TodoViewSet
+
+pytestmark = pytest.mark.django_db
+
+SUB = "0b8f7c1e-4c7a-4f57-9d8c-2b6a0c7f5e11"
+
+
+def _client(sub=SUB) -> APIClient:
+    client = APIClient()
+    client.force_authenticate(user=build_user({"sub": sub, "preferred_username": sub}))
+    return client
+
+
+def _body(response) -> str:
+    return b"".join(response.streaming_content).decode()
+
+
+def test_ndjson_is_the_default():
+    first = Todo.objects.create(subject=SUB, title="first")
+    Todo.objects.create(subject=SUB, title="second, with \"quotes\"", completed=True)
+    Todo.objects.create(subject="someone-else", title="theirs")
+
+    response = _client().get("/api/todos/export/")
+
+    assert response.status_code == 200
+    assert response["Content-Type"] == "application/x-ndjson; charset=utf-8"
+    assert response["Content-Disposition"].startswith('attachment; filename="todos-')
+    rows = [json.loads(line) for line in _body(response).splitlines()]
+    assert [r["title"] for r in rows] == ["first", "second, with \"quotes\""]
+    assert list(rows[0]) == export.FIELDS
+    assert rows[0]["id"] == first.pk
+    assert rows[1]["completed"] is True
+
+
+def test_csv():
+    Todo.objects.create(subject=SUB, title="a, b", description="two\nlines")
+
+    response = _client().get("/api/todos/export/?format=csv")
+
+    assert response["Content-Type"] == "text/csv; charset=utf-8"
+    header, row = list(csv.reader(io.StringIO(_body(response))))
+    assert header == export.FIELDS
+    assert row[1:4] == ["a, b", "two\nlines", "False"]
+
+
+def test_output_is_sent_in_blocks(settings, monkeypatch):
+    settings.TODO_EXPORT_CHUNK_SIZE = 10
+    monkeypatch.setattr(export, "BLOCK_SIZE", 512)
+    Todo.objects.bulk_create(Todo(subject=SUB, title=f"todo {n}") for n in range(50))
+
+    blocks = list(_client().get("/api/todos/export/").streaming_content)
+
+    assert len(blocks) > 1
+    assert all(len(block) < 1024 for block in blocks)
+    assert b"".join(blocks).count(b"\n") == 50
+
+
+def test_export_is_left_out_of_atomic_requests():
+    assert resolve("/api/todos/export/").func._non_atomic_requests == {"default"}
+    assert not hasattr(TodoViewSet.as_view({"get": "list"}), "_non_atomic_requests")
+
+
+def test_export_runs_async(settings, keycloak, rsa_key):
+    settings.ASYNC_API = True
+    Todo.objects.create(subject=SUB, title="mine")
+    view = TodoViewSet.as_view({"get": "export"}, **TodoViewSet.export.kwargs)
+    request = APIRequestFactory().get(
+        "/api/todos/export/?format=csv", HTTP_AUTHORIZATION=f"Bearer {mint_token(rsa_key, KID)}"
+    )
+
+    async def run():
+        response = await view(request)
+        return response, b"".join([block async for block in response.streaming_content])
+
+    response, body = async_to_sync(run)()
+
+    assert response.status_code == 200
+    assert body.decode().splitlines()[1].split(",")[1] == "mine"
@@ -0,0 +1,112 @@
+import io
+import json
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+
+from todo.todos import importer
+from todo.todos.cache import response_cache
+from todo.todos.models import Todo
+
+pytestmark = pytest.mark.django_db
+
+SUB = "0b8f7c1e-4c7a-4f57-9d8c-2b6a0c7f5e11"
+
+
+def _ndjson(*rows) -> io.StringIO:
+    return io.StringIO("".join(r if isinstance(r, str) else json.dumps(r) + "\n" for r in rows))
+
+
+def test_ndjson_import_skips_invalid_rows():
+    stream = _ndjson(
+        {"title": "  first  ", "description": "d"},
+        {"title": ""},
+        "not json\n",
+        "\n",
+        {"title": "done", "completed": True, "id": 999, "created_at": "2001-01-01T00:00:00Z"},
+        "[1, 2]\n",
+    )
+
+    report = importer.import_todos(SUB, stream, "ndjson")
+
+    assert report.imported == 2
+    assert report.rejected == 3
+    assert [r["line"] for r in report.rejects] == [2, 3, 6]
+    assert list(report.rejects[0]["errors"]) == ["title"]
+    todos = list(Todo.objects.owned_by(SUB).order_by("id"))
+    assert [(t.title, t.description, t.completed) for t in todos] == [("first", "d", False), ("done", "", True)]
+    assert todos[1].pk != 999
+    assert all(t.change_xid > 0 for t in todos)
+
+
+def test_csv_import():
+    stream = io.StringIO('title,description,completed\n"a, b","two\nlines",true\n,missing title,false\n')
+
+    report = importer.import_todos(SUB, stream, "csv")
+
+    assert (report.imported, report.rejected) == (1, 1)
+    assert report.rejects[0]["line"] == 4
+    todo = Todo.objects.owned_by(SUB).get()
+    assert (todo.title, todo.description, todo.completed) == ("a, b", "two\nlines", True)
+
+
+def test_rows_are_written_in_batches_in_file_order(settings):
+    settings.TODO_IMPORT_BATCH_SIZE = 2
+
+    report = importer.import_todos(SUB, _ndjson(*({"title": f"todo {n}"} for n in range(5))), "ndjson")
+
+    assert report.imported == 5
+    assert list(Todo.objects.owned_by(SUB).order_by("id").values_list("title", flat=True)) == [
+        f"todo {n}" for n in range(5)
+    ]
+
+
+def test_falls_back_to_bulk_create(monkeypatch):
+    monkeypatch.setattr(connection, "vendor", "sqlite")
+
+    report = importer.import_todos(SUB, _ndjson({"title": "a"}, {"title": "b", "completed": True}), "ndjson")
+
+    assert report.imported == 2
+    assert Todo.objects.owned_by(SUB).filter(completed=True).count() == 1
+
+
+def test_import_retires_cached_responses(django_capture_on_commit_callbacks):
+    before = response_cache.version(SUB)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        importer.import_todos(SUB, _ndjson({"title": "a"}), "ndjson")
+
+    assert response_cache.version(SUB) != before
+
+
+def test_exported_file_imports_again(tmp_path):
+    Todo.objects.create(subject="someone-else", title="exported", completed=True)
+    path = tmp_path / "todos.csv"
+    path.write_text("﻿id,title,description,completed,created_at,updated_at\n1,exported,,True,2024-01-01,2024-01-01\n")
+
+    report = importer.import_file(SUB, str(path))
+
+    assert report.imported == 1
+    assert Todo.objects.owned_by(SUB).get().completed is True
+
+
+def test_command_reports_throughput_and_rejects(tmp_path):
+    path = tmp_path / "todos.ndjson"
+    path.write_text('{"title": "ok"}\n{"title": ""}\n')
+    out, err = io.StringIO(), io.StringIO()
+
+    call_command("import_todos", str(path), user=SUB, stdout=out, stderr=err)
+
+    assert "Imported 1 todos" in out.getvalue()
+    assert "rows/s" in out.getvalue()
+    assert "rejected 1" in out.getvalue()
+    assert err.getvalue().startswith("line 2: ")
+
+
+def test_unknown_extension_needs_a_format(tmp_path):
+    path = tmp_path / "todos.txt"
+    path.write_text("")
+
+    with pytest.raises(ValueError, match="Cannot tell the format"):
+        importer.import_file(SUB, str(path))
@@ -0,0 +1,58 @@
+import importlib
+import uuid
+
+import pytest
+from django.apps import apps
+from django.db import connection
+
+from todo.todos.models import Todo
+from todo.todos.models import subject_fields
+
+pytestmark = pytest.mark.django_db
+
+SUB = "0b8f7c1e-4c7a-4f57-9d8c-2b6a0c7f5e11"
+
+backfill = importlib.import_module("todo.todos.migrations.0004_backfill_user_uuid")
+
+
+def test_uuid_subjects_are_stored_natively():
+    todo = Todo.objects.create(subject=SUB, title="mine")
+    todo.refresh_from_db()
+
+    assert todo.user_uuid == uuid.UUID(SUB)
+    assert todo.user_sub == ""
+    assert todo.subject == SUB
+
+
+@pytest.mark.parametrize("sub", ["service-account-ci", SUB.upper(), SUB.replace("-", "")])
+def test_other_subjects_fall_back_to_text(sub):
+    assert subject_fields(sub) == {"user_uuid": None, "user_sub": sub}
+    todo = Todo.objects.create(subject=sub, title="mine")
+
+    assert list(Todo.objects.owned_by(sub)) == [todo]
+    assert todo.subject == sub
+
+
+def test_owned_by_keeps_subjects_apart():
+    mine = Todo.objects.create(subject=SUB, title="mine")
+    Todo.objects.create(subject=str(uuid.uuid4()), title="theirs")
+    Todo.objects.create(subject="service-account-ci", title="ci")
+
+    assert list(Todo.objects.owned_by(SUB)) == [mine]
+
+
+def test_backfill_moves_uuid_subjects_in_batches(monkeypatch):
+    legacy = [Todo.objects.create(subject="placeholder", title=f"legacy {i}") for i in range(5)]
+    Todo.objects.filter(pk__in=[t.pk for t in legacy[:4]]).update(user_sub=SUB)
+    monkeypatch.setattr(backfill, "BATCH_SIZE", 2)
+
+    with connection.schema_editor() as schema_editor:
+        backfill.move_subjects_to_uuid(apps, schema_editor)
+
+    assert Todo.objects.owned_by(SUB).count() == 4
+    assert Todo.objects.owned_by("placeholder").count() == 1
+
+    with connection.schema_editor() as schema_editor:
+        backfill.move_subjects_to_text(apps, schema_editor)
+
+    assert set(Todo.objects.values_list("user_sub", "user_uuid")) == {(SUB, None), ("placeholder", None)}
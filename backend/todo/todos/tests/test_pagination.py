@@ -0,0 +1,99 @@
+import json
+from datetime import timedelta
+
+import pytest
+from asgiref.sync import async_to_sync
+from asgiref.sync import iscoroutinefunction
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+from rest_framework.test import force_authenticate
+
+from todo.auth_keycloak.authentication import build_user
+from todo.todos.models import Todo
+from todo.todos.views import TodoViewSet
+
+pytestmark = pytest.mark.django_db
+
+SUB = "0b8f7c1e-4c7a-4f57-9d8c-2b6a0c7f5e11"
+
+
+@pytest.fixture
+def api_rf() -> APIRequestFactory:
+    return APIRequestFactory()
+
+
+@pytest.fixture
+def todos():
+    Todo.objects.bulk_create(Todo(subject=SUB, title=f"todo {i}") for i in range(7))
+    Todo.objects.create(subject="someone-else", title="theirs")
+    # Give three of them the same timestamp so the id tie-breaker matters.
+    now = timezone.now()
+    mine = list(Todo.objects.owned_by(SUB).order_by("id"))
+    for i, todo in enumerate(mine):
+        todo.created_at = now if i in (2, 3, 4) else now - timedelta(minutes=i)
+    Todo.objects.bulk_update(mine, ["created_at"])
+    return list(Todo.objects.owned_by(SUB).order_by("-created_at", "-id"))
+
+
+def _get(api_rf, path, view=None):
+    view = view or TodoViewSet.as_view({"get": "list"})
+    request = api_rf.get(path)
+    force_authenticate(request, user=build_user({"sub": SUB, "preferred_username": "alice"}))
+    response = async_to_sync(view)(request) if iscoroutinefunction(view) else view(request)
+    if hasattr(response, "render"):
+        response.render()
+    return response.status_code, json.loads(response.content)
+
+
+def _all_pages(api_rf, path, view=None):
+    titles, pages = [], 0
+    while path:
+        status, body = _get(api_rf, path, view)
+        assert status == 200
+        titles += [t["title"] for t in body["results"]]
+        path, pages = body["next"], pages + 1
+    return titles, pages
+
+
+def test_pages_follow_created_at_then_id(api_rf, todos):
+    titles, pages = _all_pages(api_rf, "/api/todos/?page_size=2")
+
+    assert titles == [t.title for t in todos]
+    assert pages == 4
+
+
+def test_async_list_pages_the_same_way(api_rf, todos, settings):
+    settings.ASYNC_API = True
+    titles, _ = _all_pages(api_rf, "/api/todos/?page_size=3", TodoViewSet.as_view({"get": "list"}))
+
+    assert titles == [t.title for t in todos]
+
+
+def test_count_is_opt_in(api_rf, todos):
+    _, body = _get(api_rf, "/api/todos/?page_size=2")
+    assert "count" not in body
+
+    _, body = _get(api_rf, "/api/todos/?page_size=2&count=true")
+    assert body["count"] == 7
+    assert "count=" not in body["next"]
+
+
+def test_page_size_defaults_and_limits(api_rf, todos, settings):
+    settings.TODO_PAGE_SIZE = 4
+    settings.TODO_MAX_PAGE_SIZE = 5
+
+    assert len(_get(api_rf, "/api/todos/")[1]["results"]) == 4
+    assert len(_get(api_rf, "/api/todos/?page_size=100")[1]["results"]) == 5
+    assert len(_get(api_rf, "/api/todos/?page_size=nope")[1]["results"]) == 4
+
+
+def test_each_page_is_a_single_query(api_rf, todos, django_assert_num_queries):
+    _, body = _get(api_rf, "/api/todos/?page_size=2")
+    with django_assert_num_queries(1):
+        _get(api_rf, body["next"])
+
+
+@pytest.mark.parametrize("cursor", ["garbage", "bm90LWEtZGF0ZXwx", "MjAyNi0wMS0wMVQwMDowMDowMHwx"])
+def test_invalid_cursor_is_not_found(api_rf, todos, cursor):
+    status, _ = _get(api_rf, f"/api/todos/?cursor={cursor}")
+    assert status == 404
@@ -0,0 +1,87 @@
+import json
+import uuid
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from todo.todos.models import Todo
+from todo.todos.pagination import TodoCursorPagination
+
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.skipif(connection.vendor != "postgresql", reason="plans are Postgres specific"),
+]
+
+SUB = "0b8f7c1e-4c7a-4f57-9d8c-2b6a0c7f5e11"
+
+
+@pytest.fixture(autouse=True)
+def todos():
+    now = timezone.now()
+    Todo.objects.bulk_create(
+        Todo(subject=str(uuid.UUID(int=i % 20)) if i % 4 else SUB, title=f"todo {i}", completed=i % 3 == 0)
+        for i in range(400)
+    )
+    Todo.objects.update(created_at=now - timedelta(minutes=1))
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE todos_todo")
+        # Tiny test tables are cheaper to scan and sort than to walk an index;
+        # take those options away so the plan shows what a real-sized table gets.
+        cursor.execute("SET LOCAL enable_seqscan = off")
+        cursor.execute("SET LOCAL enable_bitmapscan = off")
+        cursor.execute("SET LOCAL enable_sort = off")
+
+
+def _plan_nodes(queryset):
+    def walk(node):
+        yield node
+        for child in node.get("Plans", []):
+            yield from walk(child)
+
+    plan = json.loads(queryset.explain(format="json"))[0]["Plan"]
+    return list(walk(plan))
+
+
+def _assert_ordered_index_scan(queryset, index_name):
+    nodes = _plan_nodes(queryset)
+    node_types = [node["Node Type"] for node in nodes]
+    assert "Sort" not in node_types, node_types
+    assert "Bitmap Heap Scan" not in node_types, node_types
+    assert index_name in [node.get("Index Name") for node in nodes], nodes
+
+
+def test_user_list_reads_the_composite_index_in_order():
+    queryset = Todo.objects.owned_by(SUB).order_by("-created_at", "-id")[:51]
+
+    _assert_ordered_index_scan(queryset, "todos_todo_uuid_created_idx")
+
+
+def test_cursor_page_is_an_index_range_scan():
+    paginator = TodoCursorPagination()
+    last = Todo.objects.owned_by(SUB).order_by("-created_at", "-id")[10]
+    request = Request(APIRequestFactory().get("/api/todos/", {"cursor": paginator.encode_cursor(last)}))
+    queryset = paginator.page_queryset(Todo.objects.owned_by(SUB), request)
+
+    nodes = _plan_nodes(queryset)
+    _assert_ordered_index_scan(queryset, "todos_todo_uuid_created_idx")
+    index_cond = next(n["Index Cond"] for n in nodes if n.get("Index Name") == "todos_todo_uuid_created_idx")
+    assert "created_at" in index_cond
+
+
+def test_open_todos_use_the_partial_index():
+    queryset = Todo.objects.owned_by(SUB).filter(completed=False).order_by("-created_at", "-id")[:51]
+
+    _assert_ordered_index_scan(queryset, "todos_todo_uuid_open_idx")
+
+
+def test_non_uuid_subjects_use_the_fallback_index():
+    Todo.objects.bulk_create(Todo(subject="service-account-ci", title=f"ci {i}") for i in range(20))
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE todos_todo")
+    queryset = Todo.objects.owned_by("service-account-ci").order_by("-created_at", "-id")[:51]
+
+    _assert_ordered_index_scan(queryset, "todos_todo_sub_created_idx")
@@ -0,0 +1,120 @@
+import json
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.db import connection
+from rest_framework.test import APIClient
+from rest_framework.test import APIRequestFactory
+
+from todo.auth_keycloak.authentication import build_user
+from todo.auth_keycloak.tests.conftest import KID
+from todo.auth_keycloak.tests.factories import mint_token
+from todo.todos import search
+from todo.todos.models import Todo
+from todo.todos.views import TodoViewSet
+
+pytestmark = pytest.mark.django_db
+
+SUB = "0b8f7c1e-4c7a-4f57-9d8c-2b6a0c7f5e11"
+URL = "/api/todos/search/"
+
+postgres_only = pytest.mark.skipif(connection.vendor != "postgresql", reason="ranked search needs Postgres")
+
+
+def _client(sub=SUB) -> APIClient:
+    client = APIClient()
+    client.force_authenticate(user=build_user({"sub": sub, "preferred_username": sub}))
+    return client
+
+
+def _titles(response):
+    return [t["title"] for t in response.json()["results"]]
+
+
+@pytest.fixture
+def todos():
+    Todo.objects.create(subject=SUB, title="Call the plumber", description="about the groceries bill")
+    Todo.objects.create(subject=SUB, title="Buy groceries", description="milk and eggs")
+    Todo.objects.create(subject=SUB, title="Walk the dog")
+    Todo.objects.create(subject="someone-else", title="Their groceries")
+
+
+@postgres_only
+def test_title_matches_rank_first(todos):
+    response = _client().get(URL, {"q": "groceries"})
+
+    assert response.status_code == 200
+    assert _titles(response) == ["Buy groceries", "Call the plumber"]
+
+
+@postgres_only
+def test_words_match_as_prefixes(todos):
+    assert _titles(_client().get(URL, {"q": "groc"})) == ["Buy groceries", "Call the plumber"]
+    assert _titles(_client().get(URL, {"q": "buy groc"})) == ["Buy groceries"]
+    assert _titles(_client().get(URL, {"q": "eggs"})) == ["Buy groceries"]
+    assert _titles(_client().get(URL, {"q": "rocket"})) == []
+
+
+@postgres_only
+def test_pages_follow_the_ranking(todos):
+    client = _client()
+    titles, url = [], f"{URL}?q=groceries&page_size=1"
+    while url:
+        body = client.get(url).json()
+        titles += [t["title"] for t in body["results"]]
+        url = body["next"]
+
+    assert titles == ["Buy groceries", "Call the plumber"]
+
+
+@postgres_only
+def test_typos_in_titles_still_match(todos):
+    if not search.trigrams():
+        pytest.skip("pg_trgm is not installed")
+    assert _titles(_client().get(URL, {"q": "grocreies"})) == ["Buy groceries"]
+
+
+@postgres_only
+def test_search_reads_the_vector_index(todos):
+    queryset = search.search(Todo.objects.owned_by(SUB), "groceries").order_by("-rank", "-id")[:51]
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE todos_todo")
+        cursor.execute("SET LOCAL enable_seqscan = off")
+        cursor.execute("SET LOCAL enable_indexscan = off")
+
+    plan = json.loads(queryset.explain(format="json"))[0]["Plan"]
+
+    def index_names(node):
+        yield node.get("Index Name")
+        for child in node.get("Plans", []):
+            yield from index_names(child)
+
+    assert {"todos_todo_uuid_search_idx", "todos_todo_search_idx"} & set(index_names(plan))
+
+
+def test_falls_back_to_icontains(todos, monkeypatch):
+    monkeypatch.setattr(connection, "vendor", "sqlite")
+
+    response = _client().get(URL, {"q": "GROCERIES"})
+
+    assert _titles(response) == ["Buy groceries", "Call the plumber"]
+
+
+@pytest.mark.parametrize("q", ["", "   ", "x" * 201])
+def test_query_is_required_and_bounded(q):
+    response = _client().get(URL, {"q": q})
+
+    assert response.status_code == 400
+    assert "q" in response.json()
+
+
+@postgres_only
+def test_search_runs_async(todos, settings, keycloak, rsa_key):
+    settings.ASYNC_API = True
+    view = TodoViewSet.as_view({"get": "search"}, **TodoViewSet.search.kwargs)
+    request = APIRequestFactory().get(URL, {"q": "groceries"}, HTTP_AUTHORIZATION=f"Bearer {mint_token(rsa_key, KID)}")
+
+    response = async_to_sync(view)(request)
+
+    assert response.status_code == 200
+    assert [t["title"] for t in json.loads(response.content)["results"]] == ["Buy groceries", "Call the plumber"]
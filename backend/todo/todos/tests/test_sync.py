@@ -0,0 +1,137 @@
+import time
+
+import psycopg
+import pytest
+from django.db import connection
+from rest_framework.test import APIClient
+
+from todo.auth_keycloak.authentication import build_user
+from todo.todos.models import Todo
+from todo.todos.models import TodoTombstone
+from todo.todos.sync import encode_token
+from todo.todos.tasks import prune_todo_tombstones
+
+# Sync positions are transaction ids, so writes have to really commit.
+pytestmark = pytest.mark.django_db(transaction=True)
+
+SUB = "0b8f7c1e-4c7a-4f57-9d8c-2b6a0c7f5e11"
+OTHER = "5d2c4f0a-8f0e-4a4e-9d35-3b1f0a6f9c22"
+
+
+@pytest.fixture
+def client() -> APIClient:
+    client = APIClient()
+    client.force_authenticate(user=build_user({"sub": SUB, "preferred_username": "alice"}))
+    return client
+
+
+def _sync(client, since=None):
+    response = client.get("/api/todos/changes/", {"since": since} if since else {})
+    assert response.status_code == 200, response.content
+    return response.json()
+
+
+def _sync_all(client, since=None):
+    titles, deleted, calls = [], [], 0
+    while True:
+        body = _sync(client, since)
+        titles += [t["title"] for t in body["changes"]]
+        deleted += body["deleted"]
+        since, calls = body["next"], calls + 1
+        if not body["has_more"]:
+            return titles, deleted, since, calls
+
+
+def test_first_sync_returns_everything(client):
+    Todo.objects.create(subject=SUB, title="a")
+    Todo.objects.create(subject=SUB, title="b")
+    Todo.objects.create(subject=OTHER, title="theirs")
+
+    body = _sync(client)
+
+    assert sorted(t["title"] for t in body["changes"]) == ["a", "b"]
+    assert body["deleted"] == []
+    assert body["has_more"] is False
+
+
+def test_only_changes_since_the_token_are_returned(client):
+    kept = Todo.objects.create(subject=SUB, title="kept")
+    edited = Todo.objects.create(subject=SUB, title="edited")
+    removed = Todo.objects.create(subject=SUB, title="removed")
+    token = _sync(client)["next"]
+
+    assert _sync(client, token)["changes"] == []
+
+    client.patch(f"/api/todos/{edited.pk}/", {"completed": True}, format="json")
+    client.delete(f"/api/todos/{removed.pk}/")
+    Todo.objects.create(subject=OTHER, title="theirs")
+    body = _sync(client, token)
+
+    assert [t["title"] for t in body["changes"]] == ["edited"]
+    assert body["changes"][0]["completed"] is True
+    assert body["deleted"] == [removed.pk]
+    assert Todo.objects.filter(pk=kept.pk).exists()
+
+
+def test_queryset_writes_are_tracked_too(client):
+    todo = Todo.objects.create(subject=SUB, title="before")
+    token = _sync(client)["next"]
+
+    Todo.objects.filter(pk=todo.pk).update(title="after")
+    assert [t["title"] for t in _sync(client, token)["changes"]] == ["after"]
+
+    token = _sync(client, token)["next"]
+    Todo.objects.owned_by(SUB).delete()
+    assert _sync(client, token)["deleted"] == [todo.pk]
+
+
+def test_large_change_sets_are_paged(client, settings):
+    settings.TODO_SYNC_PAGE_SIZE = 2
+    # One transaction, so all five rows share a change_xid.
+    Todo.objects.bulk_create(Todo(subject=SUB, title=f"bulk {i}") for i in range(5))
+    Todo.objects.create(subject=SUB, title="single")
+
+    titles, _, token, calls = _sync_all(client)
+
+    assert sorted(titles) == ["bulk 0", "bulk 1", "bulk 2", "bulk 3", "bulk 4", "single"]
+    assert calls == 3
+    assert _sync(client, token)["changes"] == []
+
+
+def test_changes_committed_out_of_order_are_not_skipped(client):
+    params = connection.get_connection_params()
+    with psycopg.connect(**params) as slow:
+        # The slow transaction takes its xid first but commits last.
+        slow.execute(
+            "INSERT INTO todos_todo (user_uuid, user_sub, title, description, completed, created_at, updated_at, change_xid)"
+            " VALUES (%s, '', 'slow', '', false, now(), now(), 0)",
+            [SUB],
+        )
+        Todo.objects.create(subject=SUB, title="fast")
+
+        first = _sync(client)
+        assert first["changes"] == []
+        slow.commit()
+
+    titles, _, _, _ = _sync_all(client, first["next"])
+    assert sorted(titles) == ["fast", "slow"]
+
+
+def test_invalid_token_is_rejected(client):
+    assert client.get("/api/todos/changes/", {"since": "nonsense"}).status_code == 400
+
+
+def test_expired_token_asks_for_a_full_resync(client, settings):
+    old = encode_token(1, 0, time.time() - (settings.TODO_SYNC_RETENTION_DAYS + 1) * 86400)
+
+    assert client.get("/api/todos/changes/", {"since": old}).status_code == 410
+
+
+def test_old_tombstones_are_pruned(settings):
+    todo = Todo.objects.create(subject=SUB, title="gone")
+    todo.delete()
+    assert prune_todo_tombstones() == 0
+
+    TodoTombstone.objects.update(deleted_at="2000-01-01T00:00:00Z")
+    assert prune_todo_tombstones() == 1
+    assert not TodoTombstone.objects.exists()
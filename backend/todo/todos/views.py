@@ -1,17 +1,29 @@
 from rest_framework import status
+from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.permissions import IsAuthenticated
+from django.http import Http404
 from django.shortcuts import get_object_or_404
 
 from todo.auth_keycloak.authentication import KeycloakJWTAuthentication
+from . import bulk
+from . import conditional
+from . import counters
+from . import events
+from . import export
+from . import search
+from . import sync
+from .async_views import AsyncReadViewSetMixin
+from .cache import response_cache
 from .models import Todo
+from .pagination import TodoCursorPagination
 from .serializers import TodoSerializer, TodoCreateSerializer
 
 import logging
 logger = logging.getLogger(__name__)
 
-class TodoViewSet(ModelViewSet):
+class TodoViewSet(AsyncReadViewSetMixin, ModelViewSet):
   """
   Simple Todo Viewset with CRUD operations
   """
@@ -23,12 +35,15 @@ class TodoViewSet(ModelViewSet):
 
   authentication_classes = [KeycloakJWTAuthentication]
   permission_classes = [IsAuthenticated]
+  pagination_class = TodoCursorPagination
+  async_actions = ('list', 'retrieve', 'search', 'export', 'stats')
+  non_atomic_actions = ('export',)
 
   def get_queryset(self):
     """
       returns actual Todo objects from database
     """
-    return Todo.objects.filter(user_sub = self.request.user.id)
+    return Todo.objects.owned_by(self.request.user.id)
 
   def get_serializer_class(self):
     """
@@ -38,6 +53,15 @@ class TodoViewSet(ModelViewSet):
       return TodoCreateSerializer
     return TodoSerializer
 
+  def changed(self, changes):
+    """
+      After a write commits: retire the user's cached responses and push
+      `changes`, a list of (event type, data), to their event stream
+    """
+    sub = self.request.user.id
+    response_cache.invalidate(sub)
+    events.publish_on_commit(sub, changes)
+
   def create(self, request, *args, **kwargs):
     """
     Create a new todo for the authenticated user
@@ -53,41 +77,183 @@ class TodoViewSet(ModelViewSet):
     serializer = self.get_serializer(data=request.data)
     serializer.is_valid(raise_exception=True)
 
-    #Save with user_sub from JWT token
-
-    todo = serializer.save(user_sub = request.user.id)
+    #Save with the subject from JWT token
 
+    todo = serializer.save(subject = request.user.id)
+    counters.adjust(request.user.id, added=[todo.completed])
 
     #Return full todo data
     response_serializer = TodoSerializer(todo)
-    return Response(response_serializer.data, status=status.HTTP_201_CREATED)
+    self.changed([(events.CREATED, response_serializer.data)])
+    return Response(
+      response_serializer.data,
+      status=status.HTTP_201_CREATED,
+      headers={'ETag': conditional.todo_etag(todo)},
+    )
 
   def update(self, request, *args, **kwargs):
-    todo = get_object_or_404(Todo, id=kwargs['pk'], user_sub = request.user.id)
+    todo = get_object_or_404(Todo.objects.owned_by(request.user.id).select_for_update(), id=kwargs['pk'])
+    conditional.check_if_match(request, conditional.todo_etag(todo))
+    was_completed = todo.completed
 
     serializer = TodoSerializer(todo, data=request.data, partial=True)
     serializer.is_valid(raise_exception=True)
     serializer.save()
+    counters.adjust(request.user.id, added=[todo.completed], removed=[was_completed])
+    self.changed([(events.UPDATED, serializer.data)])
 
-    return Response(serializer.data)
+    return Response(serializer.data, headers={'ETag': conditional.todo_etag(todo)})
 
   def destroy(self, request, *args, **kwargs):
-    todo = get_object_or_404(Todo, id=kwargs['pk'], user_sub = request.user.id)
+    todo = get_object_or_404(Todo.objects.owned_by(request.user.id).select_for_update(), id=kwargs['pk'])
+    conditional.check_if_match(request, conditional.todo_etag(todo))
+    pk = todo.pk
     todo.delete()
+    counters.adjust(request.user.id, removed=[todo.completed])
+    self.changed([(events.DELETED, {'id': pk})])
     return Response(status=status.HTTP_204_NO_CONTENT)
 
+  @action(detail=False, methods=['post', 'patch', 'delete'], url_path='bulk')
+  def bulk(self, request, *args, **kwargs):
+    """
+      Batch create (POST a list of todos), update (PATCH a list of todos with
+      their ids) or delete (DELETE a list of ids) in one request and transaction
+    """
+    sub = request.user.id
+    try:
+      if request.method == 'POST':
+        results = TodoSerializer(bulk.create_many(sub, request.data), many=True).data
+        self.changed([(events.CREATED, data) for data in results])
+        return Response({'results': results}, status=status.HTTP_201_CREATED)
+      elif request.method == 'PATCH':
+        results = TodoSerializer(bulk.update_many(sub, request.data), many=True).data
+        self.changed([(events.UPDATED, data) for data in results])
+        return Response({'results': results})
+      else:
+        bulk.delete_many(sub, request.data)
+        self.changed([(events.DELETED, {'id': pk}) for pk in request.data])
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    except bulk.BulkValidationError as e:
+      return Response({'errors': e.errors}, status=status.HTTP_400_BAD_REQUEST)
+
+  @action(detail=False, methods=['get'], url_path='changes')
+  def changes(self, request, *args, **kwargs):
+    """
+      Todos created or updated since ?since=<token>, and ids of deleted ones.
+      Apply `changes`, then `deleted`, then sync again from `next`
+      (straight away while `has_more` is true).
+    """
+    result = sync.changes(request.user.id, request.query_params.get('since'))
+    result['changes'] = TodoSerializer(result['changes'], many=True).data
+    return Response(result)
+
+  @action(detail=False, methods=['get'], url_path='stats')
+  def stats(self, request, *args, **kwargs):
+    """
+      Total, open and completed todos of the user, read from their counter row
+    """
+    return Response(counters.get(request.user.id))
+
+  @action(
+    detail=False, methods=['get'], url_path='export',
+    renderer_classes=[export.NDJSONRenderer, export.CSVRenderer],
+  )
+  def export(self, request, *args, **kwargs):
+    """
+      Download every todo of the user, oldest first, as NDJSON
+      (?format=ndjson, the default) or CSV (?format=csv), streamed row by row
+    """
+    return export.response(request.accepted_renderer, export.blocks(request.accepted_renderer, self.get_queryset()))
+
+  @action(detail=False, methods=['get'], url_path='search')
+  def search(self, request, *args, **kwargs):
+    """
+      The user's todos matching ?q=, best match first, one cursor page at a time
+    """
+    q = search.clean_query(request.query_params.get('q'))
+    self.pagination_class = search.pagination_class()
+    return self.page_response(request, search.search(self.get_queryset(), q))
+
   def list(self, request, *args, **kwargs):
     """
-      List all todos for the authenticated user
+      List the authenticated user's todos, newest first, one cursor page at a time
+    """
+    return self.page_response(request, self.get_queryset())
+
+  def page_response(self, request, queryset):
+    """
+      One cursor page of `queryset`, answered with a 304 or from the response
+      cache when the user's todos have not changed
+    """
+    version = response_cache.version(request.user.id)
+    etag = conditional.collection_etag(request, version)
+    if conditional.if_none_match(request, etag):
+      return conditional.not_modified(etag)
+
+    key, cached = response_cache.get(request, version)
+    if cached is not None:
+      return cached
+
+    page = self.paginate_queryset(queryset)
+    serializer = TodoSerializer(page, many=True)
+
+    return response_cache.set(key, self.get_paginated_response(serializer.data).data, etag)
+
+  def retrieve(self, request, *args, **kwargs):
+    key, cached = response_cache.get(request)
+    if cached is not None:
+      return conditional.respond(request, cached)
+
+    todo = self.get_object()
+    etag = conditional.todo_etag(todo)
+    if conditional.if_none_match(request, etag):
+      return conditional.not_modified(etag)
+
+    return response_cache.set(key, TodoSerializer(todo).data, etag)
+
+  async def alist(self, request, *args, **kwargs):
+    """
+      Async list for ASGI deployments (see AsyncReadViewSetMixin)
     """
-    queryset = self.get_queryset()
-    serializer = TodoSerializer(queryset , many=True)
+    return await self.apage_response(request, self.get_queryset())
+
+  async def asearch(self, request, *args, **kwargs):
+    q = search.clean_query(request.query_params.get('q'))
+    self.pagination_class = search.pagination_class()
+    return await self.apage_response(request, search.search(self.get_queryset(), q))
+
+  async def apage_response(self, request, queryset):
+    version = await response_cache.aversion(request.user.id)
+    etag = conditional.collection_etag(request, version)
+    if conditional.if_none_match(request, etag):
+      return conditional.not_modified(etag)
+
+    key, cached = await response_cache.aget(request, version)
+    if cached is not None:
+      return cached
+
+    page = await self.paginator.apaginate_queryset(queryset, request, view=self)
+    serializer = TodoSerializer(page, many=True)
+
+    return await response_cache.aset(key, self.get_paginated_response(serializer.data).data, etag)
 
-    return Response({
-      'count': queryset.count(),
-      'results': serializer.data
-    })
+  async def aretrieve(self, request, *args, **kwargs):
+    key, cached = await response_cache.aget(request)
+    if cached is not None:
+      return conditional.respond(request, cached)
 
+    try:
+      todo = await self.get_queryset().aget(pk=kwargs['pk'])
+    except (Todo.DoesNotExist, ValueError):
+      raise Http404
+    etag = conditional.todo_etag(todo)
+    if conditional.if_none_match(request, etag):
+      return conditional.not_modified(etag)
 
+    return await response_cache.aset(key, TodoSerializer(todo).data, etag)
 
+  async def aexport(self, request, *args, **kwargs):
+    return export.response(request.accepted_renderer, export.ablocks(request.accepted_renderer, self.get_queryset()))
 
+  async def astats(self, request, *args, **kwargs):
+    return Response(await counters.aget(request.user.id))
@@ -23,7 +23,8 @@ class UserAdmin(auth_admin.UserAdmin):
                 ),
             },
         ),
-        (_("Important dates"), {"fields": ("last_login", "date_joined")}),
+        (_("Important dates"), {"fields": ("last_login", "last_seen", "date_joined")}),
+        (_("Keycloak"), {"fields": ("keycloak_sub",)}),
     )
-    list_display = ["username", "name", "is_superuser"]
-    search_fields = ["name"]
+    list_display = ["username", "name", "is_superuser", "last_seen"]
+    search_fields = ["name", "keycloak_sub"]
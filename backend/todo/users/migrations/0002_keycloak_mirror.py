@@ -0,0 +1,32 @@
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="keycloak_sub",
+            field=models.CharField(
+                blank=True,
+                max_length=255,
+                null=True,
+                unique=True,
+                verbose_name="Keycloak subject",
+            ),
+        ),
+        migrations.AddField(
+            model_name="user",
+            name="last_seen",
+            field=models.DateTimeField(
+                blank=True,
+                null=True,
+                verbose_name="Last seen",
+            ),
+        ),
+    ]
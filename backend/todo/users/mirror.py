@@ -0,0 +1,143 @@
+"""
+Optional mirror of Keycloak subjects into local ``User`` rows.
+
+The first time a subject authenticates a ``User`` keyed by ``keycloak_sub`` is
+upserted and its primary key remembered for the life of the process, so later
+requests cost no query at all. Mutable fields (email, last_seen) are only
+buffered per subject and written by ``flush()`` with one ``bulk_update``,
+from a background ``MirrorFlusher`` every ``KEYCLOAK_MIRROR_FLUSH_INTERVAL``
+seconds, instead of one UPDATE per request.
+
+Enabled with ``KEYCLOAK_MIRROR_USERS``; wired up in ``todo.users.signals``.
+"""
+
+import logging
+import threading
+from typing import Optional
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import IntegrityError
+from django.db import close_old_connections
+from django.db import transaction
+from django.utils import timezone
+
+from .models import User
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on remembered sub -> pk pairs before the map is dropped and rebuilt.
+MAX_CACHED_SUBJECTS = 100_000
+
+_lock = threading.Lock()
+_sub_to_pk: dict[str, int] = {}
+_pending: dict[str, dict] = {}
+_flusher: Optional["MirrorFlusher"] = None
+
+
+def touch(keycloak_user) -> int:
+    """Make sure ``keycloak_user`` has a local row and queue its activity; returns the pk."""
+    sub = keycloak_user.id
+    pk = _sub_to_pk.get(sub)
+    if pk is None:
+        pk = _upsert(keycloak_user)
+        # Only remember the pk once the row is committed; ATOMIC_REQUESTS may still roll it back.
+        transaction.on_commit(lambda: _remember(sub, pk))
+
+    with _lock:
+        _pending[sub] = {"email": keycloak_user.email or "", "last_seen": timezone.now()}
+    _ensure_flusher()
+    return pk
+
+
+def local_pk(sub: str) -> Optional[int]:
+    """Primary key of the mirrored user for ``sub``, if this process has seen it."""
+    pk = _sub_to_pk.get(sub)
+    if pk is None:
+        pk = User.objects.filter(keycloak_sub=sub).values_list("pk", flat=True).first()
+        if pk is not None:
+            _remember(sub, pk)
+    return pk
+
+
+def flush() -> int:
+    """Write buffered email/last_seen changes in one bulk UPDATE; returns rows written."""
+    global _pending  # noqa: PLW0603
+    with _lock:
+        pending, _pending = _pending, {}
+    if not pending:
+        return 0
+
+    users = list(User.objects.filter(keycloak_sub__in=pending.keys()).only("pk", "keycloak_sub", "email"))
+    for user in users:
+        changes = pending[user.keycloak_sub]
+        user.email = changes["email"] or user.email
+        user.last_seen = changes["last_seen"]
+    User.objects.bulk_update(users, ["email", "last_seen"], batch_size=500)
+    return len(users)
+
+
+def _remember(sub: str, pk: int) -> None:
+    with _lock:
+        if len(_sub_to_pk) >= MAX_CACHED_SUBJECTS:
+            _sub_to_pk.clear()
+        _sub_to_pk[sub] = pk
+
+
+def reset() -> None:
+    """Forget cached subjects and pending writes (tests, or after a fork)."""
+    with _lock:
+        _sub_to_pk.clear()
+        _pending.clear()
+
+
+def _upsert(keycloak_user) -> int:
+    sub = keycloak_user.id
+    defaults = {
+        "username": keycloak_user.username or sub,
+        "email": keycloak_user.email or "",
+        "password": make_password(None),
+    }
+    try:
+        with transaction.atomic():
+            user, _ = User.objects.get_or_create(keycloak_sub=sub, defaults=defaults)
+    except IntegrityError:
+        # Either another worker inserted the same subject first, or the
+        # username is already taken by a local account; fall back to the sub.
+        user = User.objects.filter(keycloak_sub=sub).first()
+        if user is None:
+            with transaction.atomic():
+                user = User.objects.create(keycloak_sub=sub, **{**defaults, "username": sub})
+    return user.pk
+
+
+class MirrorFlusher(threading.Thread):
+    """Daemon thread that calls ``flush()`` every ``KEYCLOAK_MIRROR_FLUSH_INTERVAL`` seconds."""
+
+    def __init__(self, interval: float):
+        super().__init__(name="keycloak-user-mirror-flusher", daemon=True)
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            try:
+                flush()
+            except Exception:
+                logger.warning("Flushing mirrored Keycloak users failed", exc_info=True)
+            finally:
+                close_old_connections()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+
+def _ensure_flusher() -> None:
+    global _flusher  # noqa: PLW0603
+    interval = settings.KEYCLOAK_MIRROR_FLUSH_INTERVAL
+    if not interval or (_flusher is not None and _flusher.is_alive()):
+        return
+    with _lock:
+        if _flusher is None or not _flusher.is_alive():
+            _flusher = MirrorFlusher(interval)
+            _flusher.start()
@@ -1,5 +1,6 @@
 from django.contrib.auth.models import AbstractUser
 from django.db.models import CharField
+from django.db.models import DateTimeField
 from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
 
@@ -15,6 +16,15 @@ class User(AbstractUser):
     name = CharField(_("Name of User"), blank=True, max_length=255)
     first_name = None  # type: ignore[assignment]
     last_name = None  # type: ignore[assignment]
+    # Set for users mirrored from Keycloak (see todo.users.mirror)
+    keycloak_sub = CharField(
+        _("Keycloak subject"),
+        max_length=255,
+        unique=True,
+        null=True,
+        blank=True,
+    )
+    last_seen = DateTimeField(_("Last seen"), null=True, blank=True)
 
     def get_absolute_url(self) -> str:
         """Get URL for user's detail view.
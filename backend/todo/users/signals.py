@@ -0,0 +1,12 @@
+from django.conf import settings
+from django.dispatch import receiver
+
+from todo.auth_keycloak.signals import keycloak_user_authenticated
+
+
+@receiver(keycloak_user_authenticated)
+def mirror_keycloak_user(sender, user, **kwargs):
+    if settings.KEYCLOAK_MIRROR_USERS:
+        from todo.users import mirror  # noqa: PLC0415
+
+        mirror.touch(user)
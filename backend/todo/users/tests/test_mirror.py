@@ -0,0 +1,78 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from todo.auth_keycloak.authentication import build_user
+from todo.auth_keycloak.signals import keycloak_user_authenticated
+from todo.users import mirror
+from todo.users.models import User
+from todo.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+SUB = "0b8f7c1e-4c7a-4f57-9d8c-2b6a0c7f5e11"
+
+
+@pytest.fixture(autouse=True)
+def _reset_mirror():
+    mirror.reset()
+    yield
+    mirror.reset()
+
+
+def _keycloak_user(username="alice", email="alice@example.com"):
+    return build_user({"sub": SUB, "preferred_username": username, "email": email})
+
+
+def test_first_sight_upserts_local_user(django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        pk = mirror.touch(_keycloak_user())
+
+    user = User.objects.get(pk=pk)
+    assert user.keycloak_sub == SUB
+    assert user.username == "alice"
+    assert not user.has_usable_password()
+
+
+def test_known_subject_costs_no_query(django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        pk = mirror.touch(_keycloak_user())
+
+    with CaptureQueriesContext(connection) as queries:
+        assert mirror.touch(_keycloak_user()) == pk
+        assert mirror.local_pk(SUB) == pk
+    assert len(queries) == 0
+
+
+def test_username_clash_falls_back_to_sub():
+    UserFactory(username="alice")
+    pk = mirror.touch(_keycloak_user())
+
+    assert User.objects.get(pk=pk).username == SUB
+
+
+def test_activity_is_written_in_one_bulk_update(django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        mirror.touch(_keycloak_user())
+    for _ in range(5):
+        mirror.touch(_keycloak_user(email="new@example.com"))
+
+    with CaptureQueriesContext(connection) as queries:
+        assert mirror.flush() == 1
+    updates = [q for q in queries if q["sql"].startswith("UPDATE")]
+    assert len(updates) == 1
+
+    user = User.objects.get(keycloak_sub=SUB)
+    assert user.email == "new@example.com"
+    assert user.last_seen is not None
+    assert mirror.flush() == 0
+
+
+def test_signal_mirrors_only_when_enabled(settings):
+    settings.KEYCLOAK_MIRROR_USERS = False
+    keycloak_user_authenticated.send(sender=None, user=_keycloak_user(), request=None)
+    assert not User.objects.filter(keycloak_sub=SUB).exists()
+
+    settings.KEYCLOAK_MIRROR_USERS = True
+    keycloak_user_authenticated.send(sender=None, user=_keycloak_user(), request=None)
+    assert User.objects.filter(keycloak_sub=SUB).exists()